@@ -0,0 +1,87 @@
+"""
+Memory benchmark for entity storage.
+
+Measures the memory held by N entities stored as plain __dict__ objects (the previous Entity layout), as slotted Entity
+objects and as an EntityTable, plus the time to serialize the table.
+
+    python benchmarks/entity_memory.py [--count 100000] [--json results.json]
+"""
+from pathlib import Path
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from principalai_core.data import Entity, EntityTable
+
+class DictEntity():
+    """The pre-slots Entity layout, kept for comparison"""
+    def __init__(self, name, description, entitytype):
+        self.name = name
+        self.description = description
+        self.entitytype = entitytype
+
+TYPES = ("agent", "tool", "message", "entity")
+
+def rows(count: int):
+    #Names are built at runtime like they would be from parsed input, so they are not compile time constants
+    for index in range(count):
+        yield f"entity_{index % 1000}", f"Description of entity number {index}", "".join(TYPES[index % len(TYPES)])
+
+def measure(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--json", dest="jsonPath", default=None, help="Write results to this file")
+    arguments = parser.parse_args()
+    count = arguments.count
+
+    dictBytes, _ = measure(lambda: [DictEntity(*row) for row in rows(count)])
+    slottedBytes, _ = measure(lambda: [Entity(*row) for row in rows(count)])
+    tableBytes, table = measure(lambda: _build_table(count))
+
+    start = time.perf_counter()
+    serialized = table.to_json()
+    serializeSeconds = time.perf_counter() - start
+    start = time.perf_counter()
+    EntityTable.from_json(serialized)
+    deserializeSeconds = time.perf_counter() - start
+
+    results = {
+        "benchmark": "entity_memory",
+        "count": count,
+        "dictEntityBytesPerEntity": round(dictBytes / count, 1),
+        "slottedEntityBytesPerEntity": round(slottedBytes / count, 1),
+        "entityTableBytesPerEntity": round(tableBytes / count, 1),
+        "entityTableSerializeSeconds": round(serializeSeconds, 4),
+        "entityTableDeserializeSeconds": round(deserializeSeconds, 4),
+        "entityTableSerializedBytes": len(serialized)
+    }
+    for key, value in results.items():
+        print(f"{key:<32} {value}")
+    if arguments.jsonPath is not None:
+        with open(arguments.jsonPath, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+def _build_table(count: int) -> EntityTable:
+    table = EntityTable()
+    for row in rows(count):
+        table.append(*row)
+    return table
+
+if __name__ == "__main__":
+    sys.exit(main())
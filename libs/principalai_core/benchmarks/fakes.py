@@ -0,0 +1,167 @@
+"""
+Deterministic local stand-ins for benchmarks: a fake LanguageModel and a local HTTP stub server.
+
+Neither talks to the network beyond 127.0.0.1, so benchmark numbers only reflect framework overhead plus the configured
+latency.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlsplit
+import asyncio
+import hashlib
+import json
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from principalai_core.language_models import LanguageModel, StreamingResponse, AsyncStreamingResponse
+
+class FakeLanguageModel(LanguageModel):
+    """
+    Deterministic LanguageModel with configurable latency and token rate.
+
+    The response to a prompt is a fixed function of the prompt, so repeated runs produce identical output. A call takes
+    latency seconds until the first token plus outputTokens / tokensPerSecond seconds of generation.
+    """
+    def __init__(
+        self,
+        latency: float = 0.0,
+        tokensPerSecond: Optional[float] = None,
+        outputTokens: int = 16,
+        model: str = "fake-model"
+    ):
+        super().__init__()
+        self.providerName = "Fake"
+        self.model = model
+        self.latency = latency
+        self.tokensPerSecond = tokensPerSecond
+        self.outputTokens = outputTokens
+        self.calls: int = 0
+        self._lock = threading.Lock()
+
+    def tokens_for(self, prompt: Any) -> list[str]:
+        digest = hashlib.sha256(str(prompt).encode("utf-8")).hexdigest()
+        return [f"{digest[(2 * index) % len(digest):(2 * index) % len(digest) + 2]} " for index in range(self.outputTokens)]
+
+    @property
+    def _tokenDelay(self) -> float:
+        return 1.0 / self.tokensPerSecond if self.tokensPerSecond else 0.0
+
+    def run(self, prompt: Any, **parameters) -> str:
+        with self._lock:
+            self.calls += 1
+        total = self.latency + self._tokenDelay * self.outputTokens
+        if total:
+            time.sleep(total)
+        return "".join(self.tokens_for(prompt))
+
+    def stream(self, prompt: Any, **parameters) -> StreamingResponse:
+        with self._lock:
+            self.calls += 1
+        tokens = self.tokens_for(prompt)
+
+        def deltas():
+            if self.latency:
+                time.sleep(self.latency)
+            for token in tokens:
+                if self._tokenDelay:
+                    time.sleep(self._tokenDelay)
+                yield token
+        return StreamingResponse(deltas())
+
+    async def arun(self, prompt: Any, **parameters) -> str:
+        with self._lock:
+            self.calls += 1
+        total = self.latency + self._tokenDelay * self.outputTokens
+        if total:
+            await asyncio.sleep(total)
+        return "".join(self.tokens_for(prompt))
+
+    async def astream(self, prompt: Any, **parameters) -> AsyncStreamingResponse:
+        with self._lock:
+            self.calls += 1
+        tokens = self.tokens_for(prompt)
+
+        async def deltas():
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            for token in tokens:
+                if self._tokenDelay:
+                    await asyncio.sleep(self._tokenDelay)
+                yield token
+        return AsyncStreamingResponse(deltas())
+
+class LocalHttpStub():
+    """
+    Threaded HTTP server on 127.0.0.1 returning JSON, for ApiTool benchmarks.
+
+    GET and POST requests are answered with {"path": ..., "query": {...}, "body": ...} after latency seconds. Use as a
+    context manager; url is the base URL of the running server.
+    """
+    def __init__(
+        self,
+        latency: float = 0.0
+    ):
+        self.latency = latency
+        self.requests: int = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            #Send headers and body in one segment without Nagle, otherwise delayed ACKs add ~40 ms per keep-alive call
+            wbufsize = 1 << 16
+            disable_nagle_algorithm = True
+
+            def _respond(self, body: Any) -> None:
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                url = urlsplit(self.path)
+                payload = json.dumps({"path": url.path, "query": dict(parse_qsl(url.query)), "body": body}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._respond(None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length) if length else b""
+                self._respond(json.loads(raw) if raw else None)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            request_queue_size = 1024
+            daemon_threads = True
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "LocalHttpStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalHttpStub":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
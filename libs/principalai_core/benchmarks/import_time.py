@@ -0,0 +1,80 @@
+"""
+Import time benchmark for principalai_core and principalai_integrations.
+
+Each target is imported in a fresh interpreter with `python -X importtime` and its cumulative import time is recorded. The
+run fails (exit code 1) if a target goes over its budget or eagerly imports a heavy third party module that should only be
+loaded on first use.
+
+    python benchmarks/import_time.py [--repeat 5] [--json results.json]
+"""
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+LIBS = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = ("pydantic", "requests", "numpy", "openai")
+
+#import statement -> budget in milliseconds (min over repeats)
+TARGETS = {
+    "import principalai_core.agents": 10,
+    "from principalai_core.agents import Agent, AgentRegistry": 30,
+    "from principalai_core.tools import ApiTool, FunctionTool": 30,
+    "from principalai_core.prompts import FunctionPrompt": 30,
+    "from principalai_core.memory import ChatMemory": 30,
+    "from principalai_integrations.language_models.openai import OpenAI, AsyncOpenAI": 30,
+}
+
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+def measure(target: str) -> tuple[float, list[str]]:
+    """Return the import time of a statement in milliseconds and the heavy modules it imported"""
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [str(LIBS / "principalai_core"), str(LIBS / "principalai_integrations"), environment.get("PYTHONPATH", "")]
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", target],
+        capture_output=True, text=True, env=environment, check=True
+    )
+    cumulative = 0
+    imported = set()
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        module = match.group(4)
+        imported.add(module.split(".")[0])
+        #Top level principalai entries include everything they import
+        if len(match.group(3)) == 1 and module.startswith("principalai"):
+            cumulative += int(match.group(2))
+    return cumulative / 1000, sorted(imported.intersection(HEAVY_MODULES))
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", dest="jsonPath", default=None, help="Write results to this file")
+    arguments = parser.parse_args()
+
+    results = []
+    failed = False
+    for target, budget in TARGETS.items():
+        runs = [measure(target) for _ in range(arguments.repeat)]
+        milliseconds = min(run[0] for run in runs)
+        heavy = runs[0][1]
+        ok = milliseconds <= budget and not heavy
+        failed = failed or not ok
+        results.append({"target": target, "ms": round(milliseconds, 2), "budgetMs": budget, "heavyImports": heavy, "ok": ok})
+        print(f"{'ok  ' if ok else 'FAIL'} {target:<80} {milliseconds:8.2f} ms (budget {budget} ms)"
+              + (f" imports {', '.join(heavy)}" if heavy else ""))
+
+    if arguments.jsonPath is not None:
+        with open(arguments.jsonPath, "w") as f:
+            json.dump({"benchmark": "import_time", "python": sys.version.split()[0], "results": results}, f, indent=2)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
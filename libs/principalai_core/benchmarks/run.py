@@ -0,0 +1,223 @@
+"""
+Benchmark suite for principalai_core.
+
+Measures per call framework overhead, throughput and p50/p99 latency at N concurrent callers, registry lookup cost and
+memory per agent, against the local stand-ins in fakes.py. Results are printed and can be written as JSON so runs can be
+compared over time.
+
+    python benchmarks/run.py [--quick] [--only name[,name...]] [--concurrency 32] [--json results.json]
+
+See also import_time.py (cold start) and entity_memory.py (entity storage).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pydantic import BaseModel, Field
+
+from benchmarks.fakes import FakeLanguageModel, LocalHttpStub
+from principalai_core.agents import Agent, AgentRegistry
+from principalai_core.invocable import FunctionInvocable
+from principalai_core.prompts import FunctionPrompt
+from principalai_core.tools import ApiTool, FunctionTool
+from principalai_core.utils.http import HttpTransport
+
+class EchoInput(BaseModel):
+    text: str = Field(description="Text to echo")
+
+class EchoOutput(BaseModel):
+    path: str = Field(description="Request path")
+    query: dict = Field(description="Query parameters")
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def latency_summary(samples: list[float]) -> dict[str, float]:
+    """p50/p99/mean of latencies in seconds, reported in milliseconds"""
+    return {
+        "p50Ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p99Ms": round(percentile(samples, 0.99) * 1000, 3),
+        "meanMs": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0
+    }
+
+def per_call_ns(func: Callable[[], object], calls: int) -> float:
+    func()
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter_ns() - start) / calls
+
+def run_concurrent(func: Callable[[], object], callers: int, callsPerCaller: int) -> dict[str, float]:
+    """Run func from `callers` threads and report throughput and latency percentiles"""
+    def caller() -> list[float]:
+        latencies = []
+        for _ in range(callsPerCaller):
+            start = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        samples = [latency for latencies in executor.map(lambda _: caller(), range(callers)) for latency in latencies]
+    wall = time.perf_counter() - start
+    return {"callers": callers, "calls": len(samples), "throughputPerSecond": round(len(samples) / wall, 1),
+            **latency_summary(samples)}
+
+def bench_invocable_overhead(config: dict) -> dict:
+    invocable = FunctionInvocable(inputParameterSchema=EchoInput)(lambda text: text)
+    raw = lambda text: text
+    calls = config["calls"]
+    rawNs = per_call_ns(lambda: raw("x"), calls)
+    invocableNs = per_call_ns(lambda: invocable.run("x"), calls)
+    return {"rawCallNs": round(rawNs, 1), "invocableRunNs": round(invocableNs, 1), "overheadNs": round(invocableNs - rawNs, 1)}
+
+def bench_function_prompt_overhead(config: dict) -> dict:
+    languageModel = FakeLanguageModel()
+    prompt = FunctionPrompt(prompt="Classify the sentiment of: {text}")
+    prompt.set_language_model(languageModel)
+    calls = config["calls"]
+    rawNs = per_call_ns(lambda: languageModel.run("Classify the sentiment of: {text}".format(text="great")), calls)
+    promptNs = per_call_ns(lambda: prompt.run(text="great"), calls)
+    return {"rawCallNs": round(rawNs, 1), "functionPromptRunNs": round(promptNs, 1), "overheadNs": round(promptNs - rawNs, 1)}
+
+def bench_function_prompt_concurrency(config: dict) -> dict:
+    prompt = FunctionPrompt(prompt="Classify the sentiment of: {text}")
+    prompt.set_language_model(FakeLanguageModel(latency=config["llmLatency"]))
+    return run_concurrent(lambda: prompt.run(text="great"), config["concurrency"], config["callsPerCaller"])
+
+def _api_tool(url: str, transport: HttpTransport) -> ApiTool:
+    return ApiTool("echo", EchoInput, EchoOutput, description="Echo tool", apiEndpoint=f"{url}/echo", transport=transport)
+
+def bench_api_tool(config: dict) -> dict:
+    concurrency = config["concurrency"]
+    with LocalHttpStub(latency=config["httpLatency"]) as stub, \
+            HttpTransport(maxConnectionsPerHost=concurrency, maxHosts=1) as transport:
+        tool = _api_tool(stub.url, transport)
+        sequential = run_concurrent(lambda: tool.run(text="x"), 1, config["callsPerCaller"] * 4)
+        threaded = run_concurrent(lambda: tool.run(text="x"), concurrency, config["callsPerCaller"])
+
+        async def run_async() -> dict:
+            async def timed() -> float:
+                start = time.perf_counter()
+                await tool.arun(text="x")
+                return time.perf_counter() - start
+            calls = concurrency * config["callsPerCaller"]
+            start = time.perf_counter()
+            samples = await asyncio.gather(*(timed() for _ in range(calls)))
+            wall = time.perf_counter() - start
+            return {"callers": calls, "calls": calls, "throughputPerSecond": round(calls / wall, 1),
+                    **latency_summary(list(samples))}
+        asynchronous = asyncio.run(run_async())
+    return {"sequential": sequential, "threaded": threaded, "async": asynchronous}
+
+def bench_registry(config: dict) -> dict:
+    registry = AgentRegistry()
+    agentCount = config["agents"]
+    for index in range(agentCount):
+        registry.register_agent(Agent(f"agent_{index}", f"Agent number {index}"))
+    for index in range(agentCount):
+        registry.register_agent_factory(f"lazy_{index}", f"Lazy agent number {index}",
+                                        lambda index=index: Agent(f"lazy_{index}", None))
+    names = [f"agent_{index}" for index in range(agentCount)]
+    calls = config["calls"]
+
+    def lookup(position=[0]):
+        position[0] = (position[0] + 1) % agentCount
+        return registry.get_agent(names[position[0]])
+    lookupNs = per_call_ns(lookup, calls)
+
+    start = time.perf_counter_ns()
+    for index in range(agentCount):
+        registry.get_agent(f"lazy_{index}")
+    firstLoadNs = (time.perf_counter_ns() - start) / agentCount
+    return {"agents": agentCount * 2, "lookupNs": round(lookupNs, 1), "lazyFirstLoadNs": round(firstLoadNs, 1),
+            **run_concurrent(lookup, config["concurrency"], config["callsPerCaller"] * 10)}
+
+def bench_memory(config: dict) -> dict:
+    def build_agents() -> list[Agent]:
+        agents = []
+        for index in range(config["agents"]):
+            tools = [FunctionTool(f"tool_{index}_{toolIndex}", "A tool", func=lambda: None) for toolIndex in range(2)]
+            agents.append(Agent(f"agent_{index}", f"Agent number {index}", tools=tools))
+        return agents
+
+    def build_tools() -> list[FunctionTool]:
+        return [FunctionTool(f"tool_{index}", "A tool", func=lambda: None) for index in range(config["agents"])]
+
+    results = {}
+    for name, build in (("bytesPerAgentWithTwoTools", build_agents), ("bytesPerFunctionTool", build_tools)):
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        built = build()
+        gc.collect()
+        results[name] = round((tracemalloc.get_traced_memory()[0] - before) / len(built), 1)
+        tracemalloc.stop()
+        del built
+    return results
+
+BENCHMARKS: dict[str, Callable[[dict], dict]] = {
+    "invocable_overhead": bench_invocable_overhead,
+    "function_prompt_overhead": bench_function_prompt_overhead,
+    "function_prompt_concurrency": bench_function_prompt_concurrency,
+    "api_tool": bench_api_tool,
+    "registry": bench_registry,
+    "memory": bench_memory,
+}
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"timestamp": time.time(), "python": platform.python_version(), "platform": platform.platform(), "commit": commit}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations, for smoke runs")
+    parser.add_argument("--only", default=None, help="Comma separated benchmark names")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--json", dest="jsonPath", default=None, help="Write results to this file")
+    arguments = parser.parse_args()
+
+    config = {
+        "calls": 2_000 if arguments.quick else 50_000,
+        "callsPerCaller": 5 if arguments.quick else 50,
+        "concurrency": arguments.concurrency,
+        "agents": 200 if arguments.quick else 1_000,
+        "llmLatency": 0.01,
+        "httpLatency": 0.002,
+    }
+    selected = arguments.only.split(",") if arguments.only else list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in selected:
+        results[name] = BENCHMARKS[name](config)
+        print(f"{name}: {json.dumps(results[name])}")
+
+    if arguments.jsonPath is not None:
+        with open(arguments.jsonPath, "w") as f:
+            json.dump({"benchmark": "suite", "meta": metadata(), "config": config, "results": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
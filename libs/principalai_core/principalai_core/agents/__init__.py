@@ -1,5 +1,27 @@
-from .core import (
-    Agent,
-    FunctionAgent
-)
-from .register import AgentRegistry
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from principalai_core.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .core import (
+        Agent,
+        FunctionAgent
+    )
+    from .register import AgentRegistry
+    from .executor import (
+        ToolCall,
+        ToolResult,
+        ToolExecutor
+    )
+
+__all__ = ["Agent", "FunctionAgent", "AgentRegistry", "ToolCall", "ToolResult", "ToolExecutor"]
+
+#Submodules are imported on first access to keep `import principalai_core...` cheap
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "Agent": ".core",
+    "FunctionAgent": ".core",
+    "AgentRegistry": ".register",
+    "ToolCall": ".executor",
+    "ToolResult": ".executor",
+    "ToolExecutor": ".executor"
+})
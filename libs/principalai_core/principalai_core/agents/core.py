@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, Callable
+from __future__ import annotations
+from typing import Optional, Callable, TYPE_CHECKING
 from warnings import warn
 
 from principalai_core.invocable import Invocable, FunctionInvocable
@@ -12,6 +12,10 @@ from principalai_core.utils.errors import (
     IncorrectDefinitonError
 )
 
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+    from principalai_core.agents.executor import ToolCall, ToolResult, ToolExecutor
+
 class Agent(Invocable):
     """Base class for Agents - Agents are autonomous functions which utilize an LLM to achieve their objective."""
     def __init__(
@@ -22,11 +26,27 @@ class Agent(Invocable):
         outputParameterSchema: Optional[BaseModel] = None,
         languageModel: LanguageModel = None,
         languageModelRunEngine: Callable = None,
-        tools: Optional[list[Tool]] = None
+        tools: Optional[list[Tool]] = None,
+        toolExecutor: Optional[ToolExecutor] = None
     ):
         super().__init__(inputParameterSchema, outputParameterSchema, languageModel, languageModelRunEngine)
         self.attributes: Entity = Entity(name, description, "agent")
-        self.tools: Optional[dict[str, Tool]] = tools
+        self.tools: dict[str, Tool] = {}
+        for tool_ in tools or []:
+            self.add_tool(tool_)
+        self._toolExecutor: Optional[ToolExecutor] = toolExecutor
+
+    @property
+    def toolExecutor(self) -> ToolExecutor:
+        """Executor for concurrent tool calls. Created on first use so that asyncio is only imported when needed."""
+        if self._toolExecutor is None:
+            from principalai_core.agents.executor import ToolExecutor
+            self._toolExecutor = ToolExecutor()
+        return self._toolExecutor
+
+    @toolExecutor.setter
+    def toolExecutor(self, toolExecutor: ToolExecutor) -> None:
+        self._toolExecutor = toolExecutor
 
     def get_tools(self):
         """Return a list of all tools avaialable to the agent"""
@@ -53,6 +73,20 @@ class Agent(Invocable):
             raise DoesNotExistError(f'{toolname} does not exist as a tool in this agent. Please check the tool name again.')
         del self.tools[toolname]
 
+    def execute_tools(
+        self,
+        toolCalls: list[ToolCall]
+    ) -> list[ToolResult]:
+        """Run the tool calls of a model turn concurrently. Results are returned in the same order as toolCalls."""
+        return self.toolExecutor.run(self.tools, toolCalls)
+
+    async def aexecute_tools(
+        self,
+        toolCalls: list[ToolCall]
+    ) -> list[ToolResult]:
+        """Async version of execute_tools"""
+        return await self.toolExecutor.arun(self.tools, toolCalls)
+
 class FunctionAgent(Agent, FunctionInvocable):
     """Agents that are implemented as functions"""
     def __init__(
@@ -64,9 +98,11 @@ class FunctionAgent(Agent, FunctionInvocable):
         languageModel: LanguageModel = None,
         languageModelRunEngine: Callable = None,
         tools: Optional[list[Tool]] = None,
-        func: Optional[Callable] = None
+        func: Optional[Callable] = None,
+        toolExecutor: Optional[ToolExecutor] = None
     ):
-        super().__init__(name, description, inputParameterSchema, outputParameterSchema, tools, languageModel, languageModelRunEngine)
+        super().__init__(name, description, inputParameterSchema, outputParameterSchema, languageModel, languageModelRunEngine, tools,
+                         toolExecutor)
         self.func = func
     
     def __call__(
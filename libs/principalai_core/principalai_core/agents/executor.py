@@ -0,0 +1,181 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Optional, Sequence
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+
+from principalai_core.tools import Tool
+from principalai_core.utils.errors import DoesNotExistError, InvocationTimeoutError
+
+class ToolCall():
+    """A single tool invocation requested by a language model turn"""
+    def __init__(
+        self,
+        toolName: str,
+        args: Optional[Sequence[Any]] = None,
+        kwargs: Optional[dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        callId: Optional[str] = None
+    ):
+        self.toolName: str = toolName
+        self.args: tuple = tuple(args) if args is not None else ()
+        self.kwargs: dict[str, Any] = kwargs if kwargs is not None else {}
+        self.timeout: Optional[float] = timeout
+        self.callId: Optional[str] = callId
+
+class ToolResult():
+    """Outcome of a ToolCall. Exactly one of output and error is meaningful."""
+    def __init__(
+        self,
+        toolCall: ToolCall,
+        output: Any = None,
+        error: Optional[BaseException] = None,
+        elapsed: float = 0.0
+    ):
+        self.toolCall: ToolCall = toolCall
+        self.output: Any = output
+        self.error: Optional[BaseException] = error
+        self.elapsed: float = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class ToolExecutor():
+    """
+    Runs the tool calls of a single model turn concurrently.
+
+    Tools with an async arun (e.g. ApiTool) are awaited on the event loop, everything else runs on a thread pool. The wall
+    clock time of a turn is therefore that of the slowest tool instead of the sum of all tools. Results are returned in the
+    order the calls were given, regardless of completion order.
+
+    Each call is bounded by its own timeout (or defaultTimeout). A timed out or cancelled async tool is cancelled; a sync
+    tool cannot be interrupted mid-call, so its thread runs to completion in the background and the result is discarded.
+
+    The blocking run drives arun on one event loop per executor, running on its own thread and started on first use, so
+    agent turns do not create and tear down an event loop each time.
+    """
+    def __init__(
+        self,
+        maxWorkers: Optional[int] = None,
+        defaultTimeout: Optional[float] = None
+    ):
+        self.maxWorkers = maxWorkers
+        self.defaultTimeout = defaultTimeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loopThread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    async def arun(
+        self,
+        tools: dict[str, Tool],
+        toolCalls: Sequence[ToolCall]
+    ) -> list[ToolResult]:
+        """Run all tool calls concurrently and return their results in call order"""
+        return list(await asyncio.gather(*(self._run_one(tools, toolCall) for toolCall in toolCalls)))
+
+    def run(
+        self,
+        tools: dict[str, Tool],
+        toolCalls: Sequence[ToolCall]
+    ) -> list[ToolResult]:
+        """Blocking version of arun. Use arun when already inside an event loop."""
+        loop = self._get_loop()
+        if threading.current_thread() is self._loopThread:
+            raise RuntimeError('ToolExecutor.run cannot be called from a tool running on its own event loop; use arun.')
+        result: Future = Future()
+        coroutine = self.arun(tools, toolCalls)
+
+        def start():
+            #Started inside the caller's context so tracing spans nest across the hop to the loop thread
+            task = loop.create_task(coroutine)
+            task.add_done_callback(partial(_copy_outcome, result))
+        loop.call_soon_threadsafe(contextvars.copy_context().run, start)
+        return result.result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loopThread.join()
+                self._loop.close()
+                self._loop = None
+                self._loopThread = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="principalai-tool-loop", daemon=True)
+                    thread.start()
+                    self._loopThread = thread
+                    self._loop = loop
+        return self._loop
+
+    async def _run_one(
+        self,
+        tools: dict[str, Tool],
+        toolCall: ToolCall
+    ) -> ToolResult:
+        start = time.perf_counter()
+        tool = tools.get(toolCall.toolName)
+        if tool is None:
+            return ToolResult(toolCall, error=DoesNotExistError(f'{toolCall.toolName} does not exist as a tool in this agent.'))
+        timeout = toolCall.timeout if toolCall.timeout is not None else self.defaultTimeout
+        deadline = asyncio.timeout(timeout)
+        try:
+            async with deadline:
+                output = await self._invoke(tool, toolCall)
+        except TimeoutError as e:
+            #A TimeoutError raised by the tool itself is reported as is; only an expired deadline is a tool timeout
+            if not deadline.expired():
+                return ToolResult(toolCall, error=e, elapsed=time.perf_counter() - start)
+            return ToolResult(
+                toolCall,
+                error=InvocationTimeoutError(f'{toolCall.toolName} did not finish within {timeout} seconds.'),
+                elapsed=time.perf_counter() - start
+            )
+        except Exception as e:
+            return ToolResult(toolCall, error=e, elapsed=time.perf_counter() - start)
+        return ToolResult(toolCall, output=output, elapsed=time.perf_counter() - start)
+
+    def _invoke(
+        self,
+        tool: Tool,
+        toolCall: ToolCall
+    ):
+        asyncRun = getattr(tool, "arun", None)
+        if asyncRun is not None and inspect.iscoroutinefunction(asyncRun):
+            return asyncRun(*toolCall.args, **toolCall.kwargs)
+        loop = asyncio.get_running_loop()
+        #Run in a copy of the current context so tracing spans nest across the thread hop
+        context = contextvars.copy_context()
+        return loop.run_in_executor(
+            self._get_executor(), partial(context.run, tool.run, *toolCall.args, **toolCall.kwargs)
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="principalai-tool")
+        return self._executor
+
+def _copy_outcome(
+    future: Future,
+    task: asyncio.Task
+) -> None:
+    if task.cancelled():
+        future.cancel()
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
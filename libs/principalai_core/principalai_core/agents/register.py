@@ -1,23 +1,201 @@
-from pydantic import BaseModel
+from __future__ import annotations
+from types import MappingProxyType
+from typing import Callable, Iterator, Mapping, Optional, Union, TYPE_CHECKING
+import importlib
+import threading
 
-from principalai_core.agents.core import Agent
-from principalai_core.utils.errors import AlreadyExistsError
+from principalai_core.data import Entity
+from principalai_core.utils.errors import AlreadyExistsError, DoesNotExistError, IncorrectDefinitonError
 
-class AgentRegistry(BaseModel):
-    """Registry for managing agents"""
-    def __init__(self):
-        self.__agents: dict[str, Agent]
+if TYPE_CHECKING:
+    from principalai_core.agents.core import Agent
+    from principalai_core.orchestrator.agent_selection import AgentSelectionIndex
+
+AgentFactory = Union[Callable[[], "Agent"], str]
+
+class _AgentEntry():
+    """Registry slot for one agent. Holds either the agent itself or the factory that builds it on first use."""
+    __slots__ = ("attributes", "factory", "agent", "lock")
+
+    def __init__(
+        self,
+        attributes: Entity,
+        factory: Optional[AgentFactory] = None,
+        agent: Optional[Agent] = None
+    ):
+        self.attributes: Entity = attributes
+        self.factory: Optional[AgentFactory] = factory
+        self.agent: Optional[Agent] = agent
+        self.lock: Optional[threading.Lock] = threading.Lock() if agent is None else None
+
+class AgentRegistry():
+    """
+    Registry for managing agents.
+
+    Safe for concurrent use. Writes (registering and removing agents) are serialized and replace the registry's internal
+    mapping with an updated copy, so reads are plain dict lookups without locking and iteration always runs over a
+    consistent snapshot that writers never block on.
+
+    Agents can be registered eagerly with register_agent or lazily with register_agent_factory. A lazy agent is described
+    by its name and description only; its factory (and with it the agent's module, tools and language model) is only
+    imported and run the first time the agent is looked up or selected.
+    """
+    def __init__(
+        self,
+        selectionIndex: Optional[AgentSelectionIndex] = None
+    ):
+        '''
+        If a selectionIndex is provided, each agent's description is embedded into it once at registration so that
+        agents can be selected for a query without sending every description to a language model.
+        '''
+        self.__agents: Mapping[str, _AgentEntry] = MappingProxyType({})
+        self.__writeLock = threading.Lock()
+        self.selectionIndex: Optional[AgentSelectionIndex] = selectionIndex
+
+    def __len__(self) -> int:
+        return len(self.__agents)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__agents
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the names of a snapshot of the registered agents"""
+        return iter(self.__agents)
 
     def register_agent(
-        self, 
+        self,
         agent: Agent
     ):
         """Add an agent to the registry"""
-        if agent.attributes.name in self.__agents:
-            raise AlreadyExistsError(f'''{agent.name} already exists in this registry instance. Please change the agent name or remove 
-                                     the agent with the same name.''')
-        self.__agents[agent.attributes.name] = agent
+        self.__add(_AgentEntry(agent.attributes, agent=agent))
+
+    def register_agent_factory(
+        self,
+        name: str,
+        description: str,
+        factory: AgentFactory
+    ):
+        """
+        Register an agent that is built on first use.
+
+        factory is either a callable returning the agent or an import path of the form "package.module:attribute", where
+        the attribute is an agent or a callable returning one. The built agent must have the registered name.
+        """
+        if not callable(factory) and not (isinstance(factory, str) and ":" in factory):
+            raise IncorrectDefinitonError(f'Factory for {name} must be a callable or an import path like "module:attribute".')
+        self.__add(_AgentEntry(Entity(name, description, "agent"), factory=factory))
+
+    def unregister_agent(
+        self,
+        name: str
+    ):
+        """Remove an agent from the registry"""
+        with self.__writeLock:
+            if name not in self.__agents:
+                raise DoesNotExistError(f'{name} does not exist in this registry instance.')
+            if self.selectionIndex is not None and name in self.selectionIndex:
+                self.selectionIndex.remove(name)
+            agents = dict(self.__agents)
+            del agents[name]
+            self.__agents = MappingProxyType(agents)
 
     def get_registered_agents(self):
         """Get a list of agents registered"""
-        return self.__agents.keys()
\ No newline at end of file
+        return self.__agents.keys()
+
+    def snapshot(self) -> Mapping[str, Entity]:
+        """Read only name to Entity view of the registry at this moment. Later writes do not affect it."""
+        return MappingProxyType({name: entry.attributes for name, entry in self.__agents.items()})
+
+    def is_loaded(
+        self,
+        name: str
+    ) -> bool:
+        """Whether the agent has been built (always true for agents registered with register_agent)"""
+        entry = self.__agents.get(name)
+        return entry is not None and entry.agent is not None
+
+    def get_agent(
+        self,
+        name: str
+    ) -> Optional[Agent]:
+        """Get a registered agent by name, building it first if it was registered lazily"""
+        entry = self.__agents.get(name)
+        if entry is None:
+            return None
+        agent = entry.agent
+        if agent is None:
+            agent = self.__load(entry)
+        return agent
+
+    def select_agents(
+        self,
+        query: str,
+        k: int = 5
+    ) -> list[tuple[Agent, float]]:
+        """Return the k registered agents most relevant to the query along with their similarity scores"""
+        if self.selectionIndex is None:
+            return []
+        selected = []
+        for name, score in self.selectionIndex.top_k(query, k):
+            #The agent may have been unregistered since the index was queried
+            agent = self.get_agent(name)
+            if agent is not None:
+                selected.append((agent, score))
+        return selected
+
+    def select_agent(
+        self,
+        query: str,
+        k: int = 5
+    ) -> Optional[Agent]:
+        """Return the single best registered agent for the query"""
+        if self.selectionIndex is None:
+            return None
+        name = self.selectionIndex.select(query, k)
+        return self.get_agent(name) if name is not None else None
+
+    def __add(
+        self,
+        entry: _AgentEntry
+    ):
+        name = entry.attributes.name
+        self.__check_new(name)
+        #Embedding the description is a network call; make it before taking the write lock so other writes don't wait on it
+        vectors = self.selectionIndex.embed_entities([entry.attributes]) if self.selectionIndex is not None else None
+        with self.__writeLock:
+            self.__check_new(name)
+            if self.selectionIndex is not None:
+                self.selectionIndex.add_embedded([entry.attributes], vectors)
+            agents = dict(self.__agents)
+            agents[name] = entry
+            self.__agents = MappingProxyType(agents)
+
+    def __check_new(
+        self,
+        name: str
+    ):
+        if name in self.__agents:
+            raise AlreadyExistsError(f'''{name} already exists in this registry instance. Please change the agent
+                                     name or remove the agent with the same name.''')
+
+    @staticmethod
+    def __load(
+        entry: _AgentEntry
+    ) -> Agent:
+        #Only the first caller builds the agent; concurrent callers for the same agent wait for it
+        with entry.lock:
+            if entry.agent is not None:
+                return entry.agent
+            factory = entry.factory
+            if isinstance(factory, str):
+                moduleName, _, attributeName = factory.partition(":")
+                factory = getattr(importlib.import_module(moduleName), attributeName)
+            agent = factory() if callable(factory) and not hasattr(factory, "attributes") else factory
+            if getattr(agent, "attributes", None) is None or agent.attributes.name != entry.attributes.name:
+                raise IncorrectDefinitonError(f'Factory for {entry.attributes.name} did not return an agent with that name.')
+            if agent.attributes.description is None:
+                agent.attributes.description = entry.attributes.description
+            entry.agent = agent
+            entry.factory = None
+            return agent
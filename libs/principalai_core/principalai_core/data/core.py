@@ -1,28 +1,196 @@
-from typing import Any
+from array import array
+from typing import Any, Iterable, Iterator, Optional, Union
+import json
+import sys
+
+def intern_type_tag(entitytype: Any) -> Any:
+    """String type tags are interned so every entity of the same type shares one string object"""
+    if isinstance(entitytype, str):
+        return sys.intern(entitytype)
+    return entitytype
+
+def type_tag_name(entitytype: Any) -> Optional[str]:
+    """Serializable name of a type tag. Annotations (e.g. int, list[str]) are turned into their string form."""
+    if entitytype is None or isinstance(entitytype, str):
+        return entitytype
+    if isinstance(entitytype, type):
+        return entitytype.__qualname__
+    return str(entitytype)
 
 class Entity():
     """Data entity. Present in input, output, messages and more"""
+    __slots__ = ("name", "description", "entitytype")
+
     def __init__(
-        self, 
-        name: str, 
-        description: str, 
+        self,
+        name: str,
+        description: str,
         entitytype: Any
     ):
         '''
         Use the following conventions for name and description
-        
+
         1. If its a normal, long text message response from the LLM:
             name: message_{index}
             description: some description that may be useful for logs/definition
-            
+
         2. If its an entity of interest (for example - places, names, objects, etc.)
             name: entity name
-            description: some good description on what the entity is. This will affect accuracy and performance for future 
+            description: some good description on what the entity is. This will affect accuracy and performance for future
             responses
 
-        Ultimately, you have the freedom to skip out on the separated entity paradigm. However, using it will give you better 
+        Ultimately, you have the freedom to skip out on the separated entity paradigm. However, using it will give you better
         accuracy.
+
+        Entities are slotted and their names and string type tags are interned, since many thousands of them can be alive
+        in a process. Use an EntityTable for large collections.
         '''
-        self.name: str = name
-        self.description: str = description,
-        self.entitytype: Any = entitytype
\ No newline at end of file
+        self.name: str = sys.intern(name) if isinstance(name, str) else name
+        self.description: str = description
+        self.entitytype: Any = intern_type_tag(entitytype)
+
+    def __repr__(self) -> str:
+        return f'Entity(name={self.name!r}, entitytype={type_tag_name(self.entitytype)!r})'
+
+class EntityTable():
+    """
+    Column oriented storage for large collections of entities.
+
+    Names and descriptions are kept in one list per column and type tags are stored once in a tag table, with each row
+    holding a 2 byte code into it. Compared to one Entity object per row this avoids a per-object header and attribute
+    storage, allows whole-column access and serializes as a handful of flat lists.
+
+    Rows are appended and read by index; table[i] materializes an Entity view of the row.
+    """
+    def __init__(
+        self,
+        entities: Optional[Iterable[Entity]] = None
+    ):
+        self.names: list[str] = []
+        self.descriptions: list[Optional[str]] = []
+        self.typeCodes: array = array("H")
+        self.typeTags: list[Any] = []
+        self._typeCodeByTag: dict[tuple[type, Any], int] = {} #Keyed on (type(tag), tag) so that e.g. 1 and True stay apart
+        if entities is not None:
+            self.extend(entities)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(
+        self,
+        index: int
+    ) -> Entity:
+        return Entity(self.names[index], self.descriptions[index], self.typeTags[self.typeCodes[index]])
+
+    def __iter__(self) -> Iterator[Entity]:
+        for index in range(len(self.names)):
+            yield self[index]
+
+    def append(
+        self,
+        name: str,
+        description: Optional[str],
+        entitytype: Any
+    ) -> int:
+        """Add a row and return its index"""
+        self.names.append(sys.intern(name) if isinstance(name, str) else name)
+        self.descriptions.append(description)
+        self.typeCodes.append(self._type_code(entitytype))
+        return len(self.names) - 1
+
+    def append_entity(
+        self,
+        entity: Entity
+    ) -> int:
+        return self.append(entity.name, entity.description, entity.entitytype)
+
+    def extend(
+        self,
+        entities: Iterable[Entity]
+    ) -> None:
+        for entity in entities:
+            self.append(entity.name, entity.description, entity.entitytype)
+
+    def column(
+        self,
+        name: str
+    ) -> Union[list, array]:
+        """Return a whole column: names, descriptions, typeCodes or entitytypes"""
+        if name == "entitytypes":
+            return [self.typeTags[code] for code in self.typeCodes]
+        if name not in ("names", "descriptions", "typeCodes"):
+            raise KeyError(f'Unknown entity table column: {name}')
+        return getattr(self, name)
+
+    def rows_of_type(
+        self,
+        entitytype: Any
+    ) -> list[int]:
+        """Indices of all rows with the given type tag"""
+        code = self._find_type_code(intern_type_tag(entitytype))
+        if code is None:
+            return []
+        return [index for index, rowCode in enumerate(self.typeCodes) if rowCode == code]
+
+    def to_dict(self) -> dict[str, list]:
+        """
+        Columnar, JSON serializable form of the table.
+
+        Type tags that are not strings (e.g. annotations from pydantic schemas) are stored by name, so they come back as
+        strings from from_dict, and tags that share a name come back as one tag.
+        """
+        return {
+            "names": self.names,
+            "descriptions": self.descriptions,
+            "typeTags": [type_tag_name(tag) for tag in self.typeTags],
+            "typeCodes": self.typeCodes.tolist()
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: dict[str, list]
+    ) -> "EntityTable":
+        table = cls()
+        table.names = [sys.intern(name) for name in data["names"]]
+        table.descriptions = list(data["descriptions"])
+        #Distinct tags with the same name were written as the same string; give each name a single code
+        remap = [table._type_code(tag) for tag in data["typeTags"]]
+        table.typeCodes = array("H", (remap[code] for code in data["typeCodes"]))
+        return table
+
+    @classmethod
+    def from_json(
+        cls,
+        data: str
+    ) -> "EntityTable":
+        return cls.from_dict(json.loads(data))
+
+    def _find_type_code(
+        self,
+        entitytype: Any
+    ) -> Optional[int]:
+        try:
+            return self._typeCodeByTag.get((type(entitytype), entitytype))
+        except TypeError: #Unhashable type tags are found by an equality scan over the tag table
+            return next((code for code, tag in enumerate(self.typeTags)
+                         if type(tag) is type(entitytype) and tag == entitytype), None)
+
+    def _type_code(
+        self,
+        entitytype: Any
+    ) -> int:
+        entitytype = intern_type_tag(entitytype)
+        code = self._find_type_code(entitytype)
+        if code is None:
+            code = len(self.typeTags)
+            self.typeTags.append(entitytype)
+            try:
+                self._typeCodeByTag[(type(entitytype), entitytype)] = code
+            except TypeError:
+                pass
+        return code
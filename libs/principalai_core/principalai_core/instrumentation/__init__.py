@@ -0,0 +1,11 @@
+from .core import (
+    Span,
+    LatencyHistogram,
+    Sink,
+    InMemorySink,
+    JsonlSink,
+    OpenTelemetrySink,
+    Instrumentation,
+    instrumentation,
+    traced
+)
@@ -0,0 +1,356 @@
+from __future__ import annotations
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Optional, TYPE_CHECKING
+import itertools
+import threading
+import time
+
+if TYPE_CHECKING:
+    from opentelemetry.trace import Tracer
+
+_currentSpan: ContextVar[Optional["Span"]] = ContextVar("principalai_current_span", default=None)
+_spanIds = itertools.count(1)
+_CO_COROUTINE = 0x80 #inspect.CO_COROUTINE, without importing inspect on the import path
+
+class Span():
+    """A timed unit of work (an agent, tool, prompt or language model run) with its parent span, if any"""
+    __slots__ = ("name", "kind", "spanId", "traceId", "parentId", "startTime", "endTime", "attributes", "events", "error",
+                 "_start", "_token")
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[dict[str, Any]] = None
+    ):
+        self.name: str = name
+        self.kind: str = kind
+        self.spanId: int = next(_spanIds)
+        self.traceId: int = parent.traceId if parent is not None else self.spanId
+        self.parentId: Optional[int] = parent.spanId if parent is not None else None
+        self.startTime: int = time.time_ns()
+        self.endTime: Optional[int] = None
+        self.attributes: dict[str, Any] = attributes if attributes is not None else {}
+        self.events: list[tuple[int, str, dict[str, Any]]] = []
+        self.error: Optional[str] = None
+        self._start: int = time.perf_counter_ns()
+        self._token = None
+
+    @property
+    def durationNs(self) -> Optional[int]:
+        return self.endTime - self.startTime if self.endTime is not None else None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "spanId": self.spanId,
+            "traceId": self.traceId,
+            "parentId": self.parentId,
+            "startTime": self.startTime,
+            "endTime": self.endTime,
+            "durationNs": self.durationNs,
+            "attributes": self.attributes,
+            "events": [{"time": eventTime, "name": name, "attributes": attributes}
+                       for eventTime, name, attributes in self.events],
+            "error": self.error
+        }
+
+class LatencyHistogram():
+    """Latency histogram with fixed, roughly logarithmic bucket bounds in milliseconds"""
+    BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+    def __init__(self):
+        self.counts: list[int] = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count: int = 0
+        self.totalMs: float = 0.0
+
+    def observe(self, milliseconds: float) -> None:
+        self.counts[bisect_left(self.BOUNDS_MS, milliseconds)] += 1
+        self.count += 1
+        self.totalMs += milliseconds
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile"""
+        if self.count == 0:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, bucketCount in enumerate(self.counts):
+            seen += bucketCount
+            if seen >= target:
+                return self.BOUNDS_MS[index] if index < len(self.BOUNDS_MS) else float("inf")
+        return float("inf")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "boundsMs": list(self.BOUNDS_MS),
+            "counts": list(self.counts),
+            "count": self.count,
+            "meanMs": self.totalMs / self.count if self.count else None,
+            "p50Ms": self.percentile(0.5),
+            "p99Ms": self.percentile(0.99)
+        }
+
+class Sink():
+    """Base class for instrumentation sinks. Override the hooks you need."""
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        pass
+
+    def on_event(self, span: Optional[Span], name: str, attributes: dict[str, Any]) -> None:
+        pass
+
+class InMemorySink(Sink):
+    """Keeps finished spans and events in lists. Useful in tests and notebooks."""
+    def __init__(self):
+        self.spans: list[Span] = []
+        self.events: list[tuple[Optional[int], str, dict[str, Any]]] = []
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def on_event(self, span: Optional[Span], name: str, attributes: dict[str, Any]) -> None:
+        with self._lock:
+            self.events.append((span.spanId if span is not None else None, name, attributes))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.events.clear()
+
+class JsonlSink(Sink):
+    """Appends every finished span, and events outside of spans, as one JSON line to a file"""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        self._write({"type": "span", **span.to_dict()})
+
+    def on_event(self, span: Optional[Span], name: str, attributes: dict[str, Any]) -> None:
+        #Events inside a span are written as part of the span
+        if span is None:
+            self._write({"type": "event", "time": time.time_ns(), "name": name, "attributes": attributes})
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def _write(self, record: dict[str, Any]) -> None:
+        import json
+        line = json.dumps(record, default=repr)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+class OpenTelemetrySink(Sink):
+    """
+    Exports spans to OpenTelemetry. Requires the opentelemetry-api package; configure the SDK/exporter as usual.
+
+    Spans are started and ended on the OpenTelemetry tracer alongside principalai spans so parent/child links and
+    timestamps carry over.
+    """
+    def __init__(self, tracer: Optional[Tracer] = None):
+        from opentelemetry import trace
+        self._trace = trace
+        self.tracer = tracer if tracer is not None else trace.get_tracer("principalai")
+        self._spans: dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._spans.get(span.parentId) if span.parentId is not None else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otelSpan = self.tracer.start_span(
+            span.name, context=context, start_time=span.startTime, attributes={"principalai.kind": span.kind}
+        )
+        with self._lock:
+            self._spans[span.spanId] = otelSpan
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            otelSpan = self._spans.pop(span.spanId, None)
+        if otelSpan is None:
+            return
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otelSpan.set_attribute(f"principalai.{key}", value)
+        for eventTime, name, attributes in span.events:
+            otelSpan.add_event(name, {key: value for key, value in attributes.items()
+                                      if isinstance(value, (str, bool, int, float))}, timestamp=eventTime)
+        if span.error is not None:
+            otelSpan.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otelSpan.end(end_time=span.endTime)
+
+class _SpanContext():
+    __slots__ = ("instrumentation", "span")
+
+    def __init__(self, instrumentation: "Instrumentation", span: Optional[Span]):
+        self.instrumentation = instrumentation
+        self.span = span
+
+    def __enter__(self) -> Optional[Span]:
+        return self.span
+
+    def __exit__(self, exceptionType, exception, traceback) -> None:
+        if self.span is not None:
+            self.instrumentation.end_span(self.span, exception)
+
+class Instrumentation():
+    """
+    Spans, metrics and events for the run hot path.
+
+    Nothing is recorded while no sink is attached: every hook checks `enabled` first and returns immediately, so the cost
+    of uninstrumented runs is one attribute check. Once a sink is attached, spans nest through a context variable across
+    agent -> tool -> language model calls (including threads started through the executors in this package), latencies
+    are collected in per kind histograms and counters track tokens, bytes and cache hits/misses.
+    """
+    def __init__(self):
+        self.sinks: tuple[Sink, ...] = ()
+        self.enabled: bool = False
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.counters: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink: Sink) -> Sink:
+        with self._lock:
+            self.sinks = self.sinks + (sink,)
+            self.enabled = True
+        return sink
+
+    def remove_sink(self, sink: Sink) -> None:
+        with self._lock:
+            self.sinks = tuple(existing for existing in self.sinks if existing is not sink)
+            self.enabled = bool(self.sinks)
+
+    def current_span(self) -> Optional[Span]:
+        return _currentSpan.get()
+
+    def span(
+        self,
+        name: str,
+        kind: str,
+        attributes: Optional[dict[str, Any]] = None
+    ) -> _SpanContext:
+        """Context manager timing a block as a span. Yields None when instrumentation is disabled."""
+        return _SpanContext(self, self.start_span(name, kind, attributes) if self.enabled else None)
+
+    def start_span(
+        self,
+        name: str,
+        kind: str,
+        attributes: Optional[dict[str, Any]] = None
+    ) -> Span:
+        span = Span(name, kind, _currentSpan.get(), attributes)
+        span._token = _currentSpan.set(span)
+        for sink in self.sinks:
+            sink.on_start(span)
+        return span
+
+    def end_span(
+        self,
+        span: Span,
+        error: Optional[BaseException] = None
+    ) -> None:
+        elapsedNs = time.perf_counter_ns() - span._start
+        span.endTime = span.startTime + elapsedNs
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        try:
+            _currentSpan.reset(span._token)
+        except ValueError: #Ended in a different context than it was started in
+            pass
+        with self._lock:
+            histogram = self.histograms.get(span.kind)
+            if histogram is None:
+                histogram = self.histograms[span.kind] = LatencyHistogram()
+            histogram.observe(elapsedNs / 1e6)
+        for sink in self.sinks:
+            sink.on_end(span)
+
+    def event(
+        self,
+        name: str,
+        attributes: Optional[dict[str, Any]] = None
+    ) -> None:
+        """Record an event (e.g. a cache hit) on the current span and count it"""
+        if not self.enabled:
+            return
+        attributes = attributes if attributes is not None else {}
+        span = _currentSpan.get()
+        if span is not None:
+            span.events.append((time.time_ns(), name, attributes))
+        self.count(name)
+        for sink in self.sinks:
+            sink.on_event(span, name, attributes)
+
+    def count(
+        self,
+        name: str,
+        value: float = 1
+    ) -> None:
+        """Add to a counter, e.g. llm.prompt_tokens or http.response_bytes"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def metrics(self) -> dict[str, Any]:
+        """Snapshot of counters and latency histograms"""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {kind: histogram.to_dict() for kind, histogram in self.histograms.items()}
+            }
+
+    def reset_metrics(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+instrumentation = Instrumentation()
+
+def _describe(invocable: Any) -> tuple[str, str]:
+    attributes = getattr(invocable, "attributes", None)
+    if attributes is not None:
+        return str(attributes.name), str(attributes.entitytype)
+    for cls in type(invocable).__mro__:
+        if cls.__name__ in ("Agent", "Tool", "Prompt"):
+            return type(invocable).__name__, cls.__name__.lower()
+    return type(invocable).__name__, type(invocable).__name__.lower()
+
+def traced(func: Callable) -> Callable:
+    """
+    Decorator for Invocable run methods. Runs inside a span named after the invocable when instrumentation is enabled,
+    and calls straight through otherwise.
+    """
+    if getattr(func, "__code__", None) is not None and func.__code__.co_flags & _CO_COROUTINE:
+        @wraps(func)
+        async def asyncWrapper(self, *args, **kwargs):
+            if not instrumentation.enabled:
+                return await func(self, *args, **kwargs)
+            name, kind = _describe(self)
+            with instrumentation.span(name, kind):
+                return await func(self, *args, **kwargs)
+        return asyncWrapper
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not instrumentation.enabled:
+            return func(self, *args, **kwargs)
+        name, kind = _describe(self)
+        with instrumentation.span(name, kind):
+            return func(self, *args, **kwargs)
+    return wrapper
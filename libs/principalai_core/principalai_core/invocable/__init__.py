@@ -1 +1,30 @@
-from .core import *
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from principalai_core.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .core import (
+        Invocable,
+        FunctionInvocable
+    )
+    from .batch import (
+        BatchExecutor,
+        BatchResult,
+        write_batch_file,
+        read_batch_file,
+        run_batch_file
+    )
+
+__all__ = ["Invocable", "FunctionInvocable", "BatchExecutor", "BatchResult", "write_batch_file", "read_batch_file",
+           "run_batch_file"]
+
+#Submodules are imported on first access to keep `import principalai_core...` cheap
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "Invocable": ".core",
+    "FunctionInvocable": ".core",
+    "BatchExecutor": ".batch",
+    "BatchResult": ".batch",
+    "write_batch_file": ".batch",
+    "read_batch_file": ".batch",
+    "run_batch_file": ".batch"
+})
@@ -0,0 +1,291 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Optional, Union, TYPE_CHECKING
+import asyncio
+import contextvars
+import inspect
+import json
+import time
+
+from principalai_core.utils.errors import BatchRequestError, InvocationTimeoutError
+
+if TYPE_CHECKING:
+    from principalai_core.language_models import LanguageModel
+
+class BatchResult():
+    """Outcome of one input of a batch. Exactly one of output and error is meaningful."""
+    __slots__ = ("index", "input", "output", "error", "elapsed")
+
+    def __init__(
+        self,
+        index: int,
+        input: Any = None,
+        output: Any = None,
+        error: Optional[BaseException] = None,
+        elapsed: float = 0.0
+    ):
+        self.index: int = index #Position of the input in the batch
+        self.input: Any = input
+        self.output: Any = output
+        self.error: Optional[BaseException] = error
+        self.elapsed: float = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        outcome = f"output={self.output!r}" if self.error is None else f"error={self.error!r}"
+        return f"BatchResult(index={self.index}, {outcome})"
+
+def input_arguments(item: Any) -> tuple[tuple, dict[str, Any]]:
+    """Arguments for a batch input: a dict as keyword arguments, a tuple as positional arguments, else a single argument"""
+    if isinstance(item, dict):
+        return (), item
+    if isinstance(item, tuple):
+        return item, {}
+    return (item,), {}
+
+class BatchExecutor():
+    """
+    Streams an iterable of inputs through an Invocable (or any callable) with bounded concurrency.
+
+    Inputs are pulled from the iterable only as slots free up, so a job over millions of rows holds at most
+    maxConcurrency inputs in flight (plus up to bufferSize finished results waiting for a slow earlier input when results
+    are ordered). Each input is passed as keyword arguments if it is a dict, as positional arguments if it is a tuple and
+    as the single argument otherwise.
+
+    Invocables with an async arun or run are awaited on the event loop, everything else runs on a thread pool. Failures
+    are captured per input in BatchResult.error unless failFast is set, in which case the first failure is raised and
+    the remaining inputs are cancelled. Provider throughput is governed by the language model's scheduler, if any, so
+    maxConcurrency only needs to be high enough to keep the rate limits saturated.
+    """
+    def __init__(
+        self,
+        maxConcurrency: int = 16,
+        ordered: bool = True,
+        failFast: bool = False,
+        timeout: Optional[float] = None,
+        bufferSize: Optional[int] = None
+    ):
+        self.maxConcurrency: int = max(1, maxConcurrency)
+        self.ordered: bool = ordered #Yield results in input order rather than completion order
+        self.failFast: bool = failFast
+        self.timeout: Optional[float] = timeout #Seconds per input
+        self.bufferSize: int = bufferSize if bufferSize is not None else 4 * self.maxConcurrency
+
+    def map(
+        self,
+        invocable: Union[Callable, Any],
+        inputs: Iterable[Any]
+    ) -> Iterator[BatchResult]:
+        """Blocking version of amap, as a generator. Use amap when already inside an event loop."""
+        loop = asyncio.new_event_loop()
+        results = self.amap(invocable, inputs)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.close()
+
+    async def amap(
+        self,
+        invocable: Union[Callable, Any],
+        inputs: Union[Iterable[Any], AsyncIterable[Any]]
+    ) -> AsyncIterator[BatchResult]:
+        """Run invocable over inputs and yield a BatchResult per input"""
+        call, isAsync = self._resolve(invocable)
+        executor = None if isAsync else ThreadPoolExecutor(self.maxConcurrency, thread_name_prefix="principalai-batch")
+        isAsyncIterable = hasattr(inputs, "__aiter__")
+        iterator = inputs.__aiter__() if isAsyncIterable else iter(inputs)
+        pending: set[asyncio.Task] = set()
+        finished: dict[int, BatchResult] = {}
+        nextIndex = 0 #Next index to yield when ordered
+        index = 0
+        exhausted = False
+        try:
+            while True:
+                #Backpressure: only pull more inputs while there is room
+                while not exhausted and len(pending) < self.maxConcurrency and \
+                        (not self.ordered or index - nextIndex < self.bufferSize):
+                    try:
+                        item = await iterator.__anext__() if isAsyncIterable else next(iterator)
+                    except (StopIteration, StopAsyncIteration):
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(self._run_one(call, isAsync, executor, index, item)))
+                    index += 1
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if self.failFast and result.error is not None:
+                        raise result.error
+                    if not self.ordered:
+                        yield result
+                    else:
+                        finished[result.index] = result
+                while nextIndex in finished:
+                    yield finished.pop(nextIndex)
+                    nextIndex += 1
+        finally:
+            for task in pending:
+                task.cancel()
+            if executor is not None:
+                #Threads cannot be interrupted; calls already running finish in the background
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _resolve(
+        self,
+        invocable: Union[Callable, Any]
+    ) -> tuple[Callable, bool]:
+        asyncRun = getattr(invocable, "arun", None)
+        if asyncRun is not None and inspect.iscoroutinefunction(asyncRun):
+            return asyncRun, True
+        run = getattr(invocable, "run", None)
+        call = run if callable(run) else invocable
+        return call, inspect.iscoroutinefunction(call)
+
+    async def _run_one(
+        self,
+        call: Callable,
+        isAsync: bool,
+        executor: Optional[ThreadPoolExecutor],
+        index: int,
+        item: Any
+    ) -> BatchResult:
+        start = time.perf_counter()
+        args, kwargs = input_arguments(item)
+        #Sync calls only start their deadline once a thread picks them up, see _run_in_thread
+        deadline = asyncio.timeout(self.timeout if isAsync else None)
+        try:
+            async with deadline:
+                if isAsync:
+                    output = await call(*args, **kwargs)
+                else:
+                    output = await self._run_in_thread(call, executor, args, kwargs, deadline)
+        except TimeoutError as e:
+            #A TimeoutError raised by the call itself is its own error, not the batch timeout
+            error = e
+            if deadline.expired():
+                error = InvocationTimeoutError(f'Batch input {index} did not finish within {self.timeout} seconds.')
+            return BatchResult(index, item, error=error, elapsed=time.perf_counter() - start)
+        except Exception as e:
+            return BatchResult(index, item, error=e, elapsed=time.perf_counter() - start)
+        return BatchResult(index, item, output=output, elapsed=time.perf_counter() - start)
+
+    async def _run_in_thread(
+        self,
+        call: Callable,
+        executor: ThreadPoolExecutor,
+        args: tuple,
+        kwargs: dict[str, Any],
+        deadline: asyncio.Timeout
+    ) -> Any:
+        """
+        Run a sync call on the thread pool. The deadline starts once a thread picks the call up: a timed out thread cannot
+        be interrupted and keeps its worker busy, and calls queued behind it must not be charged for that wait.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        #Run in a copy of the current context so tracing spans and scheduling priorities carry over to the thread
+        context = contextvars.copy_context()
+
+        def runInThread():
+            loop.call_soon_threadsafe(_set_result, started)
+            return context.run(call, *args, **kwargs)
+        future = loop.run_in_executor(executor, runInThread)
+        await asyncio.wait((started, future), return_when=asyncio.FIRST_COMPLETED)
+        if self.timeout is not None:
+            deadline.reschedule(loop.time() + self.timeout)
+        output = await future
+        if hasattr(output, "__await__"): #e.g. a prompt whose language model is async
+            output = await output
+        return output
+
+def _set_result(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+def write_batch_file(
+    path: str,
+    prompts: Iterable[Any],
+    languageModel: LanguageModel,
+    **parameters
+) -> int:
+    """
+    Write completed prompts as a provider batch job file, one JSON request per line, and return the number of requests.
+    Each request's custom id is the index of its prompt, which read_batch_file turns back into BatchResult.index.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for index, prompt in enumerate(prompts):
+            file.write(json.dumps(languageModel.batch_request(prompt, str(index), **parameters)) + "\n")
+            count += 1
+    return count
+
+def read_batch_file(
+    path: str,
+    languageModel: LanguageModel
+) -> Iterator[BatchResult]:
+    """
+    Read a provider batch job results file line by line. Results come in the order of the file, which for most providers
+    is not the order of the requests; use BatchResult.index to match them up.
+    """
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            customId = record.get("custom_id")
+            index = int(customId) if isinstance(customId, str) and customId.isdigit() else customId
+            response = record.get("response") or {}
+            statusCode = response.get("status_code")
+            if record.get("error") is not None or (statusCode is not None and statusCode >= 400):
+                error = record.get("error") or response.get("body")
+                yield BatchResult(index, error=BatchRequestError(f'Batch request {customId} failed: {error}'))
+                continue
+            try:
+                yield BatchResult(index, output=languageModel.batch_output(response.get("body")))
+            except (KeyError, IndexError, TypeError) as e:
+                yield BatchResult(index, error=BatchRequestError(f'Batch request {customId} has no output: {e}'))
+
+def run_batch_file(
+    inputPath: str,
+    outputPath: str,
+    languageModel: LanguageModel,
+    maxConcurrency: int = 16
+) -> dict[str, int]:
+    """
+    Local stand-in for a provider batch job: run every request of a batch job file against languageModel and write a
+    results file in the provider's format. Requests go through the model's scheduler and resilience policy, if set, and
+    are streamed from disk so the file can be larger than memory. Returns counts of completed and failed requests.
+    """
+    def requests():
+        with open(inputPath, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield (json.loads(line),)
+
+    counts = {"completed": 0, "failed": 0}
+    executor = BatchExecutor(maxConcurrency, ordered=False)
+    with open(outputPath, "w", encoding="utf-8") as file:
+        for result in executor.map(lambda request: languageModel.run_batch_request(request["body"]), requests()):
+            request = result.input[0]
+            record = {"id": f"batch_req_{result.index}", "custom_id": request.get("custom_id")}
+            if result.ok:
+                record["response"] = {"status_code": 200, "body": result.output}
+                record["error"] = None
+                counts["completed"] += 1
+            else:
+                record["response"] = None
+                record["error"] = {"code": type(result.error).__name__, "message": str(result.error)}
+                counts["failed"] += 1
+            file.write(json.dumps(record, default=str) + "\n")
+    return counts
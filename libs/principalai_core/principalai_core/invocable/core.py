@@ -1,11 +1,16 @@
-from pydantic import BaseModel
-from typing import Optional, Callable
+from __future__ import annotations
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, Optional, Callable, Union, TYPE_CHECKING
 from warnings import warn
 
 from principalai_core.data import Entity
-from principalai_core.utils.parsers import entity_parameter_parser
+from principalai_core.utils.parsers import get_compiled_schema
 from principalai_core.language_models import LanguageModel
 from principalai_core.utils.errors import DoesNotExistError
+from principalai_core.instrumentation import traced
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+    from principalai_core.invocable.batch import BatchResult
 
 class Invocable():
     """Unit of a task/work/process that can invoked/run/executed. May use a language model."""
@@ -21,14 +26,20 @@ class Invocable():
         This does 2 things:
             1. Ensures schema and type strictness
             2. Allows for easy parsing to eventually be used
+
+        Schemas are parsed and compiled once per schema class and shared between Invocables through the schema registry.
         '''
+        #pydantic is only imported once a schema is actually used
+        if inputParameterSchema is not None or outputParameterSchema is not None:
+            from pydantic import BaseModel
+
         self.inputParameterSchema: Optional[tuple[BaseModel, list[Entity]]] = None
-        if type(inputParameterSchema) is BaseModel: 
-            self.inputParameterSchema = tuple(inputParameterSchema, entity_parameter_parser(inputParameterSchema))
+        if isinstance(inputParameterSchema, type) and issubclass(inputParameterSchema, BaseModel): 
+            self.inputParameterSchema = (inputParameterSchema, get_compiled_schema(inputParameterSchema).entities)
 
         self.outputParameterSchema: Optional[tuple[BaseModel, list[Entity]]] = None
-        if type(outputParameterSchema) is BaseModel:
-            self.outputParameterSchema = tuple(outputParameterSchema, entity_parameter_parser(outputParameterSchema))
+        if isinstance(outputParameterSchema, type) and issubclass(outputParameterSchema, BaseModel):
+            self.outputParameterSchema = (outputParameterSchema, get_compiled_schema(outputParameterSchema).entities)
         
         self.languageModel: Optional[LanguageModel] = languageModel
         '''
@@ -49,6 +60,42 @@ class Invocable():
     def run(self, *args, **kwargs):
         return None
     
+    def map(
+        self,
+        inputs: Iterable[Any],
+        maxConcurrency: int = 16,
+        ordered: bool = True,
+        failFast: bool = False,
+        timeout: Optional[float] = None
+    ) -> Iterator[BatchResult]:
+        """
+        Run over an iterable of inputs with bounded concurrency and yield a BatchResult per input. Inputs are pulled lazily
+        and errors are captured per input; see BatchExecutor. A dict input is passed as keyword arguments, a tuple as
+        positional arguments and anything else as the single argument.
+        """
+        from principalai_core.invocable.batch import BatchExecutor
+        return BatchExecutor(maxConcurrency, ordered, failFast, timeout).map(self, inputs)
+
+    def amap(
+        self,
+        inputs: Union[Iterable[Any], AsyncIterable[Any]],
+        maxConcurrency: int = 16,
+        ordered: bool = True,
+        failFast: bool = False,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[BatchResult]:
+        """Async version of map"""
+        from principalai_core.invocable.batch import BatchExecutor
+        return BatchExecutor(maxConcurrency, ordered, failFast, timeout).amap(self, inputs)
+
+    def batch(
+        self,
+        inputs: Iterable[Any],
+        **options
+    ) -> list[BatchResult]:
+        """Run over all inputs and return the results in input order. Prefer map for inputs that do not fit in memory."""
+        return list(self.map(inputs, **{**options, "ordered": True}))
+
     def set_language_model(self, languageModel: LanguageModel) -> None:
         """Set LanguageModel provider"""
         self.languageModel = languageModel
@@ -81,6 +128,7 @@ class FunctionInvocable(Invocable):
         self.func = func
         return self
     
+    @traced
     def run(
         self,
         *args,
@@ -92,5 +140,13 @@ class FunctionInvocable(Invocable):
         if self.inputParameterSchema is None:
             warn('''Input parameter schema does not exist. To invoke a Function Invocable with paramters, a pydantic 
                      BaseModel schema or Entity list should be provided for input paramters.''')
-        runOutput = self.func(*args, **kwargs)
-        return runOutput
\ No newline at end of file
+        runOutput = self._call_func(*args, **kwargs)
+        return runOutput
+
+    def _call_func(
+        self,
+        *args,
+        **kwargs
+    ):
+        """Call the wrapped function. Subclasses override this to run it elsewhere, e.g. in a worker process."""
+        return self.func(*args, **kwargs)
\ No newline at end of file
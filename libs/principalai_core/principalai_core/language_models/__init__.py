@@ -1 +1,38 @@
-from .core import LanguageModel
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from principalai_core.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .core import LanguageModel
+    from .cache import ResponseCache
+    from .streaming import (
+        StreamingResponse,
+        AsyncStreamingResponse
+    )
+    from .batching import RequestCoalescer
+    from .scheduler import (
+        Priority,
+        RateLimitScheduler,
+        SchedulerSlot,
+        TokenBucket,
+        get_scheduler,
+        scheduling
+    )
+
+__all__ = ["LanguageModel", "ResponseCache", "StreamingResponse", "AsyncStreamingResponse", "RequestCoalescer", "Priority",
+           "RateLimitScheduler", "SchedulerSlot", "TokenBucket", "get_scheduler", "scheduling"]
+
+#Submodules are imported on first access to keep `import principalai_core...` cheap
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "LanguageModel": ".core",
+    "ResponseCache": ".cache",
+    "StreamingResponse": ".streaming",
+    "AsyncStreamingResponse": ".streaming",
+    "RequestCoalescer": ".batching",
+    "Priority": ".scheduler",
+    "RateLimitScheduler": ".scheduler",
+    "SchedulerSlot": ".scheduler",
+    "TokenBucket": ".scheduler",
+    "get_scheduler": ".scheduler",
+    "scheduling": ".scheduler"
+})
@@ -0,0 +1,86 @@
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+
+class RequestCoalescer():
+    """
+    Micro-batches concurrent async calls into a single provider request.
+
+    Items submitted within maxWaitSeconds of the first pending item (or until maxBatchSize items are pending) are passed
+    to batchFunction in one call. batchFunction must return one result per item, in order; each result is handed back to
+    the coroutine that submitted the item. If the batch request fails, every caller in the batch receives the exception.
+
+    A coalescer is bound to the event loop it is first used on.
+    """
+    def __init__(
+        self,
+        batchFunction: Callable[[list[Any]], Awaitable[list[Any]]],
+        maxBatchSize: int = 64,
+        maxWaitSeconds: float = 0.005
+    ):
+        self.batchFunction = batchFunction
+        self.maxBatchSize = max(1, maxBatchSize)
+        self.maxWaitSeconds = maxWaitSeconds
+        self.batches: int = 0
+        self.items: int = 0
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def averageBatchSize(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    async def submit(
+        self,
+        item: Any
+    ) -> Any:
+        """Queue an item for the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.maxBatchSize:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.maxWaitSeconds, self._flush)
+        return await future
+
+    async def submit_many(
+        self,
+        items: list[Any]
+    ) -> list[Any]:
+        """Queue several items; they may be split across or merged with other callers' batches"""
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[:self.maxBatchSize]
+            del self._pending[:self.maxBatchSize]
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            #Keep a reference so the task is not garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(
+        self,
+        batch: list[tuple[Any, asyncio.Future]]
+    ) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.batchFunction([item for item, _ in batch])
+            results = list(results)
+            if len(results) != len(batch):
+                raise ValueError(f'Batch function returned {len(results)} results for {len(batch)} items.')
+        except BaseException as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
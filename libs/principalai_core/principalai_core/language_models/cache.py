@@ -0,0 +1,195 @@
+from typing import Any, Optional, Callable
+import hashlib
+import json
+import threading
+
+from principalai_core.language_models.core import LanguageModel
+from principalai_core.utils.cache import MemoryCacheTier, SqliteCacheTier, MISSING
+from principalai_core.utils.errors import IncorrectDefinitonError
+from principalai_core.instrumentation import instrumentation
+
+class ResponseCache():
+    """
+    Opt-in cache for language model responses.
+
+    Responses are keyed on provider, model, model parameters and the completed prompt. Lookups go to an in-process LRU tier
+    first and then to an optional SQLite tier; disk hits are promoted into memory. Both tiers support a TTL and a maximum
+    number of entries.
+
+    Only cache deterministic calls (e.g. classification or extraction prompts at temperature 0); a cached response is
+    returned as is for every identical request.
+    """
+    def __init__(
+        self,
+        maxEntries: int = 1024,
+        ttl: Optional[float] = None,
+        diskPath: Optional[str] = None,
+        diskMaxEntries: int = 100_000
+    ):
+        self.memory: MemoryCacheTier = MemoryCacheTier(maxEntries, ttl)
+        self.disk: Optional[SqliteCacheTier] = SqliteCacheTier(diskPath, diskMaxEntries, ttl, "responses") \
+            if diskPath is not None else None
+        self.memoryHits: int = 0
+        self.diskHits: int = 0
+        self.misses: int = 0
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        return self.memoryHits + self.diskHits
+
+    def stats(self) -> dict[str, int]:
+        """Hit/miss counters for the cache"""
+        return {
+            "hits": self.hits,
+            "memoryHits": self.memoryHits,
+            "diskHits": self.diskHits,
+            "misses": self.misses,
+            "memoryEvictions": self.memory.evictions,
+            "diskEvictions": self.disk.evictions if self.disk is not None else 0
+        }
+
+    @staticmethod
+    def make_key(
+        providerName: Optional[str],
+        model: Optional[str],
+        parameters: Optional[dict],
+        prompt: Any
+    ) -> str:
+        """Build a stable cache key. Parameters are serialized with sorted keys so their order does not matter."""
+        payload = json.dumps(
+            [providerName, model, parameters or {}, prompt],
+            sort_keys=True,
+            default=repr,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def key_for(
+        self,
+        languageModel: Optional[LanguageModel],
+        languageModelRunEngine: Optional[Callable],
+        prompt: Any
+    ) -> str:
+        """Build the cache key for a prompt run through a language model and/or run engine"""
+        #Different run engines on the same model can build different messages from the same prompt, and an engine can be
+        #bound to (or close over) a different model than languageModel, so the engine is keyed by what it runs
+        engine = _engine_identity(languageModelRunEngine)
+        if languageModel is None:
+            return self.make_key(None, None, {"engine": engine}, prompt)
+        return self.make_key(
+            languageModel.providerName,
+            languageModel.model,
+            {"engine": engine, **languageModel.parameters},
+            prompt
+        )
+
+    def get(
+        self,
+        key: str,
+        default: Any = None
+    ) -> Any:
+        value = self.memory.get(key, MISSING)
+        if value is not MISSING:
+            with self._lock:
+                self.memoryHits += 1
+            instrumentation.event("cache.hit", {"cache": "response", "tier": "memory"})
+            return value
+        if self.disk is not None:
+            value, expiresAt = self.disk.get_with_expiry(key, MISSING)
+            if value is not MISSING:
+                #Promoted entries keep the expiry they have on disk rather than starting a new TTL
+                self.memory.set(key, value, expiresAt=expiresAt)
+                with self._lock:
+                    self.diskHits += 1
+                instrumentation.event("cache.hit", {"cache": "response", "tier": "disk"})
+                return value
+        with self._lock:
+            self.misses += 1
+        instrumentation.event("cache.miss", {"cache": "response"})
+        return default
+
+    def set(
+        self,
+        key: str,
+        value: Any
+    ) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def get_or_run(
+        self,
+        key: str,
+        func: Callable[[], Any]
+    ) -> Any:
+        """Return the cached value for key, or run func and cache its result. Use aget_or_run for async run engines."""
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            value = func()
+            if hasattr(value, "__await__"):
+                close = getattr(value, "close", None)
+                if close is not None:
+                    close()
+                raise IncorrectDefinitonError('''The run engine returned an awaitable, which cannot be cached. Use 
+                                              aget_or_run for async run engines.''')
+            self.set(key, value)
+        return value
+
+    async def aget_or_run(
+        self,
+        key: str,
+        func: Callable[[], Any]
+    ) -> Any:
+        """
+        Async version of get_or_run: an awaitable returned by func is awaited and its result is cached. The disk tier is
+        read and written on a worker thread so the event loop is not blocked.
+        """
+        import asyncio
+        value = self.get(key, MISSING) if self.disk is None else await asyncio.to_thread(self.get, key, MISSING)
+        if value is MISSING:
+            value = func()
+            if hasattr(value, "__await__"):
+                value = await value
+            if self.disk is None:
+                self.set(key, value)
+            else:
+                await asyncio.to_thread(self.set, key, value)
+        return value
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+def _describe_model(languageModel: LanguageModel) -> list:
+    return [type(languageModel).__qualname__, languageModel.providerName, languageModel.model, languageModel.parameters]
+
+def _code_digest(code: Any) -> str:
+    """Digest of a function's bytecode, constants and referenced names, stable across processes"""
+    digest = hashlib.sha256(code.co_code)
+    digest.update(repr(code.co_names).encode("utf-8"))
+    for constant in code.co_consts:
+        #Nested code objects (lambdas, comprehensions) have an address in their repr
+        digest.update((_code_digest(constant) if hasattr(constant, "co_code") else repr(constant)).encode("utf-8"))
+    return digest.hexdigest()
+
+def _engine_identity(engine: Optional[Callable]) -> Any:
+    """What a run engine runs: its qualified name plus the model it is bound to, or its code and closure for functions"""
+    if engine is None:
+        return None
+    function = getattr(engine, "__func__", engine)
+    name = f"{getattr(function, '__module__', None)}.{getattr(function, '__qualname__', type(function).__qualname__)}"
+    owner = getattr(engine, "__self__", None)
+    if isinstance(owner, LanguageModel):
+        return [name, *_describe_model(owner)]
+    if owner is not None:
+        return [name, repr(owner)]
+    code = getattr(function, "__code__", None)
+    if code is None:
+        return [name, repr(engine)]
+    closure = [
+        _describe_model(cell.cell_contents) if isinstance(cell.cell_contents, LanguageModel) else repr(cell.cell_contents)
+        for cell in (function.__closure__ or ())
+    ]
+    return [name, _code_digest(code), closure]
@@ -1,11 +1,103 @@
-from typing import Optional, Any
+from typing import Optional, Any, TYPE_CHECKING
+
+from principalai_core.language_models.streaming import StreamingResponse, AsyncStreamingResponse
+from principalai_core.utils.tokens import approximate_token_count
+
+if TYPE_CHECKING:
+    from principalai_core.language_models.scheduler import RateLimitScheduler
+    from principalai_core.utils.resilience import ResiliencePolicy
 
 class LanguageModel():
     def __init__(self):
         self.provider: Optional[Any]  = None
         self.providerName: Optional[str] = None
         self.model: Optional[str] = None
+        self.parameters: dict[str, Any] = {} #Model parameters (temperature, max tokens, etc.) sent with every call
         self.asynchronous: bool = False
+        self.scheduler: Optional[RateLimitScheduler] = None #Client side rate limiting, see set_rate_limits
+        self.resiliencePolicy: Optional[ResiliencePolicy] = None #Retries, deadlines and hedging for provider calls
+        self.defaultCompletionTokens: int = 256 #Completion tokens assumed for rate limiting when no max tokens is set
+
+    def run(self, prompt: Any, **parameters):
+        return None
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens the model sees for text. Providers with a tokenizer override this; the default is an estimate."""
+        return approximate_token_count(text)
+
+    def estimate_tokens(self, prompt: Any, parameters: Optional[dict[str, Any]] = None) -> int:
+        """Tokens a call may consume against a tokens per minute limit: the prompt plus the completion budget"""
+        if isinstance(prompt, str):
+            #Prompts assembled from a compiled template carry their token count
+            promptTokens = getattr(prompt, "tokenCount", None)
+            if promptTokens is None:
+                promptTokens = self.count_tokens(prompt)
+        else:
+            #Chat messages; roughly 4 tokens of overhead per message
+            promptTokens = sum(self.count_tokens(str(message.get("content") or "")) + 4 for message in prompt)
+        parameters = {**self.parameters, **parameters} if parameters else self.parameters
+        completionTokens = parameters.get("max_completion_tokens") or parameters.get("max_tokens") or self.defaultCompletionTokens
+        return promptTokens + completionTokens
+
+    def set_rate_limits(
+        self,
+        requestsPerMinute: Optional[float] = None,
+        tokensPerMinute: Optional[float] = None,
+        **options
+    ) -> "RateLimitScheduler":
+        """
+        Schedule calls through the scheduler shared by every language model of this provider and model. The limits are
+        those of the provider account; options are passed on to RateLimitScheduler when the scheduler is created.
+        """
+        from principalai_core.language_models.scheduler import get_scheduler
+        self.scheduler = get_scheduler((self.providerName, self.model), requestsPerMinute=requestsPerMinute,
+                                       tokensPerMinute=tokensPerMinute, **options)
+        return self.scheduler
+
+    def set_scheduler(self, scheduler: Optional["RateLimitScheduler"]) -> None:
+        self.scheduler = scheduler
+
+    def set_resilience_policy(self, resiliencePolicy: Optional["ResiliencePolicy"]) -> None:
+        """
+        Retry, bound and hedge provider calls with the given policy. Each attempt goes through the scheduler, if any. Turn
+        off the provider SDK's own retries when using a policy so attempts are not multiplied.
+        """
+        self.resiliencePolicy = resiliencePolicy
+
+    def stream(self, prompt: Any, **parameters) -> StreamingResponse:
+        """
+        Stream the response as text deltas. Providers that support streaming override this; the default falls back to a
+        single delta containing the full run output.
+        """
+        return StreamingResponse(iter([self.run(prompt, **parameters)]))
+
+    async def astream(self, prompt: Any, **parameters) -> AsyncStreamingResponse:
+        """Async version of stream"""
+        output = self.run(prompt, **parameters)
+        if hasattr(output, "__await__"):
+            output = await output
+
+        async def deltas():
+            yield output
+        return AsyncStreamingResponse(deltas())
+
+    def batch_request(self, prompt: Any, customId: str, **parameters) -> dict[str, Any]:
+        """
+        One line of a provider batch job file for prompt. Providers with a batch API override this with their request
+        format; the default is a generic format that run_batch_request understands.
+        """
+        return {"custom_id": customId, "body": {"model": self.model, "prompt": prompt, **self.parameters, **parameters}}
+
+    def run_batch_request(self, body: dict[str, Any]) -> Any:
+        """Run the body of a batch request directly and return the response body, as the provider's batch job would"""
+        parameters = {key: value for key, value in body.items() if key not in ("model", "prompt")}
+        output = self.run(body["prompt"], **parameters)
+        if hasattr(output, "__await__"):
+            async def awaitOutput():
+                return {"output": await output}
+            return awaitOutput()
+        return {"output": output}
 
-    def run():
-        return None
\ No newline at end of file
+    def batch_output(self, responseBody: Any) -> Any:
+        """Output of a response body from a batch job results file, like the return value of run"""
+        return responseBody["output"]
@@ -0,0 +1,426 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Hashable, Iterator, Optional
+import heapq
+import itertools
+import threading
+import time
+
+from principalai_core.instrumentation import instrumentation
+from principalai_core.utils.http import retry_after_seconds
+
+class Priority():
+    """Priority classes for scheduled language model calls. Lower values are dispatched first."""
+    INTERACTIVE = 0
+    DEFAULT = 1
+    BATCH = 2
+
+_scheduling: ContextVar[tuple[int, Hashable]] = ContextVar("principalai_scheduling", default=(Priority.DEFAULT, None))
+
+@contextmanager
+def scheduling(
+    priority: int = Priority.DEFAULT,
+    tenant: Hashable = None
+) -> Iterator[None]:
+    """
+    Set the priority class and tenant of every scheduled language model call made inside the block, including calls made
+    deep inside agents, tools and prompts.
+    """
+    token = _scheduling.set((priority, tenant))
+    try:
+        yield
+    finally:
+        _scheduling.reset(token)
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an exception raised by a provider SDK is a rate limit (HTTP 429) response"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return "RateLimit" in type(error).__name__
+
+class TokenBucket():
+    """
+    Token bucket refilled continuously at ratePerMinute, holding at most capacity.
+
+    A take may overdraw the bucket as long as it is not already in debt, so a single call larger than the capacity can
+    still go through; later takes then wait until the debt is paid back. Over any window the rate stays at ratePerMinute.
+    Not thread-safe on its own; RateLimitScheduler serializes access.
+    """
+    def __init__(
+        self,
+        ratePerMinute: float,
+        capacity: Optional[float] = None
+    ):
+        self.ratePerSecond: float = ratePerMinute / 60.0
+        #Default burst: 5 seconds worth of budget, so pacing stays smooth instead of emptying a full minute at once
+        self.capacity: float = capacity if capacity is not None else max(1.0, self.ratePerSecond * 5)
+        self.level: float = self.capacity
+        self.updated: float = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.ratePerSecond)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken"""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.ratePerSecond
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def give_back(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+    def drain(self, now: float) -> None:
+        """Empty the bucket, e.g. after the provider reported that the limit was hit"""
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+class _Ticket():
+    __slots__ = ("tokens", "priority", "tenant", "finishTag", "granted", "cancelled", "event", "future", "loop")
+
+    def __init__(self, tokens: int, priority: int, tenant: Hashable):
+        self.tokens: int = tokens
+        self.priority: int = priority
+        self.tenant: Hashable = tenant
+        self.finishTag: float = 0.0
+        self.granted: bool = False
+        self.cancelled: bool = False
+        self.event: Optional[threading.Event] = None
+        self.future = None
+        self.loop = None
+
+class SchedulerSlot():
+    """A granted permission to make one provider call. Release it exactly once, or use it as a context manager."""
+    def __init__(
+        self,
+        scheduler: "RateLimitScheduler",
+        tokens: int
+    ):
+        self.scheduler = scheduler
+        self.tokens: int = tokens
+        self.usedTokens: Optional[int] = None
+        self.start: float = time.monotonic()
+        self.released: bool = False
+
+    def record_usage(self, tokens: Optional[int]) -> None:
+        """Actual tokens the call used, as reported by the provider. The estimate is corrected against it on release."""
+        if tokens is not None:
+            self.usedTokens = tokens
+
+    def release(self, error: Optional[BaseException] = None) -> None:
+        if self.released:
+            return
+        self.released = True
+        self.scheduler._release(self, error)
+
+    def __enter__(self) -> "SchedulerSlot":
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback) -> None:
+        self.release(exception)
+
+    async def __aenter__(self) -> "SchedulerSlot":
+        return self
+
+    async def __aexit__(self, exceptionType, exception, traceback) -> None:
+        self.release(exception)
+
+class RateLimitScheduler():
+    """
+    Client side scheduler for one provider/model's rate limits.
+
+    Every call first acquires a slot. Slots are granted only while both the requests per minute and the tokens per minute
+    buckets have budget (the token cost of a call is its estimated prompt tokens plus the completion tokens it may use)
+    and fewer than the current concurrency limit of calls are in flight. Limits are scaled by headroom so sustained
+    throughput settles just under the provider's limit instead of overshooting into 429s.
+
+    Waiting calls are ordered by priority class first. Within a class, tenants are served by weighted fair queuing on
+    token cost, so a tenant submitting a large batch cannot starve the others.
+
+    Concurrency adapts AIMD style: it grows by one for every window of successful calls and is halved on a 429, which
+    also pauses dispatching for the provider's Retry-After (or one second) and drains the buckets. If targetLatency is set,
+    it is also reduced while the smoothed call latency is above it.
+    """
+    def __init__(
+        self,
+        requestsPerMinute: Optional[float] = None,
+        tokensPerMinute: Optional[float] = None,
+        maxConcurrency: int = 64,
+        initialConcurrency: Optional[int] = None,
+        headroom: float = 0.95,
+        targetLatency: Optional[float] = None,
+        tenantWeights: Optional[dict[Hashable, float]] = None
+    ):
+        #Refill at headroom of the limit and allow bursts of the rest, so no one minute window exceeds the limit
+        self.requestBucket: Optional[TokenBucket] = (
+            TokenBucket(requestsPerMinute * headroom, max(1.0, requestsPerMinute * (1 - headroom)))
+            if requestsPerMinute else None
+        )
+        self.tokenBucket: Optional[TokenBucket] = (
+            TokenBucket(tokensPerMinute * headroom, max(1.0, tokensPerMinute * (1 - headroom)))
+            if tokensPerMinute else None
+        )
+        self.maxConcurrency: int = max(1, maxConcurrency)
+        self.concurrencyLimit: float = float(min(self.maxConcurrency, initialConcurrency or self.maxConcurrency))
+        self.targetLatency: Optional[float] = targetLatency
+        self.tenantWeights: dict[Hashable, float] = tenantWeights if tenantWeights is not None else {}
+        self.inFlight: int = 0
+        self.rateLimited: int = 0
+        self.completed: int = 0
+        self.latency: Optional[float] = None #Exponentially weighted moving average, in seconds
+        self._queue: list[tuple[int, float, int, _Ticket]] = []
+        self._sequence = itertools.count()
+        self._virtualTime: float = 0.0
+        self._tenantFinish: dict[Hashable, float] = {}
+        self._pausedUntil: float = 0.0
+        self._lastDecrease: float = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._timerDue: float = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(
+        self,
+        tokens: int = 0,
+        priority: Optional[int] = None,
+        tenant: Hashable = None,
+        timeout: Optional[float] = None
+    ) -> SchedulerSlot:
+        """Block until a call costing tokens may be made. Priority and tenant default to the current scheduling context."""
+        ticket = self._enqueue(tokens, priority, tenant, threading.Event())
+        if not ticket.event.wait(timeout):
+            if self._cancel(ticket):
+                raise TimeoutError(f'No rate limit slot became available within {timeout} seconds.')
+        return SchedulerSlot(self, tokens)
+
+    async def aacquire(
+        self,
+        tokens: int = 0,
+        priority: Optional[int] = None,
+        tenant: Hashable = None
+    ) -> SchedulerSlot:
+        """Async version of acquire. Cancelling the awaiting task withdraws the request."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        ticket = self._enqueue(tokens, priority, tenant, None, future, loop)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not self._cancel(ticket):
+                self._return(tokens)
+            raise
+        return SchedulerSlot(self, tokens)
+
+    def slot(
+        self,
+        tokens: int = 0,
+        priority: Optional[int] = None,
+        tenant: Hashable = None
+    ) -> SchedulerSlot:
+        """Alias of acquire, reads better as `with scheduler.slot(tokens) as slot:`"""
+        return self.acquire(tokens, priority, tenant)
+
+    def call(
+        self,
+        func: Callable[..., Any],
+        *args,
+        tokens: int = 0,
+        priority: Optional[int] = None,
+        tenant: Hashable = None,
+        **kwargs
+    ) -> Any:
+        """Run func inside a slot. Rate limit errors it raises feed back into the scheduler and are re-raised."""
+        with self.acquire(tokens, priority, tenant):
+            return func(*args, **kwargs)
+
+    async def acall(
+        self,
+        func: Callable[..., Any],
+        *args,
+        tokens: int = 0,
+        priority: Optional[int] = None,
+        tenant: Hashable = None,
+        **kwargs
+    ) -> Any:
+        """Async version of call, for coroutine functions"""
+        async with await self.aacquire(tokens, priority, tenant):
+            return await func(*args, **kwargs)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "inFlight": self.inFlight,
+                "queued": sum(not ticket.cancelled for *_, ticket in self._queue),
+                "concurrencyLimit": int(self.concurrencyLimit),
+                "completed": self.completed,
+                "rateLimited": self.rateLimited,
+                "latency": self.latency
+            }
+
+    def _enqueue(
+        self,
+        tokens: int,
+        priority: Optional[int],
+        tenant: Hashable,
+        event: Optional[threading.Event],
+        future=None,
+        loop=None
+    ) -> _Ticket:
+        contextPriority, contextTenant = _scheduling.get()
+        ticket = _Ticket(tokens, contextPriority if priority is None else priority,
+                         contextTenant if tenant is None else tenant)
+        ticket.event, ticket.future, ticket.loop = event, future, loop
+        with self._lock:
+            #Weighted fair queuing: a tenant's next call finishes (virtually) after its previous one, at its weight's pace
+            weight = self.tenantWeights.get(ticket.tenant, 1.0)
+            start = max(self._virtualTime, self._tenantFinish.get(ticket.tenant, 0.0))
+            ticket.finishTag = start + max(1, tokens) / weight
+            self._tenantFinish[ticket.tenant] = ticket.finishTag
+            heapq.heappush(self._queue, (ticket.priority, ticket.finishTag, next(self._sequence), ticket))
+        self._dispatch()
+        return ticket
+
+    def _cancel(self, ticket: _Ticket) -> bool:
+        """Withdraw a waiting ticket. Returns False if it was granted in the meantime."""
+        with self._lock:
+            if ticket.granted:
+                return False
+            ticket.cancelled = True
+            return True
+
+    def _dispatch(self) -> None:
+        granted = []
+        with self._lock:
+            now = time.monotonic()
+            while self._queue:
+                ticket = self._queue[0][3]
+                if ticket.cancelled:
+                    heapq.heappop(self._queue)
+                    continue
+                if self.inFlight >= int(self.concurrencyLimit):
+                    break
+                wait = self._pausedUntil - now
+                if self.requestBucket is not None:
+                    wait = max(wait, self.requestBucket.wait_time(1, now))
+                if self.tokenBucket is not None:
+                    wait = max(wait, self.tokenBucket.wait_time(ticket.tokens, now))
+                if wait > 0:
+                    self._schedule_dispatch(now, wait)
+                    break
+                heapq.heappop(self._queue)
+                if self.requestBucket is not None:
+                    self.requestBucket.take(1, now)
+                if self.tokenBucket is not None:
+                    self.tokenBucket.take(ticket.tokens, now)
+                self.inFlight += 1
+                self._virtualTime = max(self._virtualTime, ticket.finishTag - max(1, ticket.tokens) /
+                                        self.tenantWeights.get(ticket.tenant, 1.0))
+                ticket.granted = True
+                granted.append(ticket)
+        for ticket in granted:
+            if ticket.event is not None:
+                ticket.event.set()
+            else:
+                ticket.loop.call_soon_threadsafe(self._resolve, ticket.future)
+
+    @staticmethod
+    def _resolve(future) -> None:
+        if not future.done():
+            future.set_result(None)
+
+    def _schedule_dispatch(self, now: float, wait: float) -> None:
+        #Called with the lock held. One timer is enough as long as it fires no later than the earliest wait.
+        due = now + wait
+        if self._timer is not None and self._timerDue <= due and self._timerDue > now:
+            return
+        self._timer = threading.Timer(wait, self._on_timer)
+        self._timer.daemon = True
+        self._timerDue = due
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        self._dispatch()
+
+    def _release(
+        self,
+        slot: SchedulerSlot,
+        error: Optional[BaseException]
+    ) -> None:
+        now = time.monotonic()
+        elapsed = now - slot.start
+        rateLimited = error is not None and is_rate_limit_error(error)
+        retryAfter = retry_after_seconds(error) if rateLimited else None
+        with self._lock:
+            self.inFlight -= 1
+            if self.tokenBucket is not None and slot.usedTokens is not None and slot.usedTokens < slot.tokens:
+                self.tokenBucket.give_back(slot.tokens - slot.usedTokens, now)
+            elif self.tokenBucket is not None and slot.usedTokens is not None:
+                self.tokenBucket.take(slot.usedTokens - slot.tokens, now)
+
+            if rateLimited:
+                self.rateLimited += 1
+                self._pausedUntil = max(self._pausedUntil, now + (retryAfter if retryAfter is not None else 1.0))
+                for bucket in (self.requestBucket, self.tokenBucket):
+                    if bucket is not None:
+                        bucket.drain(now)
+                #Calls in flight when the limit was hit all fail together; halve once for the whole burst
+                if now - self._lastDecrease > max(elapsed, 1.0):
+                    self.concurrencyLimit = max(1.0, self.concurrencyLimit / 2)
+                    self._lastDecrease = now
+            elif error is None:
+                self.completed += 1
+                self.latency = elapsed if self.latency is None else 0.9 * self.latency + 0.1 * elapsed
+                if self.targetLatency is not None and self.latency > self.targetLatency:
+                    if now - self._lastDecrease > self.latency:
+                        self.concurrencyLimit = max(1.0, self.concurrencyLimit * 0.9)
+                        self._lastDecrease = now
+                else:
+                    self.concurrencyLimit = min(float(self.maxConcurrency), self.concurrencyLimit + 1 / self.concurrencyLimit)
+        if rateLimited:
+            instrumentation.event("llm.rate_limited", {"retryAfter": retryAfter})
+        self._dispatch()
+
+    def _return(
+        self,
+        tokens: int
+    ) -> None:
+        """Give back a slot that was granted but never used. No call was made, so no outcome is recorded."""
+        now = time.monotonic()
+        with self._lock:
+            self.inFlight -= 1
+            if self.requestBucket is not None:
+                self.requestBucket.give_back(1, now)
+            if self.tokenBucket is not None:
+                self.tokenBucket.give_back(tokens, now)
+        self._dispatch()
+
+_schedulers: dict[Hashable, RateLimitScheduler] = {}
+_schedulersLock = threading.Lock()
+
+def get_scheduler(
+    key: Hashable,
+    **limits
+) -> RateLimitScheduler:
+    """
+    Shared scheduler for a key such as (providerName, model), created with limits on first use. Language model instances
+    for the same provider and model should share one scheduler, since the provider enforces its limits across all of them.
+    """
+    scheduler = _schedulers.get(key)
+    if scheduler is None:
+        with _schedulersLock:
+            scheduler = _schedulers.get(key)
+            if scheduler is None:
+                scheduler = _schedulers[key] = RateLimitScheduler(**limits)
+    return scheduler
@@ -0,0 +1,140 @@
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+class StreamingResponse():
+    """
+    Iterator over the text deltas of a streamed language model response.
+
+    Deltas are handed to the caller as soon as the provider sends them. The aggregated output so far is available through
+    text, and get_final consumes whatever is left of the stream and returns the full output.
+    """
+    def __init__(
+        self,
+        deltas: Iterator[str],
+        onClose: Optional[Callable[[], None]] = None,
+        onComplete: Optional[Callable[[str], None]] = None
+    ):
+        self._deltas: Iterator[str] = iter(deltas)
+        self._parts: list[str] = []
+        self._onClose = onClose
+        self.onComplete = onComplete
+        self.done: bool = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.done:
+            raise StopIteration
+        try:
+            delta = next(self._deltas)
+        except StopIteration:
+            self._finish(completed=True)
+            raise
+        except BaseException:
+            self._finish(completed=False)
+            raise
+        self._parts.append(delta)
+        return delta
+
+    @property
+    def text(self) -> str:
+        """Output aggregated so far"""
+        return "".join(self._parts)
+
+    def get_final(self) -> str:
+        """Consume the rest of the stream and return the full output"""
+        for _ in self:
+            pass
+        return self.text
+
+    def close(self) -> None:
+        """Stop the stream early. The provider connection is released and the output is not treated as complete."""
+        if not self.done:
+            closeDeltas = getattr(self._deltas, "close", None)
+            if closeDeltas is not None:
+                closeDeltas()
+            self._finish(completed=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _finish(
+        self,
+        completed: bool
+    ) -> None:
+        self.done = True
+        if self._onClose is not None:
+            self._onClose()
+        if completed and self.onComplete is not None:
+            self.onComplete(self.text)
+
+class AsyncStreamingResponse():
+    """Async counterpart of StreamingResponse"""
+    def __init__(
+        self,
+        deltas: AsyncIterator[str],
+        onClose: Optional[Callable[[], object]] = None,
+        onComplete: Optional[Callable[[str], None]] = None
+    ):
+        self._deltas: AsyncIterator[str] = deltas.__aiter__()
+        self._parts: list[str] = []
+        self._onClose = onClose
+        self.onComplete = onComplete
+        self.done: bool = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        if self.done:
+            raise StopAsyncIteration
+        try:
+            delta = await self._deltas.__anext__()
+        except StopAsyncIteration:
+            await self._finish(completed=True)
+            raise
+        except BaseException:
+            await self._finish(completed=False)
+            raise
+        self._parts.append(delta)
+        return delta
+
+    @property
+    def text(self) -> str:
+        """Output aggregated so far"""
+        return "".join(self._parts)
+
+    async def get_final(self) -> str:
+        """Consume the rest of the stream and return the full output"""
+        async for _ in self:
+            pass
+        return self.text
+
+    async def aclose(self) -> None:
+        """Stop the stream early. The provider connection is released and the output is not treated as complete."""
+        if not self.done:
+            closeDeltas = getattr(self._deltas, "aclose", None)
+            if closeDeltas is not None:
+                await closeDeltas()
+            await self._finish(completed=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def _finish(
+        self,
+        completed: bool
+    ) -> None:
+        self.done = True
+        if self._onClose is not None:
+            result = self._onClose()
+            if hasattr(result, "__await__"):
+                await result
+        if completed and self.onComplete is not None:
+            self.onComplete(self.text)
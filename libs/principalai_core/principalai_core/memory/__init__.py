@@ -1,2 +1,17 @@
-from .core import *
-from .chat import ChatMemory
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from principalai_core.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .core import Memory
+    from .chat import ChatMemory
+    from .contextual import ContextualMemory
+
+__all__ = ["Memory", "ChatMemory", "ContextualMemory"]
+
+#Submodules are imported on first access to keep `import principalai_core...` cheap
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "Memory": ".core",
+    "ChatMemory": ".chat",
+    "ContextualMemory": ".contextual"
+})
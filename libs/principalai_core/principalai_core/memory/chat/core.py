@@ -1,7 +1,223 @@
-from pydantic import BaseModel
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional
+import threading
 
-from principalai_core.memory import Memory
+from principalai_core.memory.core import Memory
+from principalai_core.utils.tokens import TokenCounter, approximate_token_count
+
+class Message():
+    """A single chat message with its token count computed once on insert"""
+    __slots__ = ("role", "content", "tokenCount", "entity")
+
+    def __init__(
+        self,
+        role: str,
+        content: str,
+        tokenCount: int,
+        entity: Any = None
+    ):
+        self.role: str = role
+        self.content: str = content
+        self.tokenCount: int = tokenCount
+        self.entity: Any = entity
+
+    def to_dict(self) -> dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+    def __repr__(self) -> str:
+        return f'Message(role={self.role!r}, tokenCount={self.tokenCount})'
 
 class ChatMemory(Memory):
-    def __init__(self):
+    """
+    Bounded chat history for long running sessions.
+
+    Messages are kept in a fixed size ring buffer, bounded by maxMessages and (optionally) maxTokens, with the token count of
+    every message computed once when it is added. Building a context window walks back from the newest message only until
+    the token budget is used up, so its cost depends on the size of the window and not on the length of the session.
+
+    Messages evicted from the buffer are folded into a rolling summary on a background thread by the summarizer, a
+    language model run engine that takes a prompt string and returns the new summary. Without a summarizer evicted
+    messages are dropped, and while the summarizer keeps failing only the newest maxMessages evicted messages are kept.
+    """
+    def __init__(
+        self,
+        maxMessages: int = 256,
+        maxTokens: Optional[int] = None,
+        tokenCounter: Optional[TokenCounter] = None,
+        summarizer: Optional[Callable[[str], str]] = None,
+        summaryRole: str = "system"
+    ):
         super().__init__()
+        if maxMessages < 1:
+            raise ValueError('maxMessages must be at least 1.')
+        self.maxMessages = maxMessages
+        self.maxTokens = maxTokens
+        self.tokenCounter: TokenCounter = tokenCounter if tokenCounter is not None else approximate_token_count
+        self.summarizer = summarizer
+        self.summaryRole = summaryRole
+        self.summary: str = ""
+        self.summaryTokenCount: int = 0
+        self._buffer: list[Optional[Message]] = [None] * maxMessages
+        self._head: int = 0 #Index of the oldest message
+        self._size: int = 0
+        self._tokenTotal: int = 0
+        self._evicted: list[Message] = []
+        self._summaryFuture: Optional[Future] = None
+        self._generation: int = 0 #Bumped by clear() so summaries still in flight are discarded
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Message]:
+        """Iterate over a snapshot of the buffered messages, oldest first"""
+        with self._lock:
+            messages = [self._buffer[(self._head + i) % self.maxMessages] for i in range(self._size)]
+        return iter(messages)
+
+    @property
+    def tokenTotal(self) -> int:
+        """Total tokens of the buffered messages"""
+        return self._tokenTotal
+
+    def add_message(
+        self,
+        role: str,
+        content: str,
+        entity: Any = None
+    ) -> Message:
+        """Append a message, evicting the oldest messages if the buffer is over its limits"""
+        message = Message(role, content, self.tokenCounter(content), entity)
+        with self._lock:
+            if self._size == self.maxMessages:
+                self._evict_oldest()
+            self._buffer[(self._head + self._size) % self.maxMessages] = message
+            self._size += 1
+            self._tokenTotal += message.tokenCount
+            if self.maxTokens is not None:
+                while self._tokenTotal > self.maxTokens and self._size > 1:
+                    self._evict_oldest()
+            evicted = bool(self._evicted)
+        if evicted:
+            self._schedule_summary()
+        return message
+
+    def get_context_window(
+        self,
+        tokenBudget: int,
+        includeSummary: bool = True
+    ) -> list[Message]:
+        """
+        Return the most recent messages that fit in tokenBudget, oldest first.
+
+        If includeSummary is set and a summary exists, it is placed first as a message with summaryRole and its tokens
+        count towards the budget.
+        """
+        window: list[Message] = []
+        with self._lock:
+            summary = None
+            if includeSummary and self.summary and self.summaryTokenCount <= tokenBudget:
+                summary = Message(self.summaryRole, self.summary, self.summaryTokenCount)
+                tokenBudget -= self.summaryTokenCount
+            for i in range(self._size - 1, -1, -1):
+                message = self._buffer[(self._head + i) % self.maxMessages]
+                if message.tokenCount > tokenBudget:
+                    break
+                tokenBudget -= message.tokenCount
+                window.append(message)
+        window.reverse()
+        if summary is not None:
+            window.insert(0, summary)
+        return window
+
+    def get_messages(
+        self,
+        tokenBudget: int,
+        includeSummary: bool = True
+    ) -> list[dict[str, str]]:
+        """get_context_window as a list of role/content dicts, ready to be sent to a chat model"""
+        return [message.to_dict() for message in self.get_context_window(tokenBudget, includeSummary)]
+
+    def wait_for_summary(
+        self,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Block until pending summarization has finished and return the summary. Raises if summarization failed."""
+        future = self._summaryFuture
+        if future is not None:
+            future.result(timeout)
+        return self.summary
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffer = [None] * self.maxMessages
+            self._head = 0
+            self._size = 0
+            self._tokenTotal = 0
+            self._evicted.clear()
+            self.summary = ""
+            self.summaryTokenCount = 0
+            self._generation += 1
+            if self._summaryFuture is not None and self._summaryFuture.done():
+                self._summaryFuture = None
+
+    def close(self) -> None:
+        """Stop the background summarization thread"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __str__(self) -> str:
+        return "\n".join(f"{message.role}: {message.content}" for message in self)
+
+    def _evict_oldest(self) -> None:
+        message = self._buffer[self._head]
+        self._buffer[self._head] = None
+        self._head = (self._head + 1) % self.maxMessages
+        self._size -= 1
+        self._tokenTotal -= message.tokenCount
+        if self.summarizer is not None:
+            self._evicted.append(message)
+
+    def _schedule_summary(self) -> None:
+        with self._lock:
+            #A single worker folds everything evicted so far and keeps going until nothing is left, so there is never
+            #more than one summarization in flight. A failed future is kept for wait_for_summary until the next attempt.
+            if self._summaryFuture is not None and not self._summaryFuture.done():
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="principalai-chat-summary")
+            self._summaryFuture = self._executor.submit(self._fold_evicted)
+
+    def _fold_evicted(self) -> None:
+        while True:
+            with self._lock:
+                evicted, self._evicted = self._evicted, []
+                summary = self.summary
+                generation = self._generation
+                if not evicted:
+                    self._summaryFuture = None
+                    return
+            transcript = "\n".join(f"{message.role}: {message.content}" for message in evicted)
+            prompt = (
+                "Update the running summary of a conversation with the messages below. Keep facts, decisions and open "
+                "questions that later turns may need. Reply with the updated summary only.\n\n"
+                f"Current summary:\n{summary or '(empty)'}\n\nMessages:\n{transcript}"
+            )
+            try:
+                newSummary = str(self.summarizer(prompt)).strip()
+                newSummaryTokenCount = self.tokenCounter(newSummary)
+            except BaseException:
+                #Put the batch back in front of anything evicted since, so the next attempt folds it in order. While the
+                #summarizer keeps failing at most maxMessages are kept for it; older ones are dropped.
+                with self._lock:
+                    if generation == self._generation:
+                        self._evicted[:0] = evicted
+                        del self._evicted[:-self.maxMessages]
+                raise
+            with self._lock:
+                #A clear() while the summarizer ran wins over the summary of the history it cleared
+                if generation == self._generation:
+                    self.summary = newSummary
+                    self.summaryTokenCount = newSummaryTokenCount
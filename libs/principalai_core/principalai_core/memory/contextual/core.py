@@ -0,0 +1,280 @@
+from contextlib import contextmanager
+from typing import Any, Optional, Sequence
+import json
+import os
+import threading
+
+import numpy as np
+
+from principalai_core.memory.core import Memory
+from principalai_core.utils.errors import IncorrectDefinitonError
+
+try:
+    import fcntl
+except ImportError: #Windows. Appends from multiple processes are then not serialized.
+    fcntl = None
+
+_QUANTIZATIONS = {
+    None: np.float32,
+    "float16": np.float16,
+    "int8": np.int8
+}
+
+class ContextualMemory(Memory):
+    """
+    Append-only, memory-mapped vector store for retrieval.
+
+    A store at path is made up of these files:
+        path.json       header (dimension, quantization)
+        path.vectors    row-major embedding matrix, one row per memory
+        path.scales     float32 per-row scale (int8 quantization only)
+        path.meta.jsonl one JSON metadata line per memory
+        path.offsets    uint64 byte offset of each metadata line; a row only exists once its offset is written
+
+    Vectors are read through np.memmap, so every process opening the same store shares the operating system page cache
+    instead of loading its own copy into RAM. Appends take an exclusive file lock and readers pick up new rows on their next
+    search.
+
+    Vectors are L2 normalized on insert and scored with cosine similarity. float16 halves and int8 quarters the storage
+    (int8 keeps a per-row scale) at a small cost in precision.
+    """
+    def __init__(
+        self,
+        path: str,
+        dimension: Optional[int] = None,
+        quantization: Optional[str] = None,
+        searchChunkRows: int = 65536
+    ):
+        super().__init__()
+        self.localMemory = False
+        self.path = path
+        self.searchChunkRows = searchChunkRows
+        headerPath = path + ".json"
+        if os.path.exists(headerPath):
+            with open(headerPath) as f:
+                header = json.load(f)
+            if dimension is not None and dimension != header["dimension"]:
+                raise IncorrectDefinitonError(f'Store at {path} has dimension {header["dimension"]}, not {dimension}.')
+            if quantization is not None and quantization != header["quantization"]:
+                raise IncorrectDefinitonError(f'Store at {path} uses {header["quantization"]} quantization, not {quantization}.')
+            dimension, quantization = header["dimension"], header["quantization"]
+        else:
+            if dimension is None:
+                raise IncorrectDefinitonError('dimension is required to create a new contextual memory store.')
+            if quantization not in _QUANTIZATIONS:
+                raise IncorrectDefinitonError(f'Unsupported quantization {quantization}. Use one of: float16, int8.')
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            with self._file_lock():
+                if not os.path.exists(headerPath):
+                    temporaryPath = f"{headerPath}.{os.getpid()}.tmp"
+                    with open(temporaryPath, "w") as f:
+                        json.dump({"dimension": dimension, "quantization": quantization}, f)
+                    os.replace(temporaryPath, headerPath)
+                    for suffix in (".vectors", ".scales", ".meta.jsonl", ".offsets"):
+                        open(path + suffix, "ab").close()
+        self.dimension: int = dimension
+        self.quantization: Optional[str] = quantization
+        self.dtype = np.dtype(_QUANTIZATIONS[quantization])
+        self._count: int = 0
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._offsets: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._count
+
+    def add(
+        self,
+        vectors: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Any]] = None
+    ) -> list[int]:
+        """Append a batch of embeddings with optional JSON serializable metadata. Returns the new row ids."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            #An empty batch would still write an offset without a row and break every later remap
+            return []
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        if vectors.shape[1] != self.dimension:
+            raise IncorrectDefinitonError(f'Expected vectors of dimension {self.dimension}, got {vectors.shape[1]}.')
+        if metadatas is None:
+            metadatas = [None] * len(vectors)
+        if len(metadatas) != len(vectors):
+            raise IncorrectDefinitonError('One metadata entry is required per vector.')
+        rows, scales = self._encode(vectors)
+        metadataLines = [(json.dumps(metadata, separators=(",", ":")) + "\n").encode("utf-8") for metadata in metadatas]
+
+        with self._lock, self._file_lock():
+            #Rows written by a crashed writer after the last committed offset are dropped before appending
+            committed = os.path.getsize(self.path + ".offsets") // 8
+            self._truncate_to(committed)
+            with open(self.path + ".vectors", "ab") as f:
+                f.write(rows.tobytes())
+            if scales is not None:
+                with open(self.path + ".scales", "ab") as f:
+                    f.write(scales.tobytes())
+            with open(self.path + ".meta.jsonl", "ab") as f:
+                start = f.tell()
+                f.write(b"".join(metadataLines))
+            offsets = np.cumsum([start] + [len(line) for line in metadataLines[:-1]], dtype=np.uint64)
+            with open(self.path + ".offsets", "ab") as f:
+                f.write(offsets.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self._refresh()
+        return list(range(committed, committed + len(vectors)))
+
+    def get(
+        self,
+        rowId: int
+    ) -> Any:
+        """Return the metadata stored with a row"""
+        self._refresh()
+        if not 0 <= rowId < self._count:
+            raise IndexError(f'Row {rowId} does not exist in this store.')
+        return self._read_metadata([rowId], self._offsets)[0]
+
+    def get_vector(
+        self,
+        rowId: int
+    ) -> np.ndarray:
+        """Return the stored (normalized, dequantized) vector of a row"""
+        self._refresh()
+        if not 0 <= rowId < self._count:
+            raise IndexError(f'Row {rowId} does not exist in this store.')
+        vector = np.asarray(self._vectors[rowId], dtype=np.float32)
+        if self._scales is not None:
+            vector = vector * self._scales[rowId]
+        return vector
+
+    def search(
+        self,
+        queries: Sequence[Sequence[float]],
+        k: int = 5,
+        includeMetadata: bool = True
+    ) -> list[list[tuple[int, float, Any]]]:
+        """
+        Batched top-k cosine similarity search.
+
+        queries is a single vector or a (n, dimension) batch. Returns, per query, up to k (row id, score, metadata) tuples
+        ordered best first. The store is scanned in chunks of searchChunkRows so memory use stays bounded.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        queries = self._normalize(queries)
+        self._refresh()
+        count, vectors, scales, offsets = self._count, self._vectors, self._scales, self._offsets
+        k = min(k, count)
+        if k == 0:
+            return [[] for _ in queries]
+
+        bestScores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        bestRows = np.zeros((len(queries), k), dtype=np.int64)
+        for start in range(0, count, self.searchChunkRows):
+            stop = min(start + self.searchChunkRows, count)
+            chunkScores = queries @ np.asarray(vectors[start:stop], dtype=np.float32).T
+            if scales is not None:
+                chunkScores *= scales[start:stop]
+            candidateScores = np.concatenate([bestScores, chunkScores], axis=1)
+            candidateRows = np.concatenate(
+                [bestRows, np.broadcast_to(np.arange(start, stop), chunkScores.shape)], axis=1
+            )
+            top = np.argpartition(-candidateScores, k - 1, axis=1)[:, :k]
+            bestScores = np.take_along_axis(candidateScores, top, axis=1)
+            bestRows = np.take_along_axis(candidateRows, top, axis=1)
+
+        order = np.argsort(-bestScores, axis=1, kind="stable")
+        bestScores = np.take_along_axis(bestScores, order, axis=1)
+        bestRows = np.take_along_axis(bestRows, order, axis=1)
+        metadatas = {}
+        if includeMetadata:
+            rowIds = sorted(set(int(row) for row in bestRows.ravel()))
+            metadatas = dict(zip(rowIds, self._read_metadata(rowIds, offsets)))
+        results = []
+        for queryRows, queryScores in zip(bestRows, bestScores):
+            results.append([
+                (int(row), float(score), metadatas.get(int(row)))
+                for row, score in zip(queryRows, queryScores)
+            ])
+        return results
+
+    def _read_metadata(
+        self,
+        rowIds: Sequence[int],
+        offsets: np.memmap
+    ) -> list[Any]:
+        """Metadata of several rows, read with a single open of the metadata file"""
+        metadatas = []
+        with open(self.path + ".meta.jsonl", "rb") as f:
+            for rowId in rowIds:
+                f.seek(int(offsets[rowId]))
+                metadatas.append(json.loads(f.readline()))
+        return metadatas
+
+    def _encode(
+        self,
+        vectors: np.ndarray
+    ) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        vectors = self._normalize(vectors)
+        if self.quantization == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            rows = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+            return rows, scales.astype(np.float32)
+        return vectors.astype(self.dtype), None
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _refresh(self) -> None:
+        """Remap the files if other writers (or this one) have committed new rows"""
+        count = os.path.getsize(self.path + ".offsets") // 8
+        if count == self._count and self._offsets is not None:
+            return
+        with self._lock:
+            if count == 0:
+                self._vectors, self._scales, self._offsets = None, None, None
+            else:
+                self._vectors = np.memmap(self.path + ".vectors", dtype=self.dtype, mode="r", shape=(count, self.dimension))
+                self._offsets = np.memmap(self.path + ".offsets", dtype=np.uint64, mode="r", shape=(count,))
+                if self.quantization == "int8":
+                    self._scales = np.memmap(self.path + ".scales", dtype=np.float32, mode="r", shape=(count,))
+            self._count = count
+
+    def _truncate_to(
+        self,
+        count: int
+    ) -> None:
+        rowBytes = self.dimension * self.dtype.itemsize
+        for suffix, size in ((".vectors", count * rowBytes), (".scales", count * 4 if self.quantization == "int8" else 0)):
+            if os.path.getsize(self.path + suffix) > size:
+                os.truncate(self.path + suffix, size)
+        if count > 0:
+            offsets = np.memmap(self.path + ".offsets", dtype=np.uint64, mode="r", shape=(count,))
+            with open(self.path + ".meta.jsonl", "rb") as f:
+                f.seek(int(offsets[-1]))
+                metadataSize = int(offsets[-1]) + len(f.readline())
+        else:
+            metadataSize = 0
+        if os.path.getsize(self.path + ".meta.jsonl") > metadataSize:
+            os.truncate(self.path + ".meta.jsonl", metadataSize)
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lockFile:
+            fcntl.flock(lockFile, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockFile, fcntl.LOCK_UN)
@@ -1,6 +1,4 @@
-from pydantic import BaseModel
-
-class Memory(BaseModel):
+class Memory():
     def __init__(self):
         self.localMemory = True
         
@@ -8,4 +6,4 @@ class Memory(BaseModel):
     def __str__():
         return None
     
-    
\ No newline at end of file
+    
@@ -0,0 +1,13 @@
+from typing import TYPE_CHECKING
+
+from principalai_core.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .agent_selection import AgentSelectionIndex
+
+__all__ = ["AgentSelectionIndex"]
+
+#Submodules are imported on first access to keep `import principalai_core...` cheap
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "AgentSelectionIndex": ".agent_selection"
+})
@@ -0,0 +1,234 @@
+from typing import Optional, Callable, Sequence
+import re
+import threading
+
+import numpy as np
+
+from principalai_core.data import Entity
+from principalai_core.utils.errors import AlreadyExistsError, DoesNotExistError, IncorrectDefinitonError
+
+class AgentSelectionIndex():
+    """
+    Embedding index used to route a query to the registered agents best suited to answer it.
+
+    Each agent description is embedded once when the agent is added. Vectors are L2 normalized and kept in one contiguous
+    float32 matrix so a query is scored against every agent with a single matrix-vector product.
+
+    The language model is only consulted when the top candidates of the shortlist are too close to call (within tieMargin
+    of each other), and then only with the shortlist, never with the full set of agents.
+    """
+    def __init__(
+        self,
+        embeddingFunction: Callable[[list[str]], Sequence[Sequence[float]]],
+        languageModelRunEngine: Optional[Callable] = None,
+        tieMargin: float = 0.02,
+        initialCapacity: int = 64
+    ):
+        '''
+        embeddingFunction takes a list of texts and returns one embedding per text. It is called once per agent on add and
+        once per query on selection.
+        '''
+        self.embeddingFunction = embeddingFunction
+        self.languageModelRunEngine = languageModelRunEngine
+        self.tieMargin = tieMargin
+        self._initialCapacity = max(1, initialCapacity)
+        self._vectors: Optional[np.ndarray] = None
+        self._size: int = 0
+        self._names: list[str] = []
+        self._descriptions: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def add(
+        self,
+        entity: Entity
+    ) -> None:
+        """Embed and add a single agent entity to the index"""
+        self.add_many([entity])
+
+    def add_many(
+        self,
+        entities: Sequence[Entity]
+    ) -> None:
+        """Embed a batch of agent entities with a single embedding call and add them to the index"""
+        self.add_embedded(entities, self.embed_entities(entities))
+
+    def embed_entities(
+        self,
+        entities: Sequence[Entity]
+    ) -> Optional[np.ndarray]:
+        """
+        Embed agent entities without adding them, so callers can make the embedding call outside their own locks and
+        publish the result with add_embedded
+        """
+        names = set()
+        for entity in entities:
+            if entity.description is None or entity.description == "":
+                raise IncorrectDefinitonError(f'{entity.name} has no description. Agents need a description to be selectable.')
+            if entity.name in self._rows:
+                raise AlreadyExistsError(f'{entity.name} is already in the agent selection index.')
+            if entity.name in names:
+                raise AlreadyExistsError(f'{entity.name} appears more than once in the batch.')
+            names.add(entity.name)
+        if not entities:
+            return None
+        return self._normalize(self._embed([entity.description for entity in entities]))
+
+    def add_embedded(
+        self,
+        entities: Sequence[Entity],
+        vectors: Optional[np.ndarray]
+    ) -> None:
+        """Add agent entities with the vectors returned by embed_entities"""
+        if not entities:
+            return
+        with self._lock:
+            #Checked again under the lock, since another add may have run since embed_entities
+            for entity in entities:
+                if entity.name in self._rows:
+                    raise AlreadyExistsError(f'{entity.name} is already in the agent selection index.')
+            self._check_dimension(vectors)
+            self._reserve(self._size + len(entities), vectors.shape[1])
+            self._vectors[self._size:self._size + len(entities)] = vectors
+            for entity in entities:
+                self._rows[entity.name] = self._size
+                self._names.append(entity.name)
+                self._descriptions.append(entity.description)
+                self._size += 1
+
+    def remove(
+        self,
+        name: str
+    ) -> None:
+        """Remove an agent from the index. The last row is moved into the freed slot so the matrix stays dense."""
+        with self._lock:
+            if name not in self._rows:
+                raise DoesNotExistError(f'{name} is not in the agent selection index.')
+            row = self._rows.pop(name)
+            last = self._size - 1
+            if row != last:
+                self._vectors[row] = self._vectors[last]
+                self._names[row] = self._names[last]
+                self._descriptions[row] = self._descriptions[last]
+                self._rows[self._names[row]] = row
+            self._names.pop()
+            self._descriptions.pop()
+            self._size -= 1
+
+    def top_k(
+        self,
+        query: str,
+        k: int = 5
+    ) -> list[tuple[str, float]]:
+        """Return the k most similar agents to the query as (agent name, cosine similarity), best first"""
+        return self.top_k_batch([query], k)[0]
+
+    def top_k_batch(
+        self,
+        queries: Sequence[str],
+        k: int = 5
+    ) -> list[list[tuple[str, float]]]:
+        """Score a batch of queries against all agents in one matrix product"""
+        if self._size == 0:
+            return [[] for _ in queries]
+        queryVectors = self._normalize(self._embed(list(queries)))
+        with self._lock:
+            self._check_dimension(queryVectors)
+            scores = queryVectors @ self._vectors[:self._size].T
+            names = list(self._names)
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        results = []
+        for queryScores, queryCandidates in zip(scores, candidates):
+            ordered = queryCandidates[np.argsort(-queryScores[queryCandidates], kind="stable")]
+            results.append([(names[i], float(queryScores[i])) for i in ordered])
+        return results
+
+    def select(
+        self,
+        query: str,
+        k: int = 5
+    ) -> Optional[str]:
+        """
+        Select the single best agent for a query.
+
+        The top candidate is returned directly unless other shortlisted candidates are within tieMargin of it, in which
+        case the language model run engine (if any) is asked to pick among the tied candidates only.
+        """
+        shortlist = self.top_k(query, k)
+        if not shortlist:
+            return None
+        bestScore = shortlist[0][1]
+        tied = [name for name, score in shortlist if bestScore - score <= self.tieMargin]
+        if len(tied) == 1 or self.languageModelRunEngine is None:
+            return shortlist[0][0]
+        return self._break_tie(query, tied)
+
+    def _break_tie(
+        self,
+        query: str,
+        candidates: list[str]
+    ) -> str:
+        with self._lock:
+            descriptions = {name: self._descriptions[self._rows[name]] for name in candidates if name in self._rows}
+        candidateLines = "\n".join(f"- {name}: {description}" for name, description in descriptions.items())
+        prompt = (
+            "Select the agent best suited to handle the query. Reply with the agent name only.\n\n"
+            f"Query: {query}\n\nAgents:\n{candidateLines}"
+        )
+        response = str(self.languageModelRunEngine(prompt)).strip().strip("`'\".").strip()
+        if response in candidates:
+            return response
+        #Otherwise match names as whole words only, so "search" does not match a reply of "search_web". When several
+        #names match, the longest is the most specific one.
+        matches = [name for name in candidates if re.search(rf"(?<![\w-]){re.escape(name)}(?![\w-])", response)]
+        if matches:
+            return max(matches, key=len)
+        #Fall back to the best embedding match if the response cannot be matched to a candidate
+        return candidates[0]
+
+    def _embed(
+        self,
+        texts: list[str]
+    ) -> np.ndarray:
+        vectors = np.asarray(self.embeddingFunction(texts), dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(texts):
+            raise IncorrectDefinitonError('Embedding function must return one embedding vector per input text.')
+        return vectors
+
+    def _check_dimension(
+        self,
+        vectors: np.ndarray
+    ) -> None:
+        #Called with the lock held, so the index cannot be created with another dimension in between
+        if self._vectors is not None and vectors.shape[1] != self._vectors.shape[1]:
+            raise IncorrectDefinitonError(f'Embedding dimension {vectors.shape[1]} does not match the index dimension '
+                                          f'{self._vectors.shape[1]}.')
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(vectors / norms, dtype=np.float32)
+
+    def _reserve(
+        self,
+        size: int,
+        dimension: int
+    ) -> None:
+        #Grow geometrically so that repeated adds are amortized O(1) copies
+        if self._vectors is None:
+            self._vectors = np.zeros((max(self._initialCapacity, size), dimension), dtype=np.float32)
+        elif size > self._vectors.shape[0]:
+            grown = np.zeros((max(size, 2 * self._vectors.shape[0]), dimension), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
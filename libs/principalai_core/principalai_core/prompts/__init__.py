@@ -1,4 +1,25 @@
-from .core import (
-    Prompt,
-    FunctionPrompt
-)
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from principalai_core.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .core import (
+        Prompt,
+        FunctionPrompt
+    )
+    from .template import (
+        AssembledPrompt,
+        CompiledTemplate,
+        get_compiled_template
+    )
+
+__all__ = ["Prompt", "FunctionPrompt", "AssembledPrompt", "CompiledTemplate", "get_compiled_template"]
+
+#Submodules are imported on first access to keep `import principalai_core...` cheap
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "Prompt": ".core",
+    "FunctionPrompt": ".core",
+    "AssembledPrompt": ".template",
+    "CompiledTemplate": ".template",
+    "get_compiled_template": ".template"
+})
@@ -1,8 +1,20 @@
-from pydantic import BaseModel
-from typing import Optional, Callable
+from __future__ import annotations
+from typing import Any, Iterable, Iterator, Optional, Callable, TYPE_CHECKING
 
 from principalai_core.invocable import Invocable, FunctionInvocable
 from principalai_core.language_models import LanguageModel
+from principalai_core.language_models.streaming import StreamingResponse, AsyncStreamingResponse
+from principalai_core.prompts.template import AssembledPrompt, get_compiled_template
+from principalai_core.utils.cache import MISSING
+from principalai_core.utils.tokens import TokenCounter, approximate_token_count
+from principalai_core.utils.errors import DoesNotExistError, IncorrectDefinitonError
+from principalai_core.instrumentation import instrumentation, traced
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+    from principalai_core.language_models import ResponseCache
+    from principalai_core.utils.parsers.streaming import StructuredStream, AsyncStructuredStream
+    from principalai_core.invocable.batch import BatchResult
 
 class Prompt(Invocable):
     """String that will be passed into an LLM. An f-string which is an Invocable and can be run in a language model."""
@@ -41,29 +53,197 @@ class FunctionPrompt(Prompt, FunctionInvocable):
         outputParameterSchema: Optional[BaseModel] = None,
         languageModel: LanguageModel = None,
         languageModelRunEngine: Callable = None,
-        prompt: Optional[str] = None
+        prompt: Optional[str] = None,
+        responseCache: Optional[ResponseCache] = None
     ):
         FunctionInvocable.__init__(self)
         Prompt.__init__(self, inputParameterSchema, outputParameterSchema, languageModel, languageModelRunEngine, prompt)
+        self.responseCache: Optional[ResponseCache] = responseCache
     
+    @traced
     def run(
         self,
         *args,
         **kwargs
     ):
-        completedPrompt = None
+        completedPrompt = self._complete_prompt(*args, **kwargs)
+        if self.responseCache is None:
+            return self._run_language_model(completedPrompt)
+        cacheKey = self.responseCache.key_for(self.languageModel, self.languageModelRunEngine, completedPrompt)
+        from inspect import iscoroutinefunction
+        if iscoroutinefunction(self.languageModelRunEngine):
+            #Async engines get a coroutine back on hits as well as misses; the result is cached once it is awaited
+            return self.responseCache.aget_or_run(cacheKey, lambda: self._run_language_model(completedPrompt))
+        return self.responseCache.get_or_run(cacheKey, lambda: self._run_language_model(completedPrompt))
+
+    def stream(
+        self,
+        *args,
+        **kwargs
+    ) -> StreamingResponse:
+        """
+        Run the prompt on the language model and stream the output as it is generated.
+
+        Iterate the returned StreamingResponse for deltas or call get_final() for the full output. Streams bypass the
+        languageModelRunEngine since they need the provider's streaming API, but still use the response cache.
+        """
+        completedPrompt = self._complete_prompt(*args, **kwargs)
+        languageModel = self._get_streaming_language_model()
+        if self.responseCache is None:
+            return languageModel.stream(completedPrompt)
+        cacheKey = self.responseCache.key_for(languageModel, languageModel.stream, completedPrompt)
+        cachedOutput = self.responseCache.get(cacheKey, MISSING)
+        if cachedOutput is not MISSING:
+            return StreamingResponse(iter([cachedOutput]))
+        stream = languageModel.stream(completedPrompt)
+        stream.onComplete = lambda output: self.responseCache.set(cacheKey, output)
+        return stream
+
+    async def astream(
+        self,
+        *args,
+        **kwargs
+    ) -> AsyncStreamingResponse:
+        """Async version of stream"""
+        completedPrompt = self._complete_prompt(*args, **kwargs)
+        languageModel = self._get_streaming_language_model()
+        if self.responseCache is None:
+            return await languageModel.astream(completedPrompt)
+        cacheKey = self.responseCache.key_for(languageModel, languageModel.astream, completedPrompt)
+        cachedOutput = self.responseCache.get(cacheKey, MISSING)
+        if cachedOutput is not MISSING:
+            async def cachedDeltas():
+                yield cachedOutput
+            return AsyncStreamingResponse(cachedDeltas())
+        stream = await languageModel.astream(completedPrompt)
+        stream.onComplete = lambda output: self.responseCache.set(cacheKey, output)
+        return stream
+
+    def stream_structured(
+        self,
+        *args,
+        **kwargs
+    ) -> StructuredStream:
+        """
+        Stream the output and parse it incrementally against the output parameter schema.
+
+        Iterating the returned StructuredStream yields partial model instances as fields complete. Generation is stopped
+        with a SchemaMismatchError as soon as the output can no longer match the schema. get_final() returns the
+        validated model.
+        """
+        from principalai_core.utils.parsers.streaming import IncrementalSchemaParser, StructuredStream
+        parser = IncrementalSchemaParser(self._get_output_model())
+        return StructuredStream(self.stream(*args, **kwargs), parser)
+
+    async def astream_structured(
+        self,
+        *args,
+        **kwargs
+    ) -> AsyncStructuredStream:
+        """Async version of stream_structured"""
+        from principalai_core.utils.parsers.streaming import IncrementalSchemaParser, AsyncStructuredStream
+        parser = IncrementalSchemaParser(self._get_output_model())
+        return AsyncStructuredStream(await self.astream(*args, **kwargs), parser)
+
+    def write_batch_file(
+        self,
+        path: str,
+        inputs: Iterable[Any],
+        **parameters
+    ) -> int:
+        """
+        Complete the prompt for every input and write the requests as a provider batch job file (JSONL) for the prompt's
+        language model. Inputs are passed like in map and streamed to disk. Returns the number of requests written.
+        """
+        from principalai_core.invocable.batch import write_batch_file, input_arguments
+        languageModel = self._get_batch_language_model()
+        prompts = (self._complete_prompt(*args, **kwargs) for args, kwargs in map(input_arguments, inputs))
+        return write_batch_file(path, prompts, languageModel, **parameters)
+
+    def read_batch_file(
+        self,
+        path: str
+    ) -> Iterator[BatchResult]:
+        """Read the results file of a batch job written with write_batch_file. BatchResult.index is the input's index."""
+        from principalai_core.invocable.batch import read_batch_file
+        return read_batch_file(path, self._get_batch_language_model())
+
+    def _run_language_model(
+        self,
+        completedPrompt
+    ):
+        if not instrumentation.enabled:
+            return self.languageModelRunEngine(completedPrompt)
+        languageModel = self.languageModel
+        name = languageModel.model if languageModel is not None and languageModel.model else \
+            getattr(self.languageModelRunEngine, "__qualname__", "languageModelRunEngine")
+        with instrumentation.span(str(name), "llm") as span:
+            output = self.languageModelRunEngine(completedPrompt)
+            countTokens = languageModel.count_tokens if languageModel is not None else approximate_token_count
+            if isinstance(completedPrompt, str):
+                promptTokens = getattr(completedPrompt, "tokenCount", None)
+                if promptTokens is None:
+                    promptTokens = countTokens(completedPrompt)
+                span.set_attribute("promptTokens", promptTokens)
+                instrumentation.count("llm.prompt_tokens", promptTokens)
+            if isinstance(output, str):
+                completionTokens = countTokens(output)
+                span.set_attribute("completionTokens", completionTokens)
+                instrumentation.count("llm.completion_tokens", completionTokens)
+            return output
+
+    def assemble(
+        self,
+        *args,
+        **kwargs
+    ) -> AssembledPrompt:
+        """
+        Complete the prompt without running it. The result is the prompt string with its token count for the prompt's
+        language model (tokenCount), e.g. to check it against a context budget before running.
+        """
+        completedPrompt = self._complete_prompt(*args, **kwargs)
+        if isinstance(completedPrompt, AssembledPrompt):
+            return completedPrompt
+        countTokens = self._token_counter()
+        return AssembledPrompt(completedPrompt, countTokens=lambda: countTokens(completedPrompt))
+
+    def _complete_prompt(
+        self,
+        *args,
+        **kwargs
+    ):
         if self.prompt is not None:
-            completedPrompt = self.prompt.format(*args, **kwargs)
-        else:
-            completedPrompt = self.func(*args, **kwargs)
-        return self.languageModelRunEngine(completedPrompt)
+            #Templates are compiled once and shared by every call
+            return get_compiled_template(self.prompt).assemble(args, kwargs, self._token_counter())
+        return self.func(*args, **kwargs)
+
+    def _token_counter(self) -> TokenCounter:
+        languageModel = self.languageModel
+        if languageModel is None or type(languageModel).count_tokens is LanguageModel.count_tokens:
+            return approximate_token_count
+        return languageModel.count_tokens
+
+    def _get_streaming_language_model(self) -> LanguageModel:
+        if self.languageModel is None:
+            raise DoesNotExistError('''Streaming requires a LanguageModel. Please set one with set_language_model before 
+                                    streaming the prompt.''')
+        return self.languageModel
+
+    def _get_batch_language_model(self) -> LanguageModel:
+        if self.languageModel is None:
+            raise DoesNotExistError('''Batch jobs require a LanguageModel. Please set one with set_language_model before 
+                                    writing or reading batch files.''')
+        return self.languageModel
+
+    def _get_output_model(self) -> type[BaseModel]:
+        if self.outputParameterSchema is None:
+            raise IncorrectDefinitonError('''Structured streaming requires an outputParameterSchema. Please pass a pydantic 
+                                          BaseModel as the output parameter schema.''')
+        return self.outputParameterSchema[0]
     
     def __str__(
         self,
         *args,
         **kwargs
     ):
-        if self.prompt is not None:
-            return self.prompt.format(*args, **kwargs)
-        else:
-            return self.func(*args, **kwargs)
\ No newline at end of file
+        return self._complete_prompt(*args, **kwargs)
\ No newline at end of file
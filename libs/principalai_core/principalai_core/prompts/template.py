@@ -0,0 +1,160 @@
+from functools import lru_cache
+from typing import Any, Callable, Optional, Sequence
+
+from principalai_core.utils.tokens import TokenCounter, approximate_token_count, approximate_token_count_for_length
+
+_CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+
+class AssembledPrompt(str):
+    """
+    A completed prompt. Behaves exactly like the prompt string and carries its token count, so language models and rate
+    limiters can use the count instead of tokenizing the prompt again. The count is computed on first access.
+    """
+    def __new__(
+        cls,
+        text: str,
+        tokenCount: Optional[int] = None,
+        countTokens: Optional[Callable[[], int]] = None
+    ):
+        prompt = super().__new__(cls, text)
+        prompt._tokenCount = tokenCount
+        prompt._countTokens = countTokens
+        return prompt
+
+    @property
+    def tokenCount(self) -> Optional[int]:
+        if self._tokenCount is None and self._countTokens is not None:
+            self._tokenCount = self._countTokens()
+            self._countTokens = None
+        return self._tokenCount
+
+    def __reduce__(self):
+        return (AssembledPrompt, (str(self), self.tokenCount))
+
+class _Slot():
+    """A replacement field of a template"""
+    __slots__ = ("fieldName", "key", "simple", "conversion", "formatSpec")
+
+    def __init__(
+        self,
+        fieldName: str,
+        key: Any,
+        conversion: Optional[str],
+        formatSpec: str
+    ):
+        self.fieldName: str = fieldName
+        self.key: Any = key #Index into args or name in kwargs
+        #Fields with attribute or index access (e.g. {user.name} or {items[0]}) are resolved by the stdlib Formatter
+        self.simple: bool = fieldName == str(key)
+        self.conversion: Optional[str] = conversion
+        self.formatSpec: str = formatSpec
+
+    def render(
+        self,
+        args: Sequence[Any],
+        kwargs: dict[str, Any]
+    ) -> str:
+        if self.simple:
+            value = args[self.key] if isinstance(self.key, int) else kwargs[self.key]
+        else:
+            from string import Formatter
+            value, _ = Formatter().get_field(self.fieldName, args, kwargs)
+        if self.conversion is not None:
+            value = _CONVERSIONS[self.conversion](value)
+        return format(value, self.formatSpec)
+
+class CompiledTemplate():
+    """
+    A str.format template parsed once into static segments and slots.
+
+    Rendering fills the slots and joins them with the static segments, giving the same text as template.format, so the
+    static text (in particular staticPrefix, everything before the first slot) is byte-identical on every call and
+    provider side prefix caching keeps working.
+
+    With approximate_token_count the token count of an assembled prompt only depends on its length and costs nothing.
+    Any other token counter tokenizes the assembled text the first time the count is read, since with a subword
+    tokenizer a slot value can merge with the text next to it and a sum of segment counts would be off.
+    """
+    def __init__(
+        self,
+        template: str
+    ):
+        self.template: str = template
+        self.segments: list[Any] = [] #Static strings and _Slot instances, in order
+        self.dynamic: bool = False #Nested replacement fields in a format spec; rendered with str.format instead
+        self._compile()
+        self.slots: list[_Slot] = [segment for segment in self.segments if isinstance(segment, _Slot)]
+        self.staticPrefix: str = self.segments[0] if self.segments and isinstance(self.segments[0], str) else ""
+        self._slotPositions: list[int] = [index for index, segment in enumerate(self.segments) if isinstance(segment, _Slot)]
+
+    def render(
+        self,
+        args: Sequence[Any] = (),
+        kwargs: Optional[dict[str, Any]] = None
+    ) -> str:
+        """Fill the slots; same result as template.format(*args, **kwargs)"""
+        return "".join(self._render_parts(args, kwargs if kwargs is not None else {}))
+
+    def assemble(
+        self,
+        args: Sequence[Any] = (),
+        kwargs: Optional[dict[str, Any]] = None,
+        tokenCounter: TokenCounter = approximate_token_count
+    ) -> AssembledPrompt:
+        """Fill the slots. The token count of the result is computed on demand."""
+        text = self.render(args, kwargs)
+        if tokenCounter is approximate_token_count:
+            return AssembledPrompt(text, approximate_token_count_for_length(len(text)))
+        return AssembledPrompt(text, countTokens=lambda: tokenCounter(text))
+
+    def _render_parts(
+        self,
+        args: Sequence[Any],
+        kwargs: dict[str, Any]
+    ) -> list[str]:
+        if self.dynamic:
+            return [self.template.format(*args, **kwargs)]
+        parts = list(self.segments)
+        for position, slot in zip(self._slotPositions, self.slots):
+            parts[position] = slot.render(args, kwargs)
+        return parts
+
+    def _compile(self) -> None:
+        #string imports re, so it is only imported once a template is compiled
+        from string import Formatter
+        autoIndex = 0
+        manual = False
+        for literalText, fieldName, formatSpec, conversion in Formatter().parse(self.template):
+            if literalText:
+                #"{{" and "}}" escapes split the literal text; keep it as one static segment
+                if self.segments and isinstance(self.segments[-1], str):
+                    self.segments[-1] += literalText
+                else:
+                    self.segments.append(literalText)
+            if fieldName is None:
+                continue
+            if conversion is not None and conversion not in _CONVERSIONS:
+                raise ValueError(f'Unknown conversion specifier {conversion}')
+            if "{" in formatSpec:
+                self.dynamic = True
+            #Same numbering rules as str.format: "{}" takes the next positional argument
+            head = fieldName.split(".", 1)[0].split("[", 1)[0]
+            if head == "":
+                if manual:
+                    raise ValueError('cannot switch from manual field specification to automatic field numbering')
+                key = autoIndex
+                fieldName = f"{autoIndex}{fieldName}"
+                autoIndex += 1
+            elif head.isdigit():
+                if autoIndex:
+                    raise ValueError('cannot switch from automatic field numbering to manual field specification')
+                manual = True
+                key = int(head)
+            else:
+                key = head
+            self.segments.append(_Slot(fieldName, key, conversion, formatSpec))
+
+@lru_cache(maxsize=1024)
+def get_compiled_template(template: str) -> CompiledTemplate:
+    """Return the compiled form of a template, compiled once and shared by every prompt using the same template"""
+    return CompiledTemplate(template)
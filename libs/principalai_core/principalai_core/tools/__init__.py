@@ -1 +1,19 @@
-from .core import *
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from principalai_core.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .core import (
+        Tool,
+        FunctionTool,
+        ApiTool
+    )
+
+__all__ = ["Tool", "FunctionTool", "ApiTool"]
+
+#Submodules are imported on first access to keep `import principalai_core...` cheap
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "Tool": ".core",
+    "FunctionTool": ".core",
+    "ApiTool": ".core"
+})
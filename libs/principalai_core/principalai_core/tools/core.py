@@ -1,7 +1,6 @@
-from pydantic import BaseModel, ValidationError
-from typing import Optional, Callable
+from __future__ import annotations
+from typing import Optional, Callable, TYPE_CHECKING
 from warnings import warn
-import requests
 
 from principalai_core.invocable import Invocable, FunctionInvocable
 from principalai_core.data import Entity
@@ -9,8 +8,15 @@ from principalai_core.utils.errors import (
     IncorrectDefinitonError,
     HttpRequestError
 )
-from principalai_core.utils.parsers import defaultApiToolInputParser
-from principalai_core.utils.http import HttpRequestType
+from principalai_core.utils.parsers import defaultApiToolInputParser, get_compiled_schema
+from principalai_core.utils.http import HttpRequestType, HttpTransport, get_default_transport
+from principalai_core.instrumentation import instrumentation, traced
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+    from requests import Response
+    from principalai_core.utils.resilience import ResiliencePolicy
+    from principalai_core.utils.process import ProcessPool
 
 class Tool(Invocable):
     """Base class for Tool - Tools allow LLMs to perform actions outside of generation."""
@@ -22,7 +28,7 @@ class Tool(Invocable):
         outputParameterSchema: Optional[BaseModel] = None
     ):
         super().__init__(inputParameterSchema, outputParameterSchema)
-        self.attributes: Entity = Entity(name, description)
+        self.attributes: Entity = Entity(name, description, "tool")
 
 class FunctionTool(Tool, FunctionInvocable):
     """
@@ -34,6 +40,14 @@ class FunctionTool(Tool, FunctionInvocable):
     def function_tool_function():
         "Tool that returns Hellow World"
         return "Hello World"
+
+    CPU-bound tools can run in a pool of worker processes instead of on the caller's thread, so they neither block an
+    event loop nor hold the GIL. The function must then be defined at module level.
+
+    @FunctionTool("Document Scorer", executionMode="process", timeout=30)
+    def score_document(document: bytes):
+        "Scores a document"
+        ...
     """
     def __init__(
         self,
@@ -41,10 +55,30 @@ class FunctionTool(Tool, FunctionInvocable):
         description: Optional[str] = None, 
         inputParameterSchema: Optional[BaseModel] = None,
         outputParameterSchema: Optional[BaseModel] = None, 
-        func: Optional[Callable] = None
+        func: Optional[Callable] = None,
+        executionMode: str = "inline", #"inline" runs on the caller's thread, "process" in a worker process
+        timeout: Optional[float] = None, #Per call timeout in process mode; a worker exceeding it is replaced
+        processPool: Optional[ProcessPool] = None #Worker pool for process mode. Defaults to the process wide pool.
     ):
         super().__init__(name, description, inputParameterSchema, outputParameterSchema)
+        if executionMode not in ("inline", "process"):
+            raise IncorrectDefinitonError(f'Unknown execution mode {executionMode!r}. Use "inline" or "process".')
         self.func = func
+        self.executionMode: str = executionMode
+        self.timeout: Optional[float] = timeout
+        self.processPool: Optional[ProcessPool] = processPool
+
+    def _call_func(
+        self,
+        *args,
+        **kwargs
+    ):
+        if self.executionMode != "process":
+            return self.func(*args, **kwargs)
+        if self.processPool is None:
+            from principalai_core.utils.process import get_default_process_pool
+            self.processPool = get_default_process_pool()
+        return self.processPool.call(self.func, args, kwargs, self.timeout)
     
     def __call__(
         self,
@@ -82,6 +116,11 @@ class ApiTool(FunctionTool):
         return {
             "apiEndpoint": "https://host.com:port/someendpoint"
         }
+
+    GET responses can be cached following the endpoint's Cache-Control/ETag headers by giving the tool (or the default
+    transport) a transport with an HttpCache:
+
+    transport = HttpTransport(cache=HttpCache(diskPath="http_cache.db"))
     """
     def __init__(
         self,
@@ -93,6 +132,9 @@ class ApiTool(FunctionTool):
         httpRequestType: Optional[HttpRequestType] = HttpRequestType.GET.name.lower(),
         httpParameters: dict = {}, #Dictionary to provide HTTP request parameters except for inputs
         inputParameterParser: Optional[Callable] = None, #Custom parser. Can be used to put data into Url Paramter, Body, etc.
+        transport: Optional[HttpTransport] = None, #Pooled HTTP transport. Defaults to the process wide transport.
+        resiliencePolicy: Optional[ResiliencePolicy] = None, #Retries, deadlines and hedging. None sends each call once.
+        idempotent: Optional[bool] = None #Whether calls may be hedged. Defaults to True for every method except POST.
     ):
         super().__init__(name, description, inputParameterSchema, outputParameterSchema)
         self.func = None
@@ -103,14 +145,82 @@ class ApiTool(FunctionTool):
             self.inputParameterParser = defaultApiToolInputParser
         else:
             self.inputParameterParser = inputParameterParser
+        self.transport: HttpTransport = transport if transport is not None else get_default_transport()
+        self.resiliencePolicy: Optional[ResiliencePolicy] = resiliencePolicy
+        self.idempotent: Optional[bool] = idempotent
 
+    @traced
     def run(
         self,
         *args,
         **kwargs
     ):
+        requestMethod, inputParametersParsed = self._prepare_request(*args, **kwargs)
+        if self.resiliencePolicy is None:
+            response = self._send(requestMethod, inputParametersParsed)
+        else:
+            response = self.resiliencePolicy.run(self._send, requestMethod, inputParametersParsed,
+                                                 idempotent=self._is_idempotent(requestMethod))
+        return self._parse_response(response)
+
+    @traced
+    async def arun(
+        self,
+        *args,
+        **kwargs
+    ):
+        """Async version of run. Uses the same connection pool as run."""
+        requestMethod, inputParametersParsed = self._prepare_request(*args, **kwargs)
+        if self.resiliencePolicy is None:
+            response = await self._asend(requestMethod, inputParametersParsed)
+        else:
+            response = await self.resiliencePolicy.arun(self._asend, requestMethod, inputParametersParsed,
+                                                        idempotent=self._is_idempotent(requestMethod))
+        return self._parse_response(response)
+
+    def _is_idempotent(
+        self,
+        requestMethod: str
+    ) -> bool:
+        return self.idempotent if self.idempotent is not None else requestMethod.upper() != HttpRequestType.POST.value
+
+    def _send(
+        self,
+        requestMethod: str,
+        inputParametersParsed: dict
+    ) -> Response:
+        response = self.transport.request(requestMethod, self.apiEndpoint, **inputParametersParsed, **self.httpParameters)
+        self._check_status(response)
+        return response
+
+    async def _asend(
+        self,
+        requestMethod: str,
+        inputParametersParsed: dict
+    ) -> Response:
+        response = await self.transport.arequest(requestMethod, self.apiEndpoint, **inputParametersParsed, **self.httpParameters)
+        self._check_status(response)
+        return response
+
+    def _check_status(
+        self,
+        response: Response
+    ) -> None:
+        """Throttling and server errors are raised (and so can be retried) instead of being parsed as output"""
+        if response.status_code == 429 or response.status_code >= 500:
+            error = HttpRequestError(f'Tool {self.attributes.name} got HTTP {response.status_code} from {self.apiEndpoint}')
+            error.statusCode = response.status_code
+            error.response = response
+            raise error
+
+    def _prepare_request(
+        self,
+        *args,
+        **kwargs
+    ) -> tuple[str, dict]:
+        """Resolve endpoint, request type and parameters, and parse the inputs into request arguments"""
         #Run the function to get required variables
-        functionVariables = self.func()   
+        functionVariables = self.func() if self.func is not None else {}
         if self.apiEndpoint is None:
             if "apiEndpoint" in functionVariables:
                 self.apiEndpoint = functionVariables["apiEndpoint"]
@@ -132,20 +242,27 @@ class ApiTool(FunctionTool):
                 pass
             self.httpParameters = functionVariables["httpParameters"]
 
+        requestMethod = self.httpRequestType.value if isinstance(self.httpRequestType, HttpRequestType) \
+            else str(self.httpRequestType)
+        if requestMethod.upper() not in HttpRequestType.__members__:
+            raise HttpRequestError(f'Invalid HTTP request method: {self.httpRequestType}')
+        inputParametersParsed = self.inputParameterParser(self.inputParameterSchema[0], *args, **kwargs)
+        return requestMethod, inputParametersParsed
+
+    def _parse_response(
+        self,
+        response: Response
+    ):
+        """Validate the API response against the output parameter schema"""
+        if instrumentation.enabled:
+            instrumentation.count("http.response_bytes", len(response.content))
+        if self.outputParameterSchema is None:
+            return response.json()
         try:
-            requestMethod = getattr(requests, self.httpRequestType)
-            if not callable(requestMethod):
-                raise HttpRequestError(f'Invalid HTTP request method: {self.httpRequestType}')
-            inputParametersParsed = self.inputParameterParser(self.inputParameterSchema[0], *args, **kwargs)
-            response = requestMethod(self.apiEndpoint, **inputParametersParsed, **self.httpParameters)
-            if self.outputParameterSchema is None:
-                return response.json()
-            else:
-                try:
-                    validatedOutput = self.outputParameterSchema[0](response.json())
-                except ValidationError as e:
-                    raise ValidationError(f'''Tool {self.name} could not validate the API response. Please check the output
-                                          parameter schema passed in and the API response.: {e}''')
-                return validatedOutput
-        except requests.RequestException as e:
-            raise HttpRequestError(f'Http request failed: {e}')
\ No newline at end of file
+            validatedOutput = get_compiled_schema(self.outputParameterSchema[0]).validate_json(response.content)
+        except ValueError as e: #pydantic's ValidationError is a ValueError; catching it here avoids importing pydantic
+            #The ValidationError itself is raised, as before, with the tool named in a note
+            e.add_note(f'''Tool {self.attributes.name} could not validate the API response. Please check the output parameter 
+                       schema passed in and the API response.''')
+            raise
+        return validatedOutput
\ No newline at end of file
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from typing import Any, Optional
+import pickle
+import sqlite3
+import threading
+import time
+
+MISSING = object()
+
+class MemoryCacheTier():
+    """In-process LRU cache tier with optional TTL"""
+    def __init__(
+        self,
+        maxEntries: int = 1024,
+        ttl: Optional[float] = None
+    ):
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.evictions: int = 0
+        self._entries: OrderedDict[str, tuple[Any, Optional[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        key: str,
+        default: Any = None
+    ) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, MISSING)
+            if entry is MISSING:
+                return default
+            value, expiresAt = entry
+            if expiresAt is not None and expiresAt <= time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        expiresAt: Optional[float] = None
+    ) -> None:
+        """Store value for ttl seconds (default: the tier's ttl), or until expiresAt when given"""
+        if expiresAt is None:
+            ttl = ttl if ttl is not None else self.ttl
+            expiresAt = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expiresAt)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(
+        self,
+        key: str
+    ) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class SqliteCacheTier():
+    """
+    Persistent cache tier backed by a SQLite file.
+
+    Values are pickled, so only point this at files written by your own application. Entries beyond maxEntries are evicted
+    least recently used first. The size is checked every evictionInterval writes, so the table can briefly overshoot
+    maxEntries by up to that many rows.
+    """
+    def __init__(
+        self,
+        path: str,
+        maxEntries: int = 100_000,
+        ttl: Optional[float] = None,
+        table: str = "cache",
+        evictionInterval: int = 64
+    ):
+        if not table.isidentifier():
+            raise ValueError(f'Invalid cache table name: {table}')
+        self.path = path
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.table = table
+        self.evictionInterval = max(1, evictionInterval)
+        self.evictions: int = 0
+        self._writes: int = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def get(
+        self,
+        key: str,
+        default: Any = None
+    ) -> Any:
+        return self.get_with_expiry(key, default)[0]
+
+    def get_with_expiry(
+        self,
+        key: str,
+        default: Any = None
+    ) -> tuple[Any, Optional[float]]:
+        """Return the value and its expiry time (None if it does not expire), or (default, None)"""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default, None
+            value, expiresAt = row
+            if expiresAt is not None and expiresAt <= now:
+                self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return default, None
+            self._connection.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(value), expiresAt
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None
+    ) -> None:
+        now = time.time()
+        ttl = ttl if ttl is not None else self.ttl
+        expiresAt = now + ttl if ttl is not None else None
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, expiresAt, now)
+            )
+            self._writes += 1
+            if self._writes % self.evictionInterval != 0:
+                return
+            count = self._connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            if count > self.maxEntries:
+                overflow = count - self.maxEntries
+                self._connection.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)", (overflow,)
+                )
+                self.evictions += overflow
+
+    def delete(
+        self,
+        key: str
+    ) -> None:
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {self.table}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -25,4 +25,29 @@ class IncorrectDefinitonError(BaseError):
 class HttpRequestError(BaseError):
     """Raised when there is an htp request error"""
     def __init__(self, message='Http request error.', *args):
-        super().__init__(message, *args)
\ No newline at end of file
+        super().__init__(message, *args)
+
+class InvocationTimeoutError(BaseError):
+    """Raised when an invocation does not finish within its allotted time"""
+    def __init__(self, message='Invocation timed out.', *args):
+        super().__init__(message, *args)
+
+class GraphExecutionError(BaseError):
+    """Raised when a node of a graph fails while the graph is being run"""
+    def __init__(self, message='Graph execution failed.', *args):
+        super().__init__(message, *args)
+
+class ProcessWorkerError(BaseError):
+    """Raised when a worker process dies or cannot return a result while running a call"""
+    def __init__(self, message='Worker process failed.', *args):
+        super().__init__(message, *args)
+
+class SchemaMismatchError(BaseError):
+    """Raised when (streamed) output does not or can no longer match the output parameter schema"""
+    def __init__(self, message='Output does not match the output parameter schema.', *args):
+        super().__init__(message, *args)
+
+class BatchRequestError(BaseError):
+    """Raised for a request of a batch job that failed at the provider"""
+    def __init__(self, message='Batch request failed.', *args):
+        super().__init__(message, *args)
@@ -1,7 +1,211 @@
+from __future__ import annotations
 from enum import Enum
+from functools import partial
+from typing import Optional, Union, TYPE_CHECKING
+from urllib.parse import urlsplit
+import contextvars
+import threading
+import time
+
+from principalai_core.utils.errors import HttpRequestError
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    import requests
+    from principalai_core.utils.http_cache import HttpCache
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Seconds to wait before retrying, from the response headers of an HTTP error: retry-after-ms, or Retry-After as delay
+    seconds or an HTTP date. None if there is no usable hint; never negative.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    milliseconds = headers.get("retry-after-ms")
+    if milliseconds is not None:
+        try:
+            return max(0.0, float(milliseconds) / 1000)
+        except (TypeError, ValueError):
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        retryAt = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retryAt.tzinfo is None: #HTTP dates are always GMT
+        from datetime import timezone
+        retryAt = retryAt.replace(tzinfo=timezone.utc)
+    return max(0.0, retryAt.timestamp() - time.time())
 
 class HttpRequestType(Enum):
     GET = "GET"
     POST = "POST"
     PUT = "PUT"
-    DELETE = "DELETE"
\ No newline at end of file
+    DELETE = "DELETE"
+
+class HttpTransport():
+    """
+    Pooled HTTP transport shared by ApiTools.
+
+    Wraps a single requests Session so that connections are kept alive and reused across tool calls instead of paying a
+    TCP/TLS handshake per call. The number of open connections per host is bounded by maxConnectionsPerHost; callers block
+    until a pooled connection frees up rather than opening new sockets.
+
+    Async callers go through arequest, which runs the same pooled session on a dedicated worker pool. The worker pool and
+    a per host semaphore keep hundreds of concurrent coroutines from exhausting threads or sockets.
+
+    With an HttpCache, GET requests are answered from the cache while the stored response is fresh, revalidated when it
+    is stale, and identical concurrent requests are collapsed into one (see HttpCache). Fresh memory hits in arequest are
+    served on the event loop without a thread hop; disk lookups run on the worker pool.
+    """
+    def __init__(
+        self,
+        maxConnectionsPerHost: int = 10,
+        maxHosts: int = 10,
+        connectTimeout: Optional[float] = 5.0,
+        readTimeout: Optional[float] = 30.0,
+        keepAlive: bool = True,
+        maxWorkers: Optional[int] = None,
+        cache: Optional[HttpCache] = None #HTTP cache for GET requests. None sends every request.
+    ):
+        self.maxConnectionsPerHost = maxConnectionsPerHost
+        self.maxHosts = maxHosts
+        self.connectTimeout = connectTimeout
+        self.readTimeout = readTimeout
+        self.keepAlive = keepAlive
+        self.maxWorkers = maxWorkers if maxWorkers is not None else maxConnectionsPerHost * maxHosts
+        self.cache: Optional[HttpCache] = cache
+
+        #requests is imported when the first transport is created rather than when tools are imported
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._requestException = requests.RequestException
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=maxHosts, pool_maxsize=maxConnectionsPerHost, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if not keepAlive:
+            self.session.headers["Connection"] = "close"
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        #Per host semaphores of each event loop. Entries of closed loops are pruned whenever a new loop shows up.
+        self._hostSemaphores: dict[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self) -> Union[tuple[Optional[float], Optional[float]], None]:
+        """Default (connect, read) timeout applied when a request does not set its own"""
+        if self.connectTimeout is None and self.readTimeout is None:
+            return None
+        return (self.connectTimeout, self.readTimeout)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        **kwargs
+    ) -> requests.Response:
+        """Send a request through the pooled session. Transport failures are raised as HttpRequestError."""
+        if self.cache is not None and self.cache.cacheable_request(method, kwargs):
+            return self.cache.request(self._send, url, **kwargs)
+        return self._send(method, url, **kwargs)
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        **kwargs
+    ) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            return self.session.request(method.upper(), url, **kwargs)
+        except self._requestException as e:
+            raise HttpRequestError(f'Http request failed: {e}') from e
+
+    async def arequest(
+        self,
+        method: str,
+        url: str,
+        **kwargs
+    ) -> requests.Response:
+        """Send a request through the pooled session without blocking the event loop"""
+        if self.cache is not None and self.cache.cacheable_request(method, kwargs):
+            #Only the memory tier is checked on the loop; the disk tier is read by request on the worker thread
+            response = self.cache.get_fresh(url, kwargs, memoryOnly=True)
+            if response is not None:
+                return response
+        import asyncio
+        loop = asyncio.get_running_loop()
+        async with self._get_host_semaphore(url):
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self._get_executor(), partial(context.run, self.request, method, url, **kwargs)
+            )
+
+    def close(self) -> None:
+        """Close pooled connections and stop the worker pool"""
+        self.session.close()
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self._hostSemaphores.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="principalai-http")
+        return self._executor
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        import asyncio
+        loop = asyncio.get_running_loop()
+        host = urlsplit(url).netloc
+        semaphores = self._hostSemaphores.get(loop)
+        semaphore = semaphores.get(host) if semaphores is not None else None
+        if semaphore is None:
+            with self._lock:
+                if loop not in self._hostSemaphores:
+                    #Keyed on the loop itself rather than id(loop), which a new loop can reuse. A semaphore holds a
+                    #reference to its loop, so closed loops are dropped here instead of relying on garbage collection.
+                    for closedLoop in [existing for existing in self._hostSemaphores if existing.is_closed()]:
+                        del self._hostSemaphores[closedLoop]
+                semaphores = self._hostSemaphores.setdefault(loop, {})
+                semaphore = semaphores.setdefault(host, asyncio.Semaphore(self.maxConnectionsPerHost))
+        return semaphore
+
+_defaultTransport: Optional[HttpTransport] = None
+_defaultTransportLock = threading.Lock()
+
+def get_default_transport() -> HttpTransport:
+    """Return the process wide transport used by ApiTools that are not given one explicitly"""
+    global _defaultTransport
+    if _defaultTransport is None:
+        with _defaultTransportLock:
+            if _defaultTransport is None:
+                _defaultTransport = HttpTransport()
+    return _defaultTransport
+
+def set_default_transport(transport: HttpTransport) -> None:
+    """Replace the process wide transport, e.g. to change pool sizes or timeouts"""
+    global _defaultTransport
+    with _defaultTransportLock:
+        _defaultTransport = transport
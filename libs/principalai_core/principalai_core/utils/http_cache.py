@@ -0,0 +1,385 @@
+from __future__ import annotations
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional, TYPE_CHECKING
+import hashlib
+import json
+import threading
+import time
+
+from principalai_core.utils.cache import MemoryCacheTier, SqliteCacheTier, MISSING
+from principalai_core.instrumentation import instrumentation
+
+if TYPE_CHECKING:
+    import requests
+
+#Statuses that may be stored (RFC 9111 heuristically cacheable statuses)
+_CACHEABLE_STATUS = frozenset((200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501))
+_HEURISTIC_FRACTION = 0.1 #Of the time since Last-Modified, when there is no explicit freshness
+_MAX_HEURISTIC_LIFETIME = 86400.0
+#Request headers that identify the caller; responses are never shared between different values of these
+_IDENTITY_HEADERS = ("authorization", "cookie", "proxy-authorization")
+#Request arguments that do not change the response
+_NON_KEY_ARGUMENTS = ("headers", "timeout", "stream", "verify", "cert", "proxies", "allow_redirects")
+
+def parse_cache_control(value: Optional[str]) -> dict[str, Optional[str]]:
+    """Parse a Cache-Control header into lower cased directives and their arguments (None for flags)"""
+    directives: dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') if argument else None
+    return directives
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+def _seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+def _header(headers: Optional[Any], name: str) -> Optional[str]:
+    if not headers:
+        return None
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def freshness_lifetime(
+    headers: Any,
+    now: Optional[float] = None
+) -> Optional[float]:
+    """
+    Seconds a response with these headers stays fresh from now: Cache-Control max-age, else Expires, else a fraction of
+    the time since Last-Modified. None if the response has no freshness information at all.
+    """
+    now = now if now is not None else time.time()
+    cacheControl = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in cacheControl:
+        return 0.0
+    maxAge = _seconds(cacheControl.get("max-age")) if "max-age" in cacheControl else None
+    if maxAge is not None:
+        lifetime = maxAge
+    else:
+        date = _http_date(headers.get("Date")) or now
+        expires = headers.get("Expires")
+        lastModified = _http_date(headers.get("Last-Modified"))
+        if expires is not None:
+            #An invalid Expires (e.g. "0") means already expired
+            expiresAt = _http_date(expires)
+            lifetime = max(0.0, expiresAt - date) if expiresAt is not None else 0.0
+        elif lastModified is not None:
+            lifetime = min(max(0.0, date - lastModified) * _HEURISTIC_FRACTION, _MAX_HEURISTIC_LIFETIME)
+        else:
+            return None
+    return max(0.0, lifetime - (_seconds(headers.get("Age")) or 0.0))
+
+class _Flight():
+    """A request in flight that identical concurrent requests wait on"""
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Optional[requests.Response] = None
+        self.error: Optional[BaseException] = None
+
+class HttpCache():
+    """
+    Private HTTP cache for GET requests, following HTTP caching semantics.
+
+    Responses are stored when the server allows it (no Cache-Control no-store, no Vary: *) and served without a request
+    while fresh according to Cache-Control max-age or Expires. Stale responses with an ETag or Last-Modified validator
+    are revalidated with a conditional request, so an unchanged resource costs a 304 without a body. Identical requests
+    that arrive while one is in flight wait for it instead of hitting the endpoint again.
+
+    Lookups go to an in-process LRU tier first and then to an optional SQLite tier; disk hits are promoted into memory.
+    Both tiers are bounded by maxEntries, and bodies over maxEntryBytes are not stored. Responses are keyed on URL, query
+    and body arguments and the caller's credentials (Authorization and Cookie headers), so different users never share
+    an entry.
+    """
+    def __init__(
+        self,
+        maxEntries: int = 1024,
+        maxEntryBytes: int = 1_048_576,
+        diskPath: Optional[str] = None,
+        diskMaxEntries: int = 100_000
+    ):
+        self.memory: MemoryCacheTier = MemoryCacheTier(maxEntries)
+        self.disk: Optional[SqliteCacheTier] = SqliteCacheTier(diskPath, diskMaxEntries, table="http_responses") \
+            if diskPath is not None else None
+        self.maxEntryBytes: int = maxEntryBytes
+        self.memoryHits: int = 0
+        self.diskHits: int = 0
+        self.revalidations: int = 0 #Stale entries confirmed unchanged by a 304
+        self.misses: int = 0
+        self.collapsed: int = 0 #Requests that waited on an identical request in flight
+        self._inFlight: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        return self.memoryHits + self.diskHits
+
+    def stats(self) -> dict[str, int]:
+        """Hit/miss counters for the cache"""
+        return {
+            "hits": self.hits,
+            "memoryHits": self.memoryHits,
+            "diskHits": self.diskHits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+            "collapsed": self.collapsed,
+            "memoryEvictions": self.memory.evictions,
+            "diskEvictions": self.disk.evictions if self.disk is not None else 0
+        }
+
+    @staticmethod
+    def make_key(
+        url: str,
+        kwargs: dict[str, Any]
+    ) -> str:
+        """Build the cache key of a GET request from its URL, request arguments and credentials"""
+        arguments = {name: value for name, value in kwargs.items() if name not in _NON_KEY_ARGUMENTS}
+        identity = [_header(kwargs.get("headers"), name) for name in _IDENTITY_HEADERS]
+        payload = json.dumps([url, arguments, identity], sort_keys=True, default=repr, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def cacheable_request(
+        self,
+        method: str,
+        kwargs: dict[str, Any]
+    ) -> bool:
+        """Whether a request may be answered from or stored in the cache"""
+        if method.upper() != "GET" or kwargs.get("stream"):
+            return False
+        return "no-store" not in parse_cache_control(_header(kwargs.get("headers"), "Cache-Control"))
+
+    def get_fresh(
+        self,
+        url: str,
+        kwargs: dict[str, Any],
+        memoryOnly: bool = False
+    ) -> Optional[requests.Response]:
+        """
+        Return the cached response for a request if it is still fresh, without sending anything. memoryOnly skips the
+        disk tier, e.g. on an event loop where a blocking SQLite read is not acceptable.
+        """
+        if "no-cache" in parse_cache_control(_header(kwargs.get("headers"), "Cache-Control")):
+            return None
+        entry = self._lookup(self.make_key(url, kwargs), kwargs.get("headers"), countHit=True, memoryOnly=memoryOnly)
+        if entry is None or entry["expiresAt"] <= time.time():
+            return None
+        return _to_response(entry)
+
+    def request(
+        self,
+        send: Callable[..., requests.Response],
+        url: str,
+        **kwargs
+    ) -> requests.Response:
+        """
+        GET url through the cache. send(method, url, **kwargs) performs the actual request on a miss or to revalidate a
+        stale entry.
+        """
+        response = self.get_fresh(url, kwargs)
+        if response is not None:
+            return response
+        key = self.make_key(url, kwargs)
+        #Requests that only differ in other headers may get different responses (Vary), so they are not collapsed
+        flightKey = key + json.dumps(sorted((kwargs.get("headers") or {}).items()), default=repr)
+        with self._lock:
+            flight = self._inFlight.get(flightKey)
+            leader = flight is None
+            if leader:
+                flight = self._inFlight[flightKey] = _Flight()
+            else:
+                self.collapsed += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _copy_response(flight.response)
+        try:
+            flight.response = self._fetch(send, key, url, kwargs)
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inFlight[flightKey]
+            flight.done.set()
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def _fetch(
+        self,
+        send: Callable[..., requests.Response],
+        key: str,
+        url: str,
+        kwargs: dict[str, Any]
+    ) -> requests.Response:
+        entry = self._lookup(key, kwargs.get("headers"))
+        if entry is not None and (entry["etag"] is not None or entry["lastModified"] is not None):
+            headers = dict(kwargs.get("headers") or {})
+            if entry["etag"] is not None:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["lastModified"] is not None:
+                headers["If-Modified-Since"] = entry["lastModified"]
+            response = send("GET", url, **{**kwargs, "headers": headers})
+            if response.status_code == 304:
+                with self._lock:
+                    self.revalidations += 1
+                instrumentation.event("cache.revalidated", {"cache": "http"})
+                entry = self._refresh(key, entry, response.headers)
+                return _to_response(entry)
+        else:
+            response = send("GET", url, **kwargs)
+        with self._lock:
+            self.misses += 1
+        instrumentation.event("cache.miss", {"cache": "http"})
+        self._store(key, response, kwargs.get("headers"))
+        return response
+
+    def _lookup(
+        self,
+        key: str,
+        requestHeaders: Optional[Any],
+        countHit: bool = False,
+        memoryOnly: bool = False
+    ) -> Optional[dict[str, Any]]:
+        tier = "memory"
+        entry = self.memory.get(key, MISSING)
+        if entry is MISSING and self.disk is not None and not memoryOnly:
+            tier = "disk"
+            entry = self.disk.get(key, MISSING)
+            if entry is not MISSING:
+                self.memory.set(key, entry, self._tier_ttl(entry))
+        if entry is MISSING:
+            return None
+        for name, value in entry["vary"].items():
+            if _header(requestHeaders, name) != value:
+                return None
+        if countHit and entry["expiresAt"] > time.time():
+            with self._lock:
+                if tier == "memory":
+                    self.memoryHits += 1
+                else:
+                    self.diskHits += 1
+            instrumentation.event("cache.hit", {"cache": "http", "tier": tier})
+        return entry
+
+    def _store(
+        self,
+        key: str,
+        response: requests.Response,
+        requestHeaders: Optional[Any]
+    ) -> None:
+        headers = response.headers
+        if response.status_code not in _CACHEABLE_STATUS:
+            return
+        if "no-store" in parse_cache_control(headers.get("Cache-Control")):
+            return
+        vary = [name.strip().lower() for name in headers.get("Vary", "").split(",") if name.strip()]
+        if "*" in vary:
+            return
+        lifetime = freshness_lifetime(headers)
+        etag = headers.get("ETag")
+        lastModified = headers.get("Last-Modified")
+        if lifetime is None and etag is None:
+            #Nothing to serve it by and nothing to revalidate it with
+            return
+        if len(response.content) > self.maxEntryBytes:
+            return
+        entry = {
+            "url": response.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(headers),
+            "content": response.content,
+            "encoding": response.encoding,
+            "expiresAt": time.time() + (lifetime or 0.0),
+            "etag": etag,
+            "lastModified": lastModified,
+            "vary": {name: _header(requestHeaders, name) for name in vary}
+        }
+        self._set(key, entry)
+
+    def _refresh(
+        self,
+        key: str,
+        entry: dict[str, Any],
+        notModifiedHeaders: Any
+    ) -> dict[str, Any]:
+        """Update a stored entry with the headers of a 304 response and restart its freshness"""
+        headers = {**entry["headers"], **{name: value for name, value in notModifiedHeaders.items()
+                                          if name.lower() not in ("content-length", "content-encoding")}}
+        from requests.structures import CaseInsensitiveDict
+        lifetime = freshness_lifetime(CaseInsensitiveDict(headers))
+        entry = {
+            **entry,
+            "headers": headers,
+            "expiresAt": time.time() + (lifetime or 0.0),
+            "etag": notModifiedHeaders.get("ETag") or entry["etag"],
+            "lastModified": notModifiedHeaders.get("Last-Modified") or entry["lastModified"]
+        }
+        self._set(key, entry)
+        return entry
+
+    def _set(
+        self,
+        key: str,
+        entry: dict[str, Any]
+    ) -> None:
+        ttl = self._tier_ttl(entry)
+        self.memory.set(key, entry, ttl)
+        if self.disk is not None:
+            self.disk.set(key, entry, ttl)
+
+    def _tier_ttl(
+        self,
+        entry: dict[str, Any]
+    ) -> Optional[float]:
+        #Entries with a validator are kept after going stale so they can be revalidated; the rest expire with freshness
+        if entry["etag"] is not None or entry["lastModified"] is not None:
+            return None
+        return max(0.001, entry["expiresAt"] - time.time())
+
+def _to_response(entry: dict[str, Any]) -> requests.Response:
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.reason = entry["reason"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["content"]
+    response.encoding = entry["encoding"]
+    response.url = entry["url"]
+    return response
+
+def _copy_response(response: requests.Response) -> requests.Response:
+    """Copy of a response for another caller, so callers never share a response object"""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    copy = requests.Response()
+    copy.status_code = response.status_code
+    copy.reason = response.reason
+    copy.headers = CaseInsensitiveDict(response.headers)
+    copy._content = response.content
+    copy.encoding = response.encoding
+    copy.url = response.url
+    copy.request = response.request
+    return copy
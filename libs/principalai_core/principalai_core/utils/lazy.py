@@ -0,0 +1,26 @@
+from typing import Callable
+import importlib
+import sys
+
+def lazy_exports(
+    packageName: str,
+    exports: dict[str, str]
+) -> tuple[Callable[[str], object], Callable[[], list[str]]]:
+    """
+    Build a module level __getattr__ and __dir__ that import a package's submodules on first attribute access.
+
+    exports maps each public name to the (relative) submodule defining it. The imported value is stored on the package so
+    later lookups are plain attribute access.
+    """
+    def __getattr__(name: str):
+        submodule = exports.get(name)
+        if submodule is None:
+            raise AttributeError(f'module {packageName!r} has no attribute {name!r}')
+        value = getattr(importlib.import_module(submodule, packageName), name)
+        setattr(sys.modules[packageName], name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(sys.modules[packageName])) | set(exports))
+
+    return __getattr__, __dir__
@@ -1 +1,24 @@
-from .core import *
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from principalai_core.utils.lazy import lazy_exports
+from .core import *
+from .schema import (
+    CompiledSchema,
+    SchemaRegistry,
+    schemaRegistry,
+    get_compiled_schema
+)
+
+if TYPE_CHECKING:
+    from .streaming import (
+        IncrementalSchemaParser,
+        StructuredStream,
+        AsyncStructuredStream
+    )
+
+#Streaming parsers are only needed for structured streaming, so they are imported on first access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "IncrementalSchemaParser": ".streaming",
+    "StructuredStream": ".streaming",
+    "AsyncStructuredStream": ".streaming"
+})
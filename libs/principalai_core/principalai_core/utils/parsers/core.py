@@ -1,7 +1,12 @@
-from pydantic import BaseModel
-from typing import Type
+from __future__ import annotations
+from typing import Type, TYPE_CHECKING
 
 from principalai_core.data.core import Entity
+from principalai_core.utils.errors import IncorrectDefinitonError
+from principalai_core.utils.parsers.schema import get_compiled_schema
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
 
 def entity_parameter_parser(entityParameters:Type[BaseModel]) -> list[Entity]:
     """Parse entities when they are passed in as parameters through a Pydantic schema"""
@@ -11,7 +16,7 @@ def entity_parameter_parser(entityParameters:Type[BaseModel]) -> list[Entity]:
             raise ValueError(f'''Description is an empty string. Please enter a valid description; Invalid or incorrect 
                              descriptions will impact performance negatively.''')
         parsedParameters.append(
-            Entity(name_=parameterName, description_=parameterInfo.description, entitytype_=parameterInfo.annotation)
+            Entity(name=parameterName, description=parameterInfo.description, entitytype=parameterInfo.annotation)
         )
     return parsedParameters
 
@@ -21,6 +26,10 @@ def defaultApiToolInputParser(
     **kwargs
 ):
     """Default parser for HTTP Requests. Since the default type is GET, the data gets places in params"""
+    if args:
+        raise IncorrectDefinitonError(f'''The default API tool input parser only accepts keyword arguments, got {len(args)}
+                                      positional arguments. Please pass the input parameters by name.''')
+    schema = get_compiled_schema(inputParameterSchemaBaseModel)
     return {
-        "params": (inputParameterSchemaBaseModel(*args, **kwargs)).model_dump()
+        "params": schema.dump_python(schema.validate_python(kwargs))
     }
\ No newline at end of file
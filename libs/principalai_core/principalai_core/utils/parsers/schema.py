@@ -0,0 +1,106 @@
+from __future__ import annotations
+from typing import Any, Type, Union, TYPE_CHECKING
+import threading
+
+from principalai_core.data.core import Entity
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel, TypeAdapter
+
+class CompiledSchema():
+    """
+    A pydantic schema prepared once for repeated use on the hot path.
+
+    Holds the parsed Entity list together with the schema's compiled validator and serializer, so that per call validation
+    does not rebuild anything. validate_json validates raw response bytes directly without an intermediate dict.
+
+    The entities list is shared by every Invocable using the schema and should be treated as read only.
+    """
+    def __init__(
+        self,
+        model: Type[BaseModel]
+    ):
+        #Imported here since the parsers module itself uses the schema registry
+        from principalai_core.utils.parsers.core import entity_parameter_parser
+        self.model: Type[BaseModel] = model
+        self.entities: list[Entity] = entity_parameter_parser(model)
+        self.validator = model.__pydantic_validator__
+        self.serializer = model.__pydantic_serializer__
+        self._fieldAdapters: dict[str, TypeAdapter] = {}
+
+    def validate_python(
+        self,
+        data: Any
+    ) -> BaseModel:
+        """Validate a python object (usually a dict) into a model instance"""
+        return self.validator.validate_python(data)
+
+    def validate_json(
+        self,
+        data: Union[str, bytes, bytearray]
+    ) -> BaseModel:
+        """Validate raw JSON straight into a model instance"""
+        return self.validator.validate_json(data)
+
+    def dump_python(
+        self,
+        instance: BaseModel
+    ) -> dict:
+        return self.serializer.to_python(instance)
+
+    def dump_json(
+        self,
+        instance: BaseModel
+    ) -> bytes:
+        return self.serializer.to_json(instance)
+
+    def field_adapter(
+        self,
+        fieldName: str
+    ) -> TypeAdapter:
+        """
+        TypeAdapter for a single field (its type together with its Field constraints), built on first use. Validators of
+        the model (@field_validator, @model_validator) are not part of it; they only run when the whole model is validated.
+        """
+        adapter = self._fieldAdapters.get(fieldName)
+        if adapter is None:
+            from typing import Annotated
+            from pydantic import TypeAdapter
+            field = self.model.model_fields[fieldName]
+            #Only the constraints; the FieldInfo itself would carry alias and default, which do not apply to a bare value
+            annotation = Annotated[field.annotation, *field.metadata] if field.metadata else field.annotation
+            adapter = TypeAdapter(annotation)
+            self._fieldAdapters[fieldName] = adapter
+        return adapter
+
+class SchemaRegistry():
+    """Caches one CompiledSchema per pydantic schema class"""
+    def __init__(self):
+        self._schemas: dict[Type[BaseModel], CompiledSchema] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        model: Type[BaseModel]
+    ) -> CompiledSchema:
+        schema = self._schemas.get(model)
+        if schema is None:
+            with self._lock:
+                schema = self._schemas.get(model)
+                if schema is None:
+                    schema = CompiledSchema(model)
+                    self._schemas[model] = schema
+        return schema
+
+    def __contains__(self, model: Type[BaseModel]) -> bool:
+        return model in self._schemas
+
+    def clear(self) -> None:
+        with self._lock:
+            self._schemas.clear()
+
+schemaRegistry = SchemaRegistry()
+
+def get_compiled_schema(model: Type[BaseModel]) -> CompiledSchema:
+    """Return the cached CompiledSchema for a pydantic schema class from the default registry"""
+    return schemaRegistry.get(model)
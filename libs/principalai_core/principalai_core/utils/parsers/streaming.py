@@ -0,0 +1,341 @@
+from __future__ import annotations
+from typing import Any, Optional, Type, TYPE_CHECKING
+import json
+
+from principalai_core.utils.errors import SchemaMismatchError
+from principalai_core.utils.parsers.schema import CompiledSchema, get_compiled_schema
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+    from principalai_core.language_models.streaming import StreamingResponse, AsyncStreamingResponse
+
+#Top level object states
+_KEY, _IN_KEY, _COLON, _VALUE, _IN_STRING, _IN_PRIMITIVE, _IN_NESTED, _COMMA = range(8)
+_WHITESPACE = " \t\r\n"
+_PRIMITIVE_START = "-0123456789tfn"
+
+class IncrementalSchemaParser():
+    """
+    Incremental parser for a JSON object streamed in arbitrary chunks, validated field by field against a pydantic schema.
+
+    feed() scans each chunk once and returns the top level fields that completed in it, already validated against their
+    type and Field constraints. A field is complete as soon as its value is closed (a string's closing quote, a nested
+    object's closing brace, a number followed by a comma), so early fields are available long before the response ends.
+
+    SchemaMismatchError is raised as soon as the output can no longer match: malformed JSON at the top level, a field that
+    fails validation, a duplicate key, an unknown key on a schema that forbids extra fields, or no object starting within
+    maxPreamble characters (a short preamble such as a ```json fence is skipped). finish() validates the whole output
+    with the schema's compiled validator, which also checks required fields and runs the model's own validators
+    (@field_validator and @model_validator); those are not run on the fields returned by feed().
+    """
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        maxPreamble: int = 32
+    ):
+        self.schema: CompiledSchema = get_compiled_schema(model)
+        self.maxPreamble: int = maxPreamble
+        self.fields: dict[str, Any] = {} #Validated fields so far, by field name
+        self.done: bool = False
+        self._fieldNames: dict[str, str] = {}
+        for name, field in model.model_fields.items():
+            self._fieldNames[name] = name
+            if field.alias is not None:
+                self._fieldNames[field.alias] = name
+            if isinstance(field.validation_alias, str):
+                self._fieldNames[field.validation_alias] = name
+        self._forbidExtra: bool = model.model_config.get("extra") == "forbid"
+        self._chunks: list[str] = []
+        self._offset: int = 0 #Characters fed before the current chunk
+        self._span: list[int] = [0, 0] #Start and end of the JSON object in text
+        self._preamble: int = 0
+        self._started: bool = False
+        self._state: int = _KEY
+        self._depth: int = 0
+        self._inString: bool = False
+        self._escape: bool = False
+        self._afterComma: bool = False
+        self._key: Optional[str] = None
+        self._seenKeys: set[str] = set()
+        self._parts: list[str] = []
+        self._captureStart: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return "".join(self._chunks)
+
+    def partial(self) -> BaseModel:
+        """
+        Model instance holding only the fields validated so far (see model_fields_set). Built without validating the whole
+        model, so required fields that have not arrived yet are simply not set.
+        """
+        return self.schema.model.model_construct(**self.fields)
+
+    def feed(
+        self,
+        chunk: str
+    ) -> dict[str, Any]:
+        """Parse the next chunk and return the fields it completed, by field name"""
+        self._chunks.append(chunk)
+        completed: dict[str, Any] = {}
+        index = 0
+        length = len(chunk)
+        while index < length:
+            if self.done:
+                break
+            character = chunk[index]
+            if not self._started:
+                if character == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._span[0] = self._offset + index
+                else:
+                    self._preamble += 1
+                    if self._preamble > self.maxPreamble:
+                        raise SchemaMismatchError('Output does not start with a JSON object.')
+                index += 1
+                continue
+
+            if self._inString:
+                if not self._escape and character != '"' and character != "\\":
+                    #Skip ahead to the next quote or backslash; string contents need no per character work
+                    quote = chunk.find('"', index)
+                    backslash = chunk.find("\\", index)
+                    nextSpecial = min(position for position in (quote, backslash, length) if position != -1)
+                    index = nextSpecial
+                    continue
+                if self._escape:
+                    self._escape = False
+                elif character == "\\":
+                    self._escape = True
+                elif character == '"':
+                    self._inString = False
+                    if self._state == _IN_KEY:
+                        self._end_key(chunk, index)
+                    elif self._state == _IN_STRING:
+                        self._complete_field(self._end_capture(chunk, index + 1), completed)
+                index += 1
+                continue
+
+            state = self._state
+            if state == _IN_NESTED:
+                if character == '"':
+                    self._inString = True
+                elif character in "{[":
+                    self._depth += 1
+                elif character in "}]":
+                    self._depth -= 1
+                    if self._depth == 1:
+                        self._complete_field(self._end_capture(chunk, index + 1), completed)
+            elif state == _IN_PRIMITIVE:
+                if character in _WHITESPACE or character in ",}":
+                    self._complete_field(self._end_capture(chunk, index), completed)
+                    continue #The terminating character is handled in the comma state
+            elif character in _WHITESPACE:
+                pass
+            elif state == _KEY:
+                if character == '"':
+                    self._inString = True
+                    self._state = _IN_KEY
+                    self._captureStart = index + 1
+                elif character == "}" and not self._afterComma:
+                    self._close_object(index)
+                else:
+                    raise SchemaMismatchError(f'Expected a field name in the output but got {character!r}.')
+            elif state == _COLON:
+                if character != ":":
+                    raise SchemaMismatchError(f'Expected ":" after field {self._key!r} but got {character!r}.')
+                self._state = _VALUE
+            elif state == _VALUE:
+                self._captureStart = index
+                if character == '"':
+                    self._inString = True
+                    self._state = _IN_STRING
+                elif character in "{[":
+                    self._depth += 1
+                    self._state = _IN_NESTED
+                elif character in _PRIMITIVE_START:
+                    self._state = _IN_PRIMITIVE
+                else:
+                    self._captureStart = None
+                    raise SchemaMismatchError(f'Field {self._key!r} does not start with a JSON value: {character!r}.')
+            elif state == _COMMA:
+                if character == ",":
+                    self._state = _KEY
+                    self._afterComma = True
+                elif character == "}":
+                    self._close_object(index)
+                else:
+                    raise SchemaMismatchError(f'Expected "," or "}}" after field {self._key!r} but got {character!r}.')
+            index += 1
+
+        if self._captureStart is not None:
+            self._parts.append(chunk[self._captureStart:])
+            self._captureStart = 0
+        self._offset += length
+        return completed
+
+    def finish(self) -> BaseModel:
+        """Validate the complete output against the schema"""
+        if not self.done:
+            raise SchemaMismatchError('Output ended before the JSON object was closed.')
+        try:
+            return self.schema.validate_json(self.text[self._span[0]:self._span[1]])
+        except ValueError as e: #pydantic's ValidationError is a ValueError
+            raise SchemaMismatchError(f'Output does not match the output parameter schema: {e}') from e
+
+    def _close_object(
+        self,
+        index: int
+    ) -> None:
+        self.done = True
+        self._span[1] = self._offset + index + 1
+
+    def _end_capture(
+        self,
+        chunk: str,
+        end: int
+    ) -> str:
+        self._parts.append(chunk[self._captureStart:end])
+        raw = "".join(self._parts)
+        self._parts.clear()
+        self._captureStart = None
+        return raw
+
+    def _end_key(
+        self,
+        chunk: str,
+        index: int
+    ) -> None:
+        key = json.loads(f'"{self._end_capture(chunk, index)}"')
+        if key in self._seenKeys:
+            raise SchemaMismatchError(f'Field {key!r} appears twice in the output.')
+        if self._forbidExtra and key not in self._fieldNames:
+            raise SchemaMismatchError(f'Field {key!r} is not part of the output parameter schema.')
+        self._seenKeys.add(key)
+        self._key = key
+        self._afterComma = False
+        self._state = _COLON
+
+    def _complete_field(
+        self,
+        raw: str,
+        completed: dict[str, Any]
+    ) -> None:
+        self._state = _COMMA
+        try:
+            value = json.loads(raw)
+        except ValueError as e:
+            raise SchemaMismatchError(f'Field {self._key!r} is not valid JSON: {raw[:80]!r}') from e
+        fieldName = self._fieldNames.get(self._key)
+        if fieldName is None: #Extra fields are ignored by the schema
+            return
+        try:
+            validated = self.schema.field_adapter(fieldName).validate_python(value)
+        except ValueError as e:
+            raise SchemaMismatchError(f'Field {self._key!r} does not match the output parameter schema: {e}') from e
+        self.fields[fieldName] = validated
+        completed[fieldName] = validated
+
+class StructuredStream():
+    """
+    Iterator over partial model instances of a streamed structured response.
+
+    Each item is a model instance holding the fields completed so far, yielded whenever new fields complete. If the
+    output stops matching the schema the underlying stream is closed right away, so no more tokens are generated, and
+    SchemaMismatchError is raised. get_final returns the fully validated model.
+    """
+    def __init__(
+        self,
+        stream: StreamingResponse,
+        parser: IncrementalSchemaParser
+    ):
+        self.stream = stream
+        self.parser = parser
+        self.result: Optional[BaseModel] = None
+
+    @property
+    def fields(self) -> dict[str, Any]:
+        """Validated fields so far"""
+        return self.parser.fields
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> BaseModel:
+        if self.result is not None:
+            raise StopIteration
+        for delta in self.stream:
+            try:
+                completed = self.parser.feed(delta)
+            except SchemaMismatchError:
+                self.stream.close()
+                raise
+            if completed:
+                return self.parser.partial()
+        self.result = self.parser.finish()
+        raise StopIteration
+
+    def get_final(self) -> BaseModel:
+        """Consume the rest of the stream and return the validated model"""
+        for _ in self:
+            pass
+        return self.result
+
+    def close(self) -> None:
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class AsyncStructuredStream():
+    """Async counterpart of StructuredStream"""
+    def __init__(
+        self,
+        stream: AsyncStreamingResponse,
+        parser: IncrementalSchemaParser
+    ):
+        self.stream = stream
+        self.parser = parser
+        self.result: Optional[BaseModel] = None
+
+    @property
+    def fields(self) -> dict[str, Any]:
+        """Validated fields so far"""
+        return self.parser.fields
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> BaseModel:
+        if self.result is not None:
+            raise StopAsyncIteration
+        async for delta in self.stream:
+            try:
+                completed = self.parser.feed(delta)
+            except SchemaMismatchError:
+                await self.stream.aclose()
+                raise
+            if completed:
+                return self.parser.partial()
+        self.result = self.parser.finish()
+        raise StopAsyncIteration
+
+    async def get_final(self) -> BaseModel:
+        """Consume the rest of the stream and return the validated model"""
+        async for _ in self:
+            pass
+        return self.result
+
+    async def aclose(self) -> None:
+        await self.stream.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
@@ -0,0 +1,420 @@
+from __future__ import annotations
+from typing import Any, Callable, Iterable, Optional, TYPE_CHECKING
+import importlib
+import queue
+import threading
+
+from principalai_core.utils.errors import IncorrectDefinitonError, InvocationTimeoutError, ProcessWorkerError
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+    from multiprocessing.shared_memory import SharedMemory
+
+def function_reference(func: Callable) -> tuple[str, str]:
+    """
+    Importable (module, qualname) reference of a function, which is all that is sent to a worker process.
+
+    Functions decorated with @FunctionTool resolve to the tool object in their module; workers unwrap it to its func.
+    """
+    module = getattr(func, "__module__", None)
+    qualname = getattr(func, "__qualname__", None)
+    if module is None or qualname is None or "<locals>" in qualname or "<lambda>" in qualname:
+        raise IncorrectDefinitonError(f'''{func!r} cannot run in a process pool. Only functions defined at module level
+                                      (importable by name) can be sent to worker processes.''')
+    return module, qualname
+
+def resolve_function(reference: tuple[str, str]) -> Callable:
+    module, qualname = reference
+    target: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    #@FunctionTool and @FunctionInvocable replace the module attribute with the Invocable holding the function
+    innerFunc = getattr(target, "func", None)
+    if innerFunc is not None and callable(innerFunc) and not isinstance(target, type):
+        target = innerFunc
+    return target
+
+class _SharedBuffer():
+    """Descriptor of a bytes-like or numpy array value placed in shared memory instead of being pickled"""
+    __slots__ = ("name", "size", "kind", "dtype", "shape")
+
+    def __init__(self, name: str, size: int, kind: str, dtype: Optional[str] = None, shape: Optional[tuple] = None):
+        self.name = name
+        self.size = size
+        self.kind = kind
+        self.dtype = dtype
+        self.shape = shape
+
+    def __getstate__(self):
+        return (self.name, self.size, self.kind, self.dtype, self.shape)
+
+    def __setstate__(self, state):
+        self.name, self.size, self.kind, self.dtype, self.shape = state
+
+def _is_ndarray(value: Any) -> bool:
+    #Checked by type name so numpy is only imported where arrays are actually used
+    valueType = type(value)
+    return valueType.__name__ == "ndarray" and valueType.__module__ == "numpy"
+
+def _share(
+    value: Any,
+    threshold: int,
+    handles: list[SharedMemory],
+    name: Optional[str] = None
+) -> Any:
+    """
+    Move value into shared memory if it is a large bytes-like object or array, otherwise return it unchanged. name is the
+    name of the block to create, random if not given.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+    if isinstance(value, (bytes, bytearray)) and len(value) >= threshold:
+        shm = SharedMemory(name=name, create=True, size=max(1, len(value)))
+        handles.append(shm)
+        shm.buf[:len(value)] = value
+        return _SharedBuffer(shm.name, len(value), "bytearray" if isinstance(value, bytearray) else "bytes")
+    if _is_ndarray(value) and value.nbytes >= threshold and not value.dtype.hasobject:
+        import numpy
+        shm = SharedMemory(name=name, create=True, size=max(1, value.nbytes))
+        handles.append(shm)
+        target = numpy.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)
+        target[...] = value
+        del target
+        return _SharedBuffer(shm.name, value.nbytes, "ndarray", value.dtype.str, value.shape)
+    return value
+
+def _unshare(
+    value: Any,
+    handles: list[SharedMemory],
+    copy: bool
+) -> Any:
+    """
+    Turn a _SharedBuffer back into its value. Arrays are zero-copy views unless copy is set (views keep their shared memory
+    block mapped, so the block must stay open while they are in use); bytes are always copied out.
+    """
+    if not isinstance(value, _SharedBuffer):
+        return value
+    from multiprocessing.shared_memory import SharedMemory
+    shm = SharedMemory(name=value.name)
+    handles.append(shm)
+    if value.kind == "ndarray":
+        import numpy
+        array = numpy.ndarray(value.shape, dtype=numpy.dtype(value.dtype), buffer=shm.buf)
+        return array.copy() if copy else array
+    data = shm.buf[:value.size]
+    try:
+        return bytearray(data) if value.kind == "bytearray" else bytes(data)
+    finally:
+        data.release()
+
+def _unlink_blocks(names: Iterable[str]) -> None:
+    """Unlink shared memory blocks by name, e.g. result blocks of a call whose result was never received"""
+    from multiprocessing.shared_memory import SharedMemory
+    for name in names:
+        try:
+            shm = SharedMemory(name=name)
+        except FileNotFoundError: #Never created, or already unlinked
+            continue
+        shm.close()
+        shm.unlink()
+
+def _close(handles: list[SharedMemory], unlink: bool) -> None:
+    for shm in handles:
+        try:
+            shm.close()
+        except BufferError: #A view is still referenced (e.g. kept by the function); the mapping goes away with it
+            pass
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+    handles.clear()
+
+def _worker_main(
+    connection: Connection,
+    preload: tuple[str, ...],
+    sharedMemoryThreshold: int
+) -> None:
+    """Worker process loop: receive (function reference, args, kwargs, result block name), send back (ok, result or error)"""
+    for module in preload:
+        importlib.import_module(module)
+    connection.send(True) #Ready
+    functions: dict[tuple[str, str], Callable] = {}
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            return
+        if message is None:
+            return
+        reference, args, kwargs, resultName = message
+        argumentHandles: list = []
+        resultHandles: list = []
+        try:
+            func = functions.get(reference)
+            if func is None:
+                func = functions[reference] = resolve_function(reference)
+            args = [_unshare(value, argumentHandles, copy=False) for value in args]
+            kwargs = {key: _unshare(value, argumentHandles, copy=False) for key, value in kwargs.items()}
+            result = func(*args, **kwargs)
+            del args, kwargs
+            reply = (True, _share(result, sharedMemoryThreshold, resultHandles, resultName))
+        except BaseException as e:
+            reply = (False, e)
+        finally:
+            _close(argumentHandles, unlink=False)
+        try:
+            connection.send(reply)
+        except Exception as e: #The result or error could not be pickled
+            #The caller never learns about the result blocks, so they are unlinked here
+            _close(resultHandles, unlink=True)
+            connection.send((False, ProcessWorkerError(f'Could not send the result back from the worker: {e!r}')))
+        #The caller owns result blocks from here on and unlinks them once copied out
+        _close(resultHandles, unlink=False)
+
+class _Worker():
+    __slots__ = ("process", "connection", "calls", "resultBlocks")
+
+    def __init__(self, process: BaseProcess, connection: Connection):
+        self.process = process
+        self.connection = connection
+        self.calls: int = 0
+        #Names of result blocks the worker may have created for a call whose reply was not received yet
+        self.resultBlocks: list[str] = []
+
+class ProcessPool():
+    """
+    Managed pool of warm worker processes for CPU-bound tool functions.
+
+    Work runs outside the caller's interpreter, so it neither blocks an event loop nor competes for the GIL. Workers are
+    started once (with the modules in preload imported) and reused across calls; warm() starts them ahead of the first
+    call. Functions are sent by reference and resolved once per worker, so they must be importable module level
+    functions (or @FunctionTool decorated ones).
+
+    Top level bytes, bytearray and numpy array arguments and results of at least sharedMemoryThreshold bytes are passed
+    through shared memory rather than pickled through the pipe. Arrays reach the function as zero-copy views; results are
+    copied out once on the caller's side.
+
+    Workers are started with the spawn method by default, so scripts using a pool need the usual
+    `if __name__ == "__main__":` guard.
+
+    Every call may have a timeout. A worker that exceeds it is terminated and replaced, so a stuck call cannot hold a
+    worker forever. Workers can also be recycled after maxCallsPerWorker calls to bound memory growth.
+    """
+    def __init__(
+        self,
+        maxWorkers: Optional[int] = None,
+        preload: Iterable[str] = (),
+        sharedMemoryThreshold: int = 1 << 20,
+        startMethod: str = "spawn",
+        maxCallsPerWorker: Optional[int] = None
+    ):
+        import os
+        self.maxWorkers: int = maxWorkers if maxWorkers is not None else (os.cpu_count() or 1)
+        self.preload: tuple[str, ...] = tuple(preload)
+        self.sharedMemoryThreshold: int = sharedMemoryThreshold
+        self.startMethod: str = startMethod
+        self.maxCallsPerWorker: Optional[int] = maxCallsPerWorker
+        self.restarts: int = 0
+        self._idle: queue.LifoQueue[_Worker] = queue.LifoQueue() #Most recently used first, its caches are warmest
+        self._slots = threading.BoundedSemaphore(self.maxWorkers)
+        self._workers: set[_Worker] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed: bool = False
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ProcessPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """Start workers ahead of time (all of them by default) so first calls do not pay process start up"""
+        count = min(self.maxWorkers, count if count is not None else self.maxWorkers)
+        with self._lock:
+            missing = count - len(self._workers)
+        #Start all workers first and then wait for them, so they boot in parallel
+        workers = [self._spawn(wait=False) for _ in range(max(0, missing))]
+        for worker in workers:
+            self._wait_ready(worker)
+            self._idle.put(worker)
+
+    def call(
+        self,
+        func: Callable,
+        args: Iterable[Any] = (),
+        kwargs: Optional[dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Run func(*args, **kwargs) on a worker and return its result, re-raising its exception if it failed"""
+        reference = function_reference(func)
+        kwargs = kwargs if kwargs is not None else {}
+        self._slots.acquire()
+        worker: Optional[_Worker] = None
+        handles: list = []
+        try:
+            worker = self._acquire_worker()
+            import secrets
+            #The result block is named here, so it can still be unlinked if the worker is discarded before replying
+            resultName = f"pai_{secrets.token_hex(8)}"
+            message = (
+                reference,
+                [_share(value, self.sharedMemoryThreshold, handles) for value in args],
+                {key: _share(value, self.sharedMemoryThreshold, handles) for key, value in kwargs.items()},
+                resultName
+            )
+            worker.resultBlocks.append(resultName)
+            try:
+                worker.connection.send(message)
+                if not worker.connection.poll(timeout):
+                    self._discard(worker)
+                    worker = None
+                    raise InvocationTimeoutError(f'{reference[1]} did not finish within {timeout} seconds in a worker process.')
+                ok, payload = worker.connection.recv()
+                #Any result block is now referenced by payload and unlinked below
+                worker.resultBlocks.clear()
+            except (EOFError, OSError, BrokenPipeError) as e:
+                self._discard(worker)
+                worker = None
+                raise ProcessWorkerError(f'Worker process running {reference[1]} died: {e!r}') from e
+        finally:
+            _close(handles, unlink=True)
+            if worker is not None:
+                self._return_worker(worker)
+            self._slots.release()
+        if not ok:
+            raise payload
+        resultHandles: list = []
+        try:
+            return _unshare(payload, resultHandles, copy=True)
+        finally:
+            _close(resultHandles, unlink=True)
+
+    async def acall(
+        self,
+        func: Callable,
+        args: Iterable[Any] = (),
+        kwargs: Optional[dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Async version of call. The event loop is not blocked while the worker runs."""
+        import asyncio
+        from functools import partial
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), partial(self.call, func, args, kwargs, timeout)
+        )
+
+    def shutdown(self) -> None:
+        """Stop all workers. Calls in flight fail with ProcessWorkerError."""
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+            executor, self._executor = self._executor, None
+        for worker in workers:
+            try:
+                worker.connection.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+        for worker in workers:
+            worker.process.join(timeout=1.0)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.connection.close()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _spawn(self, wait: bool = True) -> _Worker:
+        import multiprocessing
+        context = multiprocessing.get_context(self.startMethod)
+        parentConnection, childConnection = context.Pipe(duplex=True)
+        process = context.Process(
+            target=_worker_main,
+            args=(childConnection, self.preload, self.sharedMemoryThreshold),
+            name="principalai-tool-worker",
+            daemon=True
+        )
+        process.start()
+        childConnection.close()
+        worker = _Worker(process, parentConnection)
+        with self._lock:
+            if self._closed:
+                raise ProcessWorkerError('Process pool has been shut down.')
+            self._workers.add(worker)
+        if wait:
+            self._wait_ready(worker)
+        return worker
+
+    def _wait_ready(self, worker: _Worker) -> None:
+        try:
+            worker.connection.recv()
+        except (EOFError, OSError) as e:
+            self._discard(worker)
+            raise ProcessWorkerError(f'Worker process failed to start: {e!r}') from e
+
+    def _acquire_worker(self) -> _Worker:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return self._spawn()
+            if worker.process.is_alive():
+                return worker
+            self._discard(worker)
+
+    def _return_worker(self, worker: _Worker) -> None:
+        worker.calls += 1
+        if self._closed or (self.maxCallsPerWorker is not None and worker.calls >= self.maxCallsPerWorker):
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+
+    def _retire(self, worker: _Worker) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+        try:
+            worker.connection.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        worker.connection.close()
+
+    def _discard(self, worker: _Worker) -> None:
+        """Terminate a stuck or dead worker; a replacement is started on demand"""
+        with self._lock:
+            self._workers.discard(worker)
+            self.restarts += 1
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join(timeout=1.0)
+        worker.connection.close()
+        _unlink_blocks(worker.resultBlocks)
+        worker.resultBlocks.clear()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="principalai-process")
+        return self._executor
+
+_defaultPool: Optional[ProcessPool] = None
+_defaultPoolLock = threading.Lock()
+
+def get_default_process_pool() -> ProcessPool:
+    """Return the process wide pool used by process mode FunctionTools that are not given one explicitly"""
+    global _defaultPool
+    if _defaultPool is None:
+        with _defaultPoolLock:
+            if _defaultPool is None:
+                _defaultPool = ProcessPool()
+    return _defaultPool
+
+def set_default_process_pool(pool: ProcessPool) -> None:
+    """Replace the process wide pool, e.g. to change its size or preload modules"""
+    global _defaultPool
+    with _defaultPoolLock:
+        _defaultPool = pool
@@ -0,0 +1,318 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Callable, Optional, TYPE_CHECKING
+import contextvars
+import random
+import threading
+import time
+
+from principalai_core.utils.errors import HttpRequestError, InvocationTimeoutError
+from principalai_core.utils.http import retry_after_seconds
+from principalai_core.instrumentation import instrumentation
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+#Provider SDK errors (by class name) that are safe to retry
+_RETRYABLE_ERROR_NAMES = frozenset(("APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError"))
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Default retry predicate: timeouts, connection failures, HTTP 408/429/5xx responses and the equivalent provider SDK
+    errors. Validation and definition errors are never retried.
+    """
+    if isinstance(error, (InvocationTimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, HttpRequestError):
+        statusCode = getattr(error, "statusCode", None)
+        return statusCode is None or statusCode in (408, 429) or statusCode >= 500
+    statusCode = getattr(error, "status_code", None)
+    if isinstance(statusCode, int):
+        return statusCode in (408, 429) or statusCode >= 500
+    return type(error).__name__ in _RETRYABLE_ERROR_NAMES
+
+class ResiliencePolicy():
+    """
+    Retries, deadlines and hedging for calls to slow or flaky upstreams (API tools, language model providers).
+
+    Retries: a failed attempt is retried (up to maxAttempts in total) if retryOn accepts the error, after a full jitter
+    exponential backoff of up to backoffBase * 2**retry seconds (capped at backoffMax, and never shorter than a Retry-After
+    the upstream sent). The last error is raised once attempts are exhausted.
+
+    Deadlines: every attempt is bounded by attemptTimeout and the whole call, backoff included, by totalTimeout. A timed
+    out attempt raises InvocationTimeoutError, which is retryable.
+
+    Hedging (idempotent calls only): if an attempt has not finished after the hedgePercentile latency of recent successful
+    attempts (or after hedgeDelay until enough latencies are observed), a duplicate is started and whichever finishes first
+    wins. The other one is cancelled; a sync call cannot be interrupted mid-call, so its thread finishes in the background
+    and the result is discarded. stats() reports how often hedging was triggered and won.
+
+    Attempts run inline unless a deadline or hedging needs them on a worker thread, so a policy with neither costs nothing
+    beyond the retry loop.
+    """
+    def __init__(
+        self,
+        maxAttempts: int = 3,
+        backoffBase: float = 0.1,
+        backoffMax: float = 5.0,
+        attemptTimeout: Optional[float] = None,
+        totalTimeout: Optional[float] = None,
+        hedgePercentile: Optional[float] = None, #e.g. 0.95 hedges attempts slower than the observed p95
+        hedgeDelay: Optional[float] = None, #Fixed hedge delay, used until enough latencies are observed
+        minSamples: int = 20,
+        latencyWindow: int = 256,
+        retryOn: Callable[[BaseException], bool] = is_retryable_error,
+        maxWorkers: int = 32
+    ):
+        self.maxAttempts: int = max(1, maxAttempts)
+        self.backoffBase: float = backoffBase
+        self.backoffMax: float = backoffMax
+        self.attemptTimeout: Optional[float] = attemptTimeout
+        self.totalTimeout: Optional[float] = totalTimeout
+        self.hedgePercentile: Optional[float] = hedgePercentile
+        self.hedgeDelay: Optional[float] = hedgeDelay
+        self.minSamples: int = minSamples
+        self.retryOn: Callable[[BaseException], bool] = retryOn
+        self.maxWorkers: int = maxWorkers
+        self.metrics: dict[str, int] = {
+            "calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedgeWins": 0, "attemptTimeouts": 0, "failures": 0
+        }
+        self._latencies: deque[float] = deque(maxlen=latencyWindow)
+        self._hedgeAfter: Optional[float] = None
+        self._samplesSinceUpdate: int = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def hedging(self) -> bool:
+        return self.hedgePercentile is not None or self.hedgeDelay is not None
+
+    def current_hedge_delay(self) -> Optional[float]:
+        """Seconds after which an idempotent attempt is hedged, or None if hedging is off or not warmed up yet"""
+        if self.hedgePercentile is not None and self._hedgeAfter is not None:
+            return self._hedgeAfter
+        return self.hedgeDelay
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["hedgeRate"] = metrics["hedges"] / metrics["attempts"] if metrics["attempts"] else 0.0
+        metrics["hedgeWinRate"] = metrics["hedgeWins"] / metrics["hedges"] if metrics["hedges"] else 0.0
+        metrics["hedgeDelay"] = self.current_hedge_delay()
+        return metrics
+
+    def run(
+        self,
+        func: Callable[..., Any],
+        *args,
+        idempotent: bool = True,
+        **kwargs
+    ) -> Any:
+        """Call func(*args, **kwargs) under this policy. Hedging only applies to idempotent calls."""
+        self._count("calls")
+        deadline = time.monotonic() + self.totalTimeout if self.totalTimeout is not None else None
+        for attempt in range(self.maxAttempts):
+            try:
+                return self._attempt(func, args, kwargs, idempotent, deadline)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    self._count("failures")
+                    raise
+            self._count("retries")
+            time.sleep(delay)
+
+    async def arun(
+        self,
+        func: Callable[..., Any],
+        *args,
+        idempotent: bool = True,
+        **kwargs
+    ) -> Any:
+        """Async version of run, for coroutine functions. Losing hedges and timed out attempts are cancelled."""
+        import asyncio
+        self._count("calls")
+        deadline = time.monotonic() + self.totalTimeout if self.totalTimeout is not None else None
+        for attempt in range(self.maxAttempts):
+            try:
+                return await self._aattempt(func, args, kwargs, idempotent, deadline)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    self._count("failures")
+                    raise
+            self._count("retries")
+            await asyncio.sleep(delay)
+
+    def _retry_delay(
+        self,
+        error: BaseException,
+        attempt: int,
+        deadline: Optional[float]
+    ) -> Optional[float]:
+        """Backoff before the next attempt, or None if the error should be raised"""
+        if attempt + 1 >= self.maxAttempts or not self.retryOn(error):
+            return None
+        delay = random.uniform(0, min(self.backoffMax, self.backoffBase * 2 ** attempt))
+        retryAfter = retry_after_seconds(error)
+        if retryAfter is not None:
+            delay = max(delay, retryAfter)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _attempt_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        timeout = self.attemptTimeout
+        if deadline is not None:
+            remaining = max(0.0, deadline - time.monotonic())
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _attempt(
+        self,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+        idempotent: bool,
+        deadline: Optional[float]
+    ) -> Any:
+        from concurrent.futures import FIRST_COMPLETED, wait
+        timeout = self._attempt_timeout(deadline)
+        hedgeDelay = self.current_hedge_delay() if idempotent else None
+        if hedgeDelay is not None and timeout is not None and hedgeDelay >= timeout:
+            hedgeDelay = None
+        self._count("attempts")
+        start = time.perf_counter()
+        if timeout is None and hedgeDelay is None:
+            result = func(*args, **kwargs)
+            self._observe(time.perf_counter() - start)
+            return result
+
+        executor = self._get_executor()
+        #Each thread gets its own copy of the context so tracing spans nest under the caller's span
+        submit = lambda: executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+        started: dict[Future, float] = {submit(): start}
+        hedged = hedgeDelay is None
+        firstError: Optional[BaseException] = None
+        while started:
+            elapsed = time.perf_counter() - start
+            waitFor = None if timeout is None else timeout - elapsed
+            if not hedged:
+                waitFor = hedgeDelay - elapsed if waitFor is None else min(waitFor, hedgeDelay - elapsed)
+            done, _ = wait(started, timeout=max(0.0, waitFor) if waitFor is not None else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                futureStart = started.pop(future)
+                error = future.exception()
+                if error is None:
+                    for loser in started:
+                        loser.cancel()
+                    self._observe(time.perf_counter() - futureStart)
+                    if futureStart != start:
+                        self._count("hedgeWins")
+                    return future.result()
+                firstError = firstError if firstError is not None else error
+            if done:
+                continue
+            if not hedged and time.perf_counter() - start >= hedgeDelay:
+                hedged = True
+                self._count("hedges")
+                started[submit()] = time.perf_counter()
+                continue
+            if timeout is not None and time.perf_counter() - start >= timeout:
+                for future in started:
+                    future.cancel()
+                self._count("attemptTimeouts")
+                raise InvocationTimeoutError(f'Attempt did not finish within {timeout} seconds.')
+        raise firstError
+
+    async def _aattempt(
+        self,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+        idempotent: bool,
+        deadline: Optional[float]
+    ) -> Any:
+        import asyncio
+        timeout = self._attempt_timeout(deadline)
+        hedgeDelay = self.current_hedge_delay() if idempotent else None
+        if hedgeDelay is not None and timeout is not None and hedgeDelay >= timeout:
+            hedgeDelay = None
+        self._count("attempts")
+        start = time.perf_counter()
+        if hedgeDelay is None:
+            try:
+                result = await asyncio.wait_for(func(*args, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                self._count("attemptTimeouts")
+                raise InvocationTimeoutError(f'Attempt did not finish within {timeout} seconds.') from None
+            self._observe(time.perf_counter() - start)
+            return result
+
+        started: dict[asyncio.Task, float] = {asyncio.ensure_future(func(*args, **kwargs)): start}
+        hedged = False
+        firstError: Optional[BaseException] = None
+        try:
+            while started:
+                elapsed = time.perf_counter() - start
+                waitFor = None if timeout is None else timeout - elapsed
+                if not hedged:
+                    waitFor = hedgeDelay - elapsed if waitFor is None else min(waitFor, hedgeDelay - elapsed)
+                done, _ = await asyncio.wait(started, timeout=max(0.0, waitFor) if waitFor is not None else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    taskStart = started.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        self._observe(time.perf_counter() - taskStart)
+                        if taskStart != start:
+                            self._count("hedgeWins")
+                        return task.result()
+                    firstError = firstError if firstError is not None else error
+                if done:
+                    continue
+                if not hedged and time.perf_counter() - start >= hedgeDelay:
+                    hedged = True
+                    self._count("hedges")
+                    started[asyncio.ensure_future(func(*args, **kwargs))] = time.perf_counter()
+                    continue
+                if timeout is not None and time.perf_counter() - start >= timeout:
+                    self._count("attemptTimeouts")
+                    raise InvocationTimeoutError(f'Attempt did not finish within {timeout} seconds.')
+            raise firstError
+        finally:
+            for task in started:
+                task.cancel()
+
+    def _observe(self, latency: float) -> None:
+        if self.hedgePercentile is None:
+            return
+        with self._lock:
+            self._latencies.append(latency)
+            self._samplesSinceUpdate += 1
+            #Re-sorting the window on every call would cost more than the hedge saves; refresh every few samples
+            if len(self._latencies) >= self.minSamples and (self._hedgeAfter is None or self._samplesSinceUpdate >= 16):
+                ordered = sorted(self._latencies)
+                self._hedgeAfter = ordered[min(len(ordered) - 1, int(self.hedgePercentile * len(ordered)))]
+                self._samplesSinceUpdate = 0
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.metrics[name] += 1
+        if instrumentation.enabled:
+            instrumentation.count(f"resilience.{name}")
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers,
+                                                        thread_name_prefix="principalai-resilience")
+        return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
@@ -0,0 +1,13 @@
+from typing import Callable
+
+TokenCounter = Callable[[str], int]
+
+def approximate_token_count(text: str) -> int:
+    """Cheap token estimate (about 4 characters per token for English text). Use a real tokenizer where exact counts matter."""
+    return approximate_token_count_for_length(len(text)) if text else 0
+
+def approximate_token_count_for_length(length: int) -> int:
+    """approximate_token_count of any text with the given number of characters"""
+    if length <= 0:
+        return 0
+    return (length + 3) // 4
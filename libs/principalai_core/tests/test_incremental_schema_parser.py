@@ -0,0 +1,114 @@
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from principalai_core.utils.errors import SchemaMismatchError
+from principalai_core.utils.parsers.streaming import IncrementalSchemaParser
+
+class Answer(BaseModel):
+    title: str = Field(description="Title")
+    score: float = Field(description="Score", ge=0)
+    done: bool = Field(description="Whether the task is done")
+    note: Optional[str] = Field(default=None, description="Optional note")
+    tags: list[str] = Field(default_factory=list, description="Tags")
+
+class Strict(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    count: int = Field(alias="Count", description="Count", gt=0)
+
+    @field_validator("count")
+    @classmethod
+    def even(cls, value: int) -> int:
+        if value % 2:
+            raise ValueError("count must be even")
+        return value
+
+DOCUMENT = '{"title": "say \\"hi\\" \\\\ \\u00e9", "score": 1.5e1, "done": true, "note": null, "tags": ["a", "}"]}'
+
+def parse(model, chunks):
+    parser = IncrementalSchemaParser(model)
+    fields = {}
+    for chunk in chunks:
+        fields.update(parser.feed(chunk))
+    return parser, fields
+
+def all_splits(text):
+    for first in range(1, len(text)):
+        yield [text[:first], text[first:]]
+        for second in range(first + 1, len(text)):
+            yield [text[:first], text[first:second], text[second:]]
+
+def test_every_chunk_boundary_gives_the_same_fields():
+    expected = Answer.model_validate_json(DOCUMENT)
+    for chunks in all_splits(DOCUMENT):
+        parser, fields = parse(Answer, chunks)
+        assert parser.done, chunks
+        assert fields == expected.model_dump(), chunks
+        assert parser.finish() == expected
+
+def test_single_character_chunks():
+    parser, fields = parse(Answer, list(DOCUMENT))
+    assert fields["title"] == 'say "hi" \\ é'
+    assert parser.finish() == Answer.model_validate_json(DOCUMENT)
+
+@pytest.mark.parametrize("chunks", [
+    ['{"title": "a\\', '"b"', ', "score": 0, "done": false}'],
+    ['{"title": "a\\u00', 'e9", "score": 0, "done": false}'],
+    ['{"title": "a\\\\', '", "score": 0, "done": false}'],
+])
+def test_escape_split_across_chunks(chunks):
+    parser, fields = parse(Answer, chunks)
+    assert fields["title"] == Answer.model_validate_json("".join(chunks)).title
+    assert parser.finish().title == fields["title"]
+
+@pytest.mark.parametrize("chunks, name, value", [
+    (['{"title": "t", "done": true, "score": 4', '2}'], "score", 42),
+    (['{"title": "t", "score": 1, "done": tr', 'ue}'], "done", True),
+    (['{"title": "t", "score": 1, "done": false', '}'], "done", False),
+    (['{"title": "t", "score": 1, "done": false, "note": null', '\n}'], "note", None),
+])
+def test_primitive_at_end_of_input(chunks, name, value):
+    parser, fields = parse(Answer, chunks[:1])
+    assert name not in fields
+    fields.update(parser.feed(chunks[1]))
+    assert fields[name] == value
+    assert parser.done
+    assert getattr(parser.finish(), name) == value
+
+def test_unterminated_primitive_is_not_complete():
+    parser, fields = parse(Answer, ['{"title": "t", "done": true, "score": 12'])
+    assert "score" not in fields
+    with pytest.raises(SchemaMismatchError):
+        parser.finish()
+
+@pytest.mark.parametrize("fence", ["```json\n", "```\n", "Here you go:\n```json\n"])
+def test_preamble_fence_is_skipped(fence):
+    text = f'{fence}{{"title": "t", "score": 1, "done": true}}\n```'
+    for split in range(1, len(text)):
+        parser, fields = parse(Answer, [text[:split], text[split:]])
+        assert fields == {"title": "t", "score": 1, "done": True}
+        assert parser.finish().title == "t"
+
+def test_long_preamble_is_rejected():
+    parser = IncrementalSchemaParser(Answer, maxPreamble=4)
+    with pytest.raises(SchemaMismatchError):
+        parser.feed("Sure, here is the JSON: {")
+
+def test_field_constraints_fail_early():
+    parser = IncrementalSchemaParser(Answer)
+    with pytest.raises(SchemaMismatchError):
+        parser.feed('{"title": "t", "score": -1, ')
+
+def test_alias_and_forbidden_extra_fields():
+    parser, fields = parse(Strict, ['{"Cou', 'nt": 4}'])
+    assert fields == {"count": 4}
+    assert parser.finish().count == 4
+    with pytest.raises(SchemaMismatchError):
+        parse(Strict, ['{"Count": 4, "other": 1}'])
+
+def test_field_validators_run_on_finish_only():
+    parser, fields = parse(Strict, ['{"Count": 3}'])
+    assert fields == {"count": 3}
+    with pytest.raises(SchemaMismatchError):
+        parser.finish()
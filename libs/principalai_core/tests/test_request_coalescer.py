@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from principalai_core.language_models.batching import RequestCoalescer
+
+class FakeBatchedProvider:
+    """Embeds a batch of texts in one request; each embedding identifies its text"""
+    def __init__(self, delay=0.0, error=None):
+        self.requests = []
+        self.delay = delay
+        self.error = error
+
+    async def embed(self, texts):
+        self.requests.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [[float(len(text)), text] for text in texts]
+
+def test_flush_when_window_expires():
+    provider = FakeBatchedProvider()
+    coalescer = RequestCoalescer(provider.embed, maxBatchSize=64, maxWaitSeconds=0.05)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await asyncio.gather(*(coalescer.submit(f"text {i}") for i in range(5)))
+        return results, loop.time() - start
+    results, elapsed = asyncio.run(main())
+    assert provider.requests == [[f"text {i}" for i in range(5)]]
+    assert elapsed >= 0.04
+    assert [result[1] for result in results] == [f"text {i}" for i in range(5)]
+    assert coalescer.batches == 1 and coalescer.averageBatchSize == 5
+
+def test_flush_at_max_batch_size():
+    provider = FakeBatchedProvider()
+    #The window is far longer than the test; only full batches may be sent before it expires
+    coalescer = RequestCoalescer(provider.embed, maxBatchSize=3, maxWaitSeconds=10.0)
+
+    async def main():
+        results = await asyncio.wait_for(asyncio.gather(*(coalescer.submit(str(i)) for i in range(6))), 1.0)
+        return results
+    results = asyncio.run(main())
+    assert provider.requests == [["0", "1", "2"], ["3", "4", "5"]]
+    assert [result[1] for result in results] == [str(i) for i in range(6)]
+
+def test_results_fan_out_to_their_callers():
+    provider = FakeBatchedProvider(delay=0.01)
+    coalescer = RequestCoalescer(provider.embed, maxBatchSize=4, maxWaitSeconds=0.01)
+
+    async def caller(text, wait):
+        await asyncio.sleep(wait)
+        return text, await coalescer.submit(text)
+
+    async def main():
+        texts = [f"item-{i}" * (i + 1) for i in range(10)]
+        return await asyncio.gather(*(caller(text, (i % 3) * 0.002) for i, text in enumerate(texts)))
+    for text, result in asyncio.run(main()):
+        assert result == [float(len(text)), text]
+    assert sum(len(request) for request in provider.requests) == 10
+    assert all(len(request) <= 4 for request in provider.requests)
+
+def test_submit_many_keeps_order_across_batches():
+    provider = FakeBatchedProvider()
+    coalescer = RequestCoalescer(provider.embed, maxBatchSize=2, maxWaitSeconds=0.01)
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+    results = asyncio.run(coalescer.submit_many(texts))
+    assert [result[1] for result in results] == texts
+    assert len(provider.requests) == 3
+
+def test_failed_batch_reaches_every_waiter():
+    error = ConnectionError("provider down")
+    provider = FakeBatchedProvider(error=error)
+    coalescer = RequestCoalescer(provider.embed, maxBatchSize=8, maxWaitSeconds=0.01)
+
+    async def main():
+        return await asyncio.gather(*(coalescer.submit(str(i)) for i in range(5)), return_exceptions=True)
+    results = asyncio.run(main())
+    assert len(provider.requests) == 1
+    assert all(result is error for result in results)
+
+def test_wrong_number_of_results_fails_the_batch():
+    async def short(texts):
+        return texts[:-1]
+    coalescer = RequestCoalescer(short, maxBatchSize=8, maxWaitSeconds=0.01)
+
+    async def main():
+        return await asyncio.gather(*(coalescer.submit(str(i)) for i in range(3)), return_exceptions=True)
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from principalai_core.language_models import LanguageModel, ResponseCache
+from principalai_core.prompts import FunctionPrompt
+from principalai_core.utils.errors import IncorrectDefinitonError
+
+class FakeAsyncModel(LanguageModel):
+    def __init__(self):
+        super().__init__()
+        self.providerName = "fake"
+        self.model = "fake-async"
+        self.asynchronous = True
+        self.calls = 0
+
+    async def run(self, prompt, **parameters):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return f"answer to {prompt}"
+
+def make_prompt(cache):
+    model = FakeAsyncModel()
+    prompt = FunctionPrompt(prompt="question {x}", responseCache=cache)
+    prompt.set_language_model(model)
+    return prompt, model
+
+async def run_twice(prompt):
+    return await prompt.run(x=1), await prompt.run(x=1)
+
+def test_async_engine_memory_tier():
+    cache = ResponseCache()
+    prompt, model = make_prompt(cache)
+    assert asyncio.run(run_twice(prompt)) == ("answer to question 1", "answer to question 1")
+    assert model.calls == 1
+    assert cache.stats()["memoryHits"] == 1
+
+def test_async_engine_disk_tier(tmp_path):
+    path = str(tmp_path / "responses.db")
+    prompt, model = make_prompt(ResponseCache(diskPath=path))
+    assert asyncio.run(run_twice(prompt)) == ("answer to question 1", "answer to question 1")
+    assert model.calls == 1
+
+    #A fresh cache on the same file answers from disk
+    cache = ResponseCache(diskPath=path)
+    prompt, model = make_prompt(cache)
+    assert asyncio.run(prompt.run(x=1)) == "answer to question 1"
+    assert model.calls == 0
+    assert cache.stats()["diskHits"] == 1
+
+def test_get_or_run_rejects_awaitables():
+    cache = ResponseCache()
+
+    async def engine():
+        return "x"
+    with pytest.raises(IncorrectDefinitonError):
+        cache.get_or_run("key", engine)
+    assert cache.get("key", None) is None
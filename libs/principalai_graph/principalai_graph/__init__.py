@@ -0,0 +1,11 @@
+from .graph import (
+    Node,
+    Graph
+)
+from .engine import (
+    GraphRun,
+    GraphExecutor,
+    CheckpointStore,
+    MemoryCheckpointStore,
+    DirectoryCheckpointStore
+)
@@ -0,0 +1,9 @@
+from .core import (
+    GraphRun,
+    GraphExecutor
+)
+from .checkpoint import (
+    CheckpointStore,
+    MemoryCheckpointStore,
+    DirectoryCheckpointStore
+)
@@ -0,0 +1,108 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Union
+from urllib.parse import quote, unquote
+import json
+import os
+import pickle
+import threading
+
+from principalai_core.utils.errors import IncorrectDefinitonError
+
+class CheckpointStore(ABC):
+    """
+    Stores the results of finished nodes so an interrupted graph run can resume without redoing them.
+
+    open is called once per run with the graph's signature, which includes a digest of the graph inputs, and returns the
+    results saved by an earlier run of the same graph with the same inputs; save is called as each node finishes.
+    """
+    @abstractmethod
+    def open(self, signature: dict) -> dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def save(self, name: str, result: Any) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Keeps results in memory, by reference. Resumes within the same process, e.g. after a failed node is fixed."""
+    def __init__(self):
+        self.signature: Union[dict, None] = None
+        self.results: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def open(self, signature: dict) -> dict[str, Any]:
+        with self._lock:
+            if self.signature is not None and self.signature != signature:
+                raise IncorrectDefinitonError('Checkpoint belongs to a different graph or different graph inputs.')
+            self.signature = signature
+            return dict(self.results)
+
+    def save(self, name: str, result: Any) -> None:
+        with self._lock:
+            self.results[name] = result
+
+    def clear(self) -> None:
+        with self._lock:
+            self.signature = None
+            self.results.clear()
+
+class DirectoryCheckpointStore(CheckpointStore):
+    """
+    Keeps each node's result as one pickle file in a directory, so runs can resume across processes.
+
+    Results are pickled with the highest protocol to a temporary file and renamed into place, so a crash mid-write never
+    leaves a partial result behind. Only results and a digest of the inputs are stored; the same graph inputs have to be
+    supplied again on resume.
+    """
+    def __init__(
+        self,
+        path: Union[str, Path]
+    ):
+        self.path = Path(path)
+
+    @property
+    def _signaturePath(self) -> Path:
+        return self.path / "graph.json"
+
+    def _resultPath(self, name: str) -> Path:
+        return self.path / f"{quote(name, safe='')}.pkl"
+
+    def open(self, signature: dict) -> dict[str, Any]:
+        self.path.mkdir(parents=True, exist_ok=True)
+        if self._signaturePath.exists():
+            if json.loads(self._signaturePath.read_text(encoding="utf-8")) != signature:
+                raise IncorrectDefinitonError(
+                    f'Checkpoint in {self.path} belongs to a different graph or different graph inputs.'
+                )
+        else:
+            self._write(self._signaturePath, json.dumps(signature).encode("utf-8"))
+
+        results = {}
+        for resultPath in self.path.glob("*.pkl"):
+            name = unquote(resultPath.stem)
+            if name in signature["nodes"]:
+                with open(resultPath, "rb") as f:
+                    results[name] = pickle.load(f)
+        return results
+
+    def save(self, name: str, result: Any) -> None:
+        self._write(self._resultPath(name), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def clear(self) -> None:
+        if not self.path.exists():
+            return
+        for resultPath in self.path.glob("*.pkl"):
+            resultPath.unlink()
+        self._signaturePath.unlink(missing_ok=True)
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        temporaryPath = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temporaryPath, "wb") as f:
+            f.write(data)
+        os.replace(temporaryPath, path)
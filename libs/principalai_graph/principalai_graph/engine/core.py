@@ -0,0 +1,225 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Optional
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+
+from principalai_core.instrumentation import instrumentation
+from principalai_core.utils.errors import DoesNotExistError, GraphExecutionError, InvocationTimeoutError
+from principalai_graph.graph import Graph, Node
+from principalai_graph.engine.checkpoint import CheckpointStore
+
+class GraphRun():
+    """Outcome of running a Graph: node results, errors and timings"""
+    def __init__(
+        self,
+        graph: Graph
+    ):
+        self.graph: Graph = graph
+        self.results: dict[str, Any] = {}
+        self.errors: dict[str, BaseException] = {}
+        self.resumed: list[str] = []
+        #Start and end of every executed node, in seconds since the start of the run
+        self.timings: dict[str, tuple[float, float]] = {}
+        self.elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and len(self.results) == len(self.graph.nodes)
+
+    @property
+    def skipped(self) -> list[str]:
+        """Nodes that never ran because a node they depend on failed"""
+        return [name for name in self.graph.nodes if name not in self.results and name not in self.errors]
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+    def critical_path(self) -> tuple[list[str], float]:
+        """Longest chain of dependent nodes by execution time, and its total duration in seconds"""
+        longest: dict[str, tuple[float, Optional[str]]] = {}
+        for name in self.graph.validate():
+            start, end = self.timings.get(name, (0.0, 0.0))
+            upstream = [(longest[dependency][0], dependency) for dependency in self.graph.nodes[name].dependsOn
+                        if dependency in longest]
+            best = max(upstream, default=(0.0, None))
+            longest[name] = (best[0] + end - start, best[1])
+        if not longest:
+            return [], 0.0
+        name = max(longest, key=lambda key: longest[key][0])
+        total = longest[name][0]
+        path = []
+        while name is not None:
+            path.append(name)
+            name = longest[name][1]
+        return path[::-1], total
+
+class GraphExecutor():
+    """
+    Runs a Graph, starting each node as soon as its dependencies have finished.
+
+    Independent branches run concurrently, so a run takes about as long as the graph's critical path instead of the sum
+    of all nodes. At most maxConcurrency nodes run at once. Nodes with an async arun are awaited on the event loop and
+    everything else runs on a thread pool (in a copy of the current context, so tracing spans nest across the thread hop).
+
+    Results are handed to dependent nodes by reference and never copied or serialized, unless a checkpoint store is
+    given: then every result is saved as its node finishes and a later run with the same store resumes from the saved
+    results instead of running those nodes again.
+
+    With failFast (the default) the first failing node cancels the run and raises a GraphExecutionError. A sync node
+    cannot be interrupted mid-call, so its thread finishes in the background and the result is discarded. Without
+    failFast the nodes depending on a failed node are skipped, everything else still runs, and errors are reported on
+    the returned GraphRun.
+    """
+    def __init__(
+        self,
+        maxConcurrency: int = 8,
+        maxWorkers: Optional[int] = None,
+        failFast: bool = True
+    ):
+        if maxConcurrency < 1:
+            raise ValueError('maxConcurrency must be at least 1')
+        self.maxConcurrency = maxConcurrency
+        self.maxWorkers = maxWorkers if maxWorkers is not None else maxConcurrency
+        self.failFast = failFast
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "GraphExecutor":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+
+    def run(
+        self,
+        graph: Graph,
+        inputs: Optional[dict[str, Any]] = None,
+        checkpoint: Optional[CheckpointStore] = None
+    ) -> GraphRun:
+        """Blocking version of arun. Use arun when already inside an event loop."""
+        return asyncio.run(self.arun(graph, inputs, checkpoint))
+
+    async def arun(
+        self,
+        graph: Graph,
+        inputs: Optional[dict[str, Any]] = None,
+        checkpoint: Optional[CheckpointStore] = None
+    ) -> GraphRun:
+        """Run the graph with the given graph inputs and return its results"""
+        graph.validate()
+        inputs = inputs if inputs is not None else {}
+        missing = [name for name in graph.inputs if name not in inputs]
+        if missing:
+            raise DoesNotExistError(f'Missing graph inputs: {", ".join(missing)}')
+
+        run = GraphRun(graph)
+        results: dict[str, Any] = dict(inputs)
+        if checkpoint is not None:
+            restored = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), checkpoint.open, graph.signature(inputs)
+            )
+            results.update(restored)
+            run.results.update(restored)
+            run.resumed.extend(restored)
+
+        dependents = graph.dependents()
+        remaining = {
+            name: sum(dependency in graph.nodes and dependency not in run.results for dependency in node.dependsOn)
+            for name, node in graph.nodes.items() if name not in run.results
+        }
+        ready = deque(name for name, count in remaining.items() if count == 0)
+        running: dict[asyncio.Task, str] = {}
+        runStart = time.perf_counter()
+
+        try:
+            while ready or running:
+                while ready and len(running) < self.maxConcurrency:
+                    name = ready.popleft()
+                    task = asyncio.create_task(self._run_node(graph.nodes[name], results, checkpoint, runStart))
+                    running[task] = name
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        output, start, end = task.result()
+                    except Exception as e:
+                        run.errors[name] = e
+                        if self.failFast:
+                            error = GraphExecutionError(f'Node {name} failed: {type(e).__name__}: {e}')
+                            error.nodeName = name
+                            error.run = run
+                            raise error from e
+                        continue
+                    results[name] = output
+                    run.results[name] = output
+                    run.timings[name] = (start, end)
+                    for dependent in dependents[name]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            ready.append(dependent)
+        finally:
+            for task in running:
+                task.cancel()
+            run.elapsed = time.perf_counter() - runStart
+        return run
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    async def _run_node(
+        self,
+        node: Node,
+        results: dict[str, Any],
+        checkpoint: Optional[CheckpointStore],
+        runStart: float
+    ) -> tuple[Any, float, float]:
+        arguments = node.arguments(results)
+        with instrumentation.span(node.name, "node"):
+            start = time.perf_counter() - runStart
+            deadline = asyncio.timeout(node.timeout)
+            try:
+                async with deadline:
+                    output = await self._invoke(node.invocable, arguments)
+            except TimeoutError:
+                #A TimeoutError raised by the node itself is its own error, not the node timeout
+                if not deadline.expired():
+                    raise
+                raise InvocationTimeoutError(f'{node.name} did not finish within {node.timeout} seconds.') from None
+            end = time.perf_counter() - runStart
+        if checkpoint is not None:
+            await asyncio.get_running_loop().run_in_executor(self._get_executor(), checkpoint.save, node.name, output)
+        return output, start, end
+
+    def _invoke(
+        self,
+        invocable: Any,
+        arguments: dict[str, Any]
+    ):
+        asyncRun = getattr(invocable, "arun", None)
+        if asyncRun is not None and inspect.iscoroutinefunction(asyncRun):
+            return asyncRun(**arguments)
+        if inspect.iscoroutinefunction(invocable):
+            return invocable(**arguments)
+        func = getattr(invocable, "run", None)
+        if func is None:
+            if not callable(invocable):
+                raise DoesNotExistError(f'{invocable!r} has neither a run method nor is it callable.')
+            func = invocable
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return loop.run_in_executor(self._get_executor(), partial(context.run, func, **arguments))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="principalai-graph")
+        return self._executor
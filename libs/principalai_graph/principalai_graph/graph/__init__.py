@@ -0,0 +1,4 @@
+from .core import (
+    Node,
+    Graph
+)
@@ -0,0 +1,160 @@
+from typing import Any, Callable, Iterable, Optional, Union
+import hashlib
+import pickle
+
+from principalai_core.utils.errors import AlreadyExistsError, DoesNotExistError, IncorrectDefinitonError
+
+class Node():
+    """A single step of a Graph: an Invocable (or plain callable) together with the results it depends on"""
+    __slots__ = ("name", "invocable", "dependsOn", "inputs", "kwargs", "timeout")
+
+    def __init__(
+        self,
+        name: str,
+        invocable: Any,
+        dependsOn: Iterable[str] = (),
+        inputs: Optional[dict[str, str]] = None,
+        kwargs: Optional[dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ):
+        '''
+        invocable is anything with a run method (Invocables, Tools, Agents, Prompts) or a plain callable. If it also has
+        an async arun it is awaited on the event loop instead of being run on a thread.
+
+        dependsOn lists the nodes (or graph inputs) this node waits for. By default each dependency's result is passed as a
+        keyword argument named after the dependency; inputs maps keyword argument names to dependencies instead, e.g.
+        {"text": "summarize"}. kwargs are passed unchanged on every run.
+        '''
+        self.name: str = name
+        self.invocable: Any = invocable
+        self.inputs: dict[str, str] = dict(inputs) if inputs is not None else {}
+        #Dependencies named only in inputs are dependencies as well
+        self.dependsOn: tuple[str, ...] = tuple(dict.fromkeys((*dependsOn, *self.inputs.values())))
+        self.kwargs: dict[str, Any] = kwargs if kwargs is not None else {}
+        self.timeout: Optional[float] = timeout
+
+    def arguments(
+        self,
+        results: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Keyword arguments for this node's run, taken by reference from the results of its dependencies"""
+        if self.inputs:
+            arguments = {parameter: results[source] for parameter, source in self.inputs.items()}
+        else:
+            arguments = {dependency: results[dependency] for dependency in self.dependsOn}
+        return {**self.kwargs, **arguments} if self.kwargs else arguments
+
+    def __repr__(self) -> str:
+        return f'Node(name={self.name!r}, dependsOn={list(self.dependsOn)!r})'
+
+class Graph():
+    """
+    Directed acyclic graph of Nodes.
+
+    Graph inputs are named values supplied when the graph is run; nodes depend on them like on any other node. Use a
+    GraphExecutor to run a graph: every node starts as soon as all of its dependencies have finished, so independent
+    branches run concurrently.
+    """
+    def __init__(
+        self,
+        inputs: Iterable[str] = ()
+    ):
+        self.inputs: tuple[str, ...] = tuple(inputs)
+        self.nodes: dict[str, Node] = {}
+        self._order: Optional[list[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.nodes
+
+    def add_node(
+        self,
+        name: str,
+        invocable: Any,
+        dependsOn: Iterable[str] = (),
+        inputs: Optional[dict[str, str]] = None,
+        kwargs: Optional[dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Node:
+        """Add a node to the graph. See Node for the parameters."""
+        if name in self.nodes or name in self.inputs:
+            raise AlreadyExistsError(f'{name} already exists in this graph.')
+        node = Node(name, invocable, dependsOn, inputs, kwargs, timeout)
+        self.nodes[name] = node
+        self._order = None
+        return node
+
+    def node(
+        self,
+        name: Optional[str] = None,
+        dependsOn: Iterable[str] = (),
+        inputs: Optional[dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> Callable[[Any], Any]:
+        """Decorator adding a function (or Invocable) as a node, named after the function unless a name is given"""
+        def decorator(invocable: Any) -> Any:
+            self.add_node(name or getattr(invocable, "__name__", None) or type(invocable).__name__, invocable,
+                          dependsOn, inputs, timeout=timeout)
+            return invocable
+        return decorator
+
+    def dependents(self) -> dict[str, list[str]]:
+        """Map of node or input name to the nodes depending on it"""
+        dependents: dict[str, list[str]] = {name: [] for name in (*self.inputs, *self.nodes)}
+        for node in self.nodes.values():
+            for dependency in node.dependsOn:
+                dependents[dependency].append(node.name)
+        return dependents
+
+    def validate(self) -> list[str]:
+        """Check that every dependency exists and that there are no cycles. Returns the nodes in topological order."""
+        if self._order is not None:
+            return self._order
+        known = set(self.inputs) | set(self.nodes)
+        for node in self.nodes.values():
+            for dependency in node.dependsOn:
+                if dependency not in known:
+                    raise DoesNotExistError(f'{node.name} depends on {dependency}, which is neither a node nor an input of this graph.')
+
+        remaining = {name: sum(dependency in self.nodes for dependency in node.dependsOn) for name, node in self.nodes.items()}
+        dependents = self.dependents()
+        ready = [name for name, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for dependent in dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.nodes):
+            cyclic = sorted(name for name in self.nodes if name not in set(order))
+            raise IncorrectDefinitonError(f'Graph has a cycle through the nodes: {", ".join(cyclic)}')
+        self._order = order
+        return order
+
+    def signature(
+        self,
+        inputs: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
+        """
+        Structure of the graph (inputs and dependencies) and a digest of each input value, used to check that a
+        checkpoint belongs to this graph run with the same inputs
+        """
+        inputs = inputs if inputs is not None else {}
+        return {
+            "inputs": sorted(self.inputs),
+            "nodes": {name: sorted(node.dependsOn) for name, node in sorted(self.nodes.items())},
+            "inputDigests": {name: _digest(inputs.get(name)) for name in sorted(self.inputs)}
+        }
+
+def _digest(value: Any) -> str:
+    #Values that cannot be pickled fall back to their repr. A digest that differs for equal values only makes a resume
+    #refuse the checkpoint, never silently reuse results of other inputs.
+    try:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        payload = repr(value).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
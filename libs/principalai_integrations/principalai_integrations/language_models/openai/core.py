@@ -1,25 +1,263 @@
-from openai import (
-    OpenAI as OpenAIBase,
-    AsyncOpenAI as AsyncOpenAIBase
-)
+from typing import Any, Optional, TYPE_CHECKING
 
 from principalai_core.language_models import LanguageModel
+from principalai_core.language_models.streaming import StreamingResponse, AsyncStreamingResponse
+
+if TYPE_CHECKING:
+    from principalai_core.utils.resilience import ResiliencePolicy
+
+def _messages(prompt: Any) -> list[dict]:
+    """Prompts can be passed in as a plain string or as a ready made list of chat messages"""
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    return list(prompt)
+
+def _usage_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+def _delta_text(chunk: Any) -> Optional[str]:
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content
+
+def _stream_options(parameters: dict) -> dict[str, Any]:
+    """Options to stream a completion, asking for usage on the final chunk so the scheduler can correct its estimate"""
+    streamOptions = parameters.get("stream_options") or {}
+    return {"stream": True, "stream_options": {**streamOptions, "include_usage": True}}
+
+def _batch_request(model: Optional[str], prompt: Any, customId: str, parameters: dict) -> dict[str, Any]:
+    """A line of an OpenAI batch job file for the chat completions endpoint"""
+    return {
+        "custom_id": customId,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {"model": model, "messages": _messages(prompt), **parameters}
+    }
+
+def _batch_output(responseBody: Any) -> Optional[str]:
+    return responseBody["choices"][0]["message"]["content"]
 
 class OpenAI_(LanguageModel):
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        model: Optional[str] = None,
+        parameters: Optional[dict] = None,
+        requestsPerMinute: Optional[float] = None, #Account limits; calls are scheduled client side when either is set
+        tokensPerMinute: Optional[float] = None,
+        resiliencePolicy: Optional["ResiliencePolicy"] = None, #Retries, deadlines and hedging for provider calls
+        hedgeCompletions: bool = False, #Completions are billed per attempt, so a losing hedge costs as much as the winner
+        **kwargs
+    ):
         super().__init__()
+        #The openai SDK is imported on first instantiation rather than at module import
+        from openai import OpenAI as OpenAIBase
         self.provider = OpenAIBase(*args, **kwargs)
         self.providerName = "OpenAI"
-    
-    def run():
-        pass
+        self.model = model
+        self.parameters = parameters or {}
+        if requestsPerMinute is not None or tokensPerMinute is not None:
+            self.set_rate_limits(requestsPerMinute, tokensPerMinute)
+        self.resiliencePolicy = resiliencePolicy
+        self.hedgeCompletions = hedgeCompletions
+
+    def run(self, prompt: Any, **parameters) -> Optional[str]:
+        """Run a chat completion and return the message content"""
+        if self.resiliencePolicy is None:
+            return self._run_once(prompt, parameters)
+        return self.resiliencePolicy.run(self._run_once, prompt, parameters, idempotent=self.hedgeCompletions)
+
+    def stream(self, prompt: Any, **parameters) -> StreamingResponse:
+        """Run a chat completion and stream the content deltas as the provider sends them"""
+        if self.resiliencePolicy is None:
+            providerStream, slot = self._open_stream(prompt, parameters)
+        else:
+            #Only opening the stream is retried; it is never hedged since the losing stream would be billed as well
+            providerStream, slot = self.resiliencePolicy.run(self._open_stream, prompt, parameters, idempotent=False)
+
+        def deltas():
+            for chunk in providerStream:
+                if slot is not None:
+                    #Only the final chunk carries usage (stream_options include_usage); record_usage ignores the rest
+                    slot.record_usage(_usage_tokens(chunk))
+                text = _delta_text(chunk)
+                if text:
+                    yield text
+
+        def close():
+            providerStream.close()
+            if slot is not None:
+                slot.release()
+        return StreamingResponse(deltas(), onClose=close)
+
+    def batch_request(self, prompt: Any, customId: str, **parameters) -> dict[str, Any]:
+        return _batch_request(self.model, prompt, customId, {**self.parameters, **parameters})
+
+    def run_batch_request(self, body: dict[str, Any]) -> dict[str, Any]:
+        """Run a batch job request as a regular chat completion and return the completion as the batch API would"""
+        parameters = {key: value for key, value in body.items() if key not in ("model", "messages")}
+        if self.resiliencePolicy is None:
+            return self._complete(body["messages"], parameters).model_dump()
+        return self.resiliencePolicy.run(self._complete, body["messages"], parameters,
+                                         idempotent=self.hedgeCompletions).model_dump()
+
+    def batch_output(self, responseBody: Any) -> Optional[str]:
+        return _batch_output(responseBody)
+
+    def _run_once(self, prompt: Any, parameters: dict) -> Optional[str]:
+        return self._complete(prompt, parameters).choices[0].message.content
+
+    def _complete(self, prompt: Any, parameters: dict):
+        if self.scheduler is None:
+            return self._create(prompt, parameters)
+        with self.scheduler.acquire(self.estimate_tokens(prompt, parameters)) as slot:
+            response = self._create(prompt, parameters)
+            slot.record_usage(_usage_tokens(response))
+        return response
+
+    def _open_stream(self, prompt: Any, parameters: dict):
+        #A scheduler slot is held until the stream is finished or closed
+        slot = self.scheduler.acquire(self.estimate_tokens(prompt, parameters)) if self.scheduler is not None else None
+        try:
+            return self._create(prompt, parameters, **_stream_options({**self.parameters, **parameters})), slot
+        except BaseException as e:
+            if slot is not None:
+                slot.release(e)
+            raise
+
+    def _create(self, prompt: Any, parameters: dict, **options):
+        #options (e.g. stream) override the same keys in the model or call parameters instead of being passed twice
+        return self.provider.chat.completions.create(
+            model=self.model,
+            messages=_messages(prompt),
+            **{**self.parameters, **parameters, **options}
+        )
 
 class AsyncOpenAI_(LanguageModel):
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        model: Optional[str] = None,
+        parameters: Optional[dict] = None,
+        embeddingModel: Optional[str] = None,
+        coalesceWindow: float = 0.005, #Seconds to wait for concurrent embedding calls to merge into one request
+        maxBatchSize: int = 256, #Maximum number of inputs per merged embedding request
+        requestsPerMinute: Optional[float] = None, #Account limits; calls are scheduled client side when either is set
+        tokensPerMinute: Optional[float] = None,
+        resiliencePolicy: Optional["ResiliencePolicy"] = None, #Retries, deadlines and hedging for provider calls
+        hedgeCompletions: bool = False, #Completions are billed per attempt, so a losing hedge costs as much as the winner
+        **kwargs
+    ):
         super().__init__()
+        from openai import AsyncOpenAI as AsyncOpenAIBase
+        from principalai_core.language_models.batching import RequestCoalescer
         self.provider = AsyncOpenAIBase(*args, **kwargs)
         self.providerName = "OpenAI"
+        self.model = model
+        self.parameters = parameters or {}
+        self.embeddingModel = embeddingModel
         self.asynchronous = True
-    
-    def run():
-        pass
\ No newline at end of file
+        self.embeddingCoalescer = RequestCoalescer(self._embed_batch, maxBatchSize, coalesceWindow)
+        if requestsPerMinute is not None or tokensPerMinute is not None:
+            self.set_rate_limits(requestsPerMinute, tokensPerMinute)
+        self.resiliencePolicy = resiliencePolicy
+        self.hedgeCompletions = hedgeCompletions
+
+    async def embed(self, text: str) -> list[float]:
+        """
+        Embed a single text. Concurrent calls are coalesced into one provider request and the embeddings are fanned back
+        out to each caller.
+        """
+        return await self.embeddingCoalescer.submit(text)
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """Embed several texts, merging them with any other concurrent embedding calls"""
+        return await self.embeddingCoalescer.submit_many(texts)
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        if self.resiliencePolicy is not None:
+            return await self.resiliencePolicy.arun(self._embed_batch_once, texts)
+        return await self._embed_batch_once(texts)
+
+    async def _embed_batch_once(self, texts: list[str]) -> list[list[float]]:
+        if self.scheduler is None:
+            response = await self.provider.embeddings.create(model=self.embeddingModel, input=texts)
+        else:
+            async with await self.scheduler.aacquire(sum(self.count_tokens(text) for text in texts)) as slot:
+                response = await self.provider.embeddings.create(model=self.embeddingModel, input=texts)
+                slot.record_usage(_usage_tokens(response))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    async def run(self, prompt: Any, **parameters) -> Optional[str]:
+        """Run a chat completion and return the message content"""
+        if self.resiliencePolicy is None:
+            return await self._run_once(prompt, parameters)
+        return await self.resiliencePolicy.arun(self._run_once, prompt, parameters, idempotent=self.hedgeCompletions)
+
+    async def astream(self, prompt: Any, **parameters) -> AsyncStreamingResponse:
+        """Run a chat completion and stream the content deltas as the provider sends them"""
+        if self.resiliencePolicy is None:
+            providerStream, slot = await self._open_stream(prompt, parameters)
+        else:
+            providerStream, slot = await self.resiliencePolicy.arun(self._open_stream, prompt, parameters, idempotent=False)
+
+        async def deltas():
+            async for chunk in providerStream:
+                if slot is not None:
+                    slot.record_usage(_usage_tokens(chunk))
+                text = _delta_text(chunk)
+                if text:
+                    yield text
+
+        async def close():
+            try:
+                await providerStream.close()
+            finally:
+                if slot is not None:
+                    slot.release()
+        return AsyncStreamingResponse(deltas(), onClose=close)
+
+    def batch_request(self, prompt: Any, customId: str, **parameters) -> dict[str, Any]:
+        return _batch_request(self.model, prompt, customId, {**self.parameters, **parameters})
+
+    async def run_batch_request(self, body: dict[str, Any]) -> dict[str, Any]:
+        """Run a batch job request as a regular chat completion and return the completion as the batch API would"""
+        parameters = {key: value for key, value in body.items() if key not in ("model", "messages")}
+        if self.resiliencePolicy is None:
+            return (await self._complete(body["messages"], parameters)).model_dump()
+        return (await self.resiliencePolicy.arun(self._complete, body["messages"], parameters,
+                                                 idempotent=self.hedgeCompletions)).model_dump()
+
+    def batch_output(self, responseBody: Any) -> Optional[str]:
+        return _batch_output(responseBody)
+
+    async def _run_once(self, prompt: Any, parameters: dict) -> Optional[str]:
+        return (await self._complete(prompt, parameters)).choices[0].message.content
+
+    async def _complete(self, prompt: Any, parameters: dict):
+        if self.scheduler is None:
+            return await self._create(prompt, parameters)
+        async with await self.scheduler.aacquire(self.estimate_tokens(prompt, parameters)) as slot:
+            response = await self._create(prompt, parameters)
+            slot.record_usage(_usage_tokens(response))
+        return response
+
+    async def _open_stream(self, prompt: Any, parameters: dict):
+        slot = None
+        if self.scheduler is not None:
+            slot = await self.scheduler.aacquire(self.estimate_tokens(prompt, parameters))
+        try:
+            return await self._create(prompt, parameters, **_stream_options({**self.parameters, **parameters})), slot
+        except BaseException as e:
+            if slot is not None:
+                slot.release(e)
+            raise
+
+    def _create(self, prompt: Any, parameters: dict, **options):
+        #options (e.g. stream) override the same keys in the model or call parameters instead of being passed twice
+        return self.provider.chat.completions.create(
+            model=self.model,
+            messages=_messages(prompt),
+            **{**self.parameters, **parameters, **options}
+        )
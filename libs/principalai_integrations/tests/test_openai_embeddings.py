@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+
+from principalai_integrations.language_models.openai.core import AsyncOpenAI_
+
+class FakeEmbeddings:
+    """Local stand-in for the OpenAI embeddings endpoint, returning the items out of order like the API may"""
+    def __init__(self, error=None):
+        self.requests = []
+        self.error = error
+
+    async def create(self, model, input):
+        self.requests.append(list(input))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        data = [SimpleNamespace(index=index, embedding=[float(len(text)), float(index)]) for index, text in enumerate(input)]
+        return SimpleNamespace(data=data[::-1], usage=SimpleNamespace(total_tokens=len(input)))
+
+def make_model(embeddings, **options):
+    model = AsyncOpenAI_(api_key="test", embeddingModel="fake-embedding", **options)
+    model.provider = SimpleNamespace(embeddings=embeddings)
+    return model
+
+def test_concurrent_embeds_share_one_request():
+    embeddings = FakeEmbeddings()
+    model = make_model(embeddings, coalesceWindow=0.01)
+    texts = ["a", "bb", "ccc"]
+
+    async def main():
+        return await asyncio.gather(*(model.embed(text) for text in texts))
+    assert asyncio.run(main()) == [[1.0, 0.0], [2.0, 1.0], [3.0, 2.0]]
+    assert embeddings.requests == [texts]
+
+def test_embed_many_splits_at_max_batch_size():
+    embeddings = FakeEmbeddings()
+    model = make_model(embeddings, coalesceWindow=10.0, maxBatchSize=2)
+    texts = ["a", "bb", "ccc", "dddd"]
+    results = asyncio.run(asyncio.wait_for(model.embed_many(texts), 1.0))
+    assert [result[0] for result in results] == [1.0, 2.0, 3.0, 4.0]
+    assert embeddings.requests == [["a", "bb"], ["ccc", "dddd"]]
+
+def test_embedding_error_reaches_every_caller():
+    error = RuntimeError("embedding failed")
+    model = make_model(FakeEmbeddings(error=error), coalesceWindow=0.01)
+
+    async def main():
+        return await asyncio.gather(*(model.embed(text) for text in ("a", "b")), return_exceptions=True)
+    assert asyncio.run(main()) == [error, error]